@@ -0,0 +1,101 @@
+"""
+Benchmark of the graph contraction engines.
+
+Both engines contract the same area:
+
+- sql: the `contract_graph_in_area` procedure (restricted nodes self-join + pgr_contraction),
+- python: roadgraphtool.contraction (segments fetched once, CSR adjacency, vectorized chain following).
+
+Before every run, the edges of the area are deleted and `nodes.contracted` is reset for all nodes, so use a
+database where the contraction result can be thrown away. Results are appended to
+'performance/contraction_benchmark_report.json'.
+
+Example:
+    python performance/contraction_benchmark.py config.yaml --runs 3
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import roadgraphtool.db
+from roadgraphtool.config import parse_config_file, set_logging
+from roadgraphtool.contraction import CONTRACTION_ENGINES
+from roadgraphtool.pipeline import contract_graph_in_area
+
+JSON_FILE = Path(__file__).resolve().parent / "contraction_benchmark_report.json"
+
+
+def reset_contraction(area_id: int):
+    roadgraphtool.db.db.execute_sql(f"DELETE FROM edges WHERE area = {area_id}")
+    roadgraphtool.db.db.execute_sql("UPDATE nodes SET contracted = FALSE WHERE contracted")
+
+
+def contraction_counts(area_id: int) -> dict:
+    edge_count, contracted_count = roadgraphtool.db.db.execute_sql_and_fetch_all_rows(
+        f"""
+        SELECT
+            (SELECT count(*) FROM edges WHERE area = {area_id}),
+            (SELECT count(*) FROM nodes WHERE contracted)
+        """
+    )[0]
+    return {"edges": edge_count, "contracted_nodes": contracted_count}
+
+
+def benchmark_engine(engine: str, area_id: int, srid: int, fill_speed: bool, runs: int) -> dict:
+    """Return timing of the contraction of *area_id* with *engine*."""
+    times = []
+    for _ in range(runs):
+        reset_contraction(area_id)
+        start_time = time.perf_counter()
+        contract_graph_in_area(area_id, srid, fill_speed, engine)
+        times.append(time.perf_counter() - start_time)
+
+    return {"runs": runs, "times_s": times, **contraction_counts(area_id)}
+
+
+def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the SQL and Python graph contraction.")
+    parser.add_argument("config_file", help="Path to the config file (area_id and srid are used)")
+    parser.add_argument("--area-id", type=int, default=None, help="Area to contract (default: config.area_id)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of repetitions")
+    parser.add_argument("--fill-speed", action="store_true", help="Contract with speeds from nodes_ways_speeds")
+    parser.add_argument("--engines", nargs="+", choices=CONTRACTION_ENGINES, default=list(CONTRACTION_ENGINES),
+                        help="Engines to benchmark")
+    return parser.parse_args(arg_list)
+
+
+def main(arg_list: list[str] | None = None):
+    args = parse_args(arg_list)
+    config = parse_config_file(Path(args.config_file))
+    set_logging(config)
+    roadgraphtool.db.init_db(config)
+
+    area_id = args.area_id if args.area_id is not None else config.area_id
+    report = {
+        "date": datetime.today().strftime('%d.%m.%Y %H:%M'),
+        "area_id": area_id,
+        "fill_speed": args.fill_speed,
+    }
+    for engine in args.engines:
+        report[engine] = benchmark_engine(engine, area_id, config.srid, args.fill_speed, args.runs)
+
+    if "sql" in report and "python" in report:
+        report["same_result"] = all(
+            report["sql"][key] == report["python"][key] for key in ("edges", "contracted_nodes")
+        )
+
+    reports = []
+    if JSON_FILE.exists():
+        with open(JSON_FILE, 'r') as f:
+            reports = json.load(f)
+    reports.append(report)
+    with open(JSON_FILE, mode='w') as f:
+        json.dump(reports, f, indent=4)
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
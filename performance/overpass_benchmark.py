@@ -0,0 +1,131 @@
+"""
+Benchmark of the Overpass import path against the local Overpass stand-in.
+
+The stand-in (roadgraphtool.overpass_standin) serves a local OSM file, so the numbers do not depend on the
+public Overpass instance and the runs are reproducible. Two things are measured:
+
+- query: the Overpass request + JSON decoding only (``query_json``),
+- import: the whole ``import_road_network`` call with ``road_import.source.type: overpass``.
+
+Results are appended to 'performance/overpass_benchmark_report.json'.
+
+Example:
+    python performance/overpass_benchmark.py config.yaml andorra-latest.osm.pbf --runs 3 --wipe
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import roadgraphtool.db
+from roadgraphtool.config import parse_config_file, set_logging
+from roadgraphtool.overpass_client import create_api, elements_by_type, policy_config_from_config, query_json
+from roadgraphtool.overpass_import import _overpass_timeout_s, _polygons_from_geom, _road_network_query
+from roadgraphtool.overpass_standin import OverpassStandIn, running_standin
+from roadgraphtool.road_import import get_area_polygon, import_road_network
+
+JSON_FILE = Path(__file__).resolve().parent / "overpass_benchmark_report.json"
+
+
+def benchmark_query(config, query: str, runs: int) -> dict:
+    """Return timing of the raw Overpass request for *query*."""
+    policy = policy_config_from_config(config)
+    api = create_api(policy)
+    times = []
+    element_count = 0
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = query_json(api, query, max_retries=0)
+        times.append(time.perf_counter() - start_time)
+        element_count = len(result.get("elements", []))
+
+    by_type = elements_by_type(result)
+    return {
+        "runs": runs,
+        "times_s": times,
+        "elements": element_count,
+        "nodes": len(by_type["node"]),
+        "ways": len(by_type["way"]),
+        "elements_per_s": element_count / min(times) if min(times) > 0 else None,
+    }
+
+
+def benchmark_import(config, area_id: int, runs: int, wipe: bool, element_count: int) -> dict:
+    """Return timing of the whole Overpass road import for *area_id*."""
+    times = []
+    for _ in range(runs):
+        if wipe:
+            roadgraphtool.db.db.execute_procedure("wipe_road_network_data", schema=config.schema)
+        start_time = time.perf_counter()
+        import_road_network(config, area_id)
+        times.append(time.perf_counter() - start_time)
+
+    return {
+        "runs": runs,
+        "times_s": times,
+        "elements_per_s": element_count / min(times) if min(times) > 0 else None,
+    }
+
+
+def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Overpass import against a local Overpass stand-in.")
+    parser.add_argument("config_file", help="Path to the config file (road_import and area_id are used)")
+    parser.add_argument("input_file", help="OSM file served by the stand-in (.osm, .osm.pbf)")
+    parser.add_argument("--area-id", type=int, default=None, help="Area to import (default: config.area_id)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of repetitions")
+    parser.add_argument("--wipe", action="store_true",
+                        help="Call wipe_road_network_data before every import run")
+    parser.add_argument("--query-only", action="store_true", help="Skip the database import benchmark")
+    return parser.parse_args(arg_list)
+
+
+def main(arg_list: list[str] | None = None):
+    args = parse_args(arg_list)
+    config = parse_config_file(Path(args.config_file))
+    set_logging(config)
+    roadgraphtool.db.init_db(config)
+
+    area_id = args.area_id if args.area_id is not None else config.area_id
+    config.road_import.source.type = "overpass"
+    # the query cache in export.dir would turn every run after the first into a file read
+    config.export = SimpleNamespace(activated=False)
+
+    load_start = time.perf_counter()
+    standin = OverpassStandIn.from_file(Path(args.input_file))
+    load_time = time.perf_counter() - load_start
+
+    area_poly = get_area_polygon(config, area_id)
+    if area_poly is None:
+        raise ValueError(f"No geometry for area id {area_id} in schema {config.schema}.areas.")
+    query = _road_network_query(_polygons_from_geom(area_poly), _overpass_timeout_s(config))
+
+    with running_standin(standin) as endpoint:
+        config.overpass.endpoint = endpoint
+        report = {
+            "date": datetime.today().strftime('%d.%m.%Y %H:%M'),
+            "input_file": os.path.basename(args.input_file),
+            "area_id": area_id,
+            "standin_load_time_s": load_time,
+            "query": benchmark_query(config, query, args.runs),
+        }
+        if not args.query_only:
+            report["import"] = benchmark_import(
+                config, area_id, args.runs, args.wipe, report["query"]["elements"]
+            )
+
+    reports = []
+    if JSON_FILE.exists():
+        with open(JSON_FILE, 'r') as f:
+            reports = json.load(f)
+    reports.append(report)
+    with open(JSON_FILE, mode='w') as f:
+        json.dump(reports, f, indent=4)
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the edge selections of the strong components computation.
+
+The components of the same area are computed with both edge selections of `compute_strong_components`:
+
+- geometry: edges within the area geometry (spatial filter over area_parts),
+- area: edges generated for the area (`edges.area`).
+
+Before every run, the `component_data` rows of the area are deleted, so use a database where they can be thrown away.
+The component counts of both selections are compared, results are appended to
+'performance/strong_components_benchmark_report.json'.
+
+Example:
+    python performance/strong_components_benchmark.py config.yaml --runs 3 --engine scipy
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import roadgraphtool.db
+from roadgraphtool.config import parse_config_file, set_logging
+from roadgraphtool.pipeline import compute_strong_components
+from roadgraphtool.strong_components import EDGE_SELECTIONS, STRONG_COMPONENTS_ENGINES
+
+JSON_FILE = Path(__file__).resolve().parent / "strong_components_benchmark_report.json"
+
+
+def reset_components(area_id: int):
+    roadgraphtool.db.db.execute_sql(f"DELETE FROM component_data WHERE area = {area_id}")
+
+
+def component_counts(area_id: int) -> dict:
+    component_count, node_count, largest_component_size = roadgraphtool.db.db.execute_sql_and_fetch_all_rows(
+        f"""
+        SELECT
+            count(DISTINCT component_id),
+            count(*),
+            count(*) FILTER (WHERE component_id = 0)
+        FROM component_data
+        WHERE area = {area_id}
+        """
+    )[0]
+    return {"components": component_count, "nodes": node_count, "largest_component_nodes": largest_component_size}
+
+
+def benchmark_edge_selection(edge_selection: str, area_id: int, engine: str, runs: int) -> dict:
+    """Return timing of the strong components computation of *area_id* with *edge_selection*."""
+    times = []
+    for _ in range(runs):
+        reset_components(area_id)
+        start_time = time.perf_counter()
+        compute_strong_components(area_id, engine, edge_selection)
+        times.append(time.perf_counter() - start_time)
+
+    return {"runs": runs, "times_s": times, **component_counts(area_id)}
+
+
+def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the edge selections of the strong components computation.")
+    parser.add_argument("config_file", help="Path to the config file (area_id is used)")
+    parser.add_argument("--area-id", type=int, default=None, help="Area of the components (default: config.area_id)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of repetitions")
+    parser.add_argument("--engine", choices=STRONG_COMPONENTS_ENGINES, default="sql", help="Strong components engine")
+    return parser.parse_args(arg_list)
+
+
+def main(arg_list: list[str] | None = None):
+    args = parse_args(arg_list)
+    config = parse_config_file(Path(args.config_file))
+    set_logging(config)
+    roadgraphtool.db.init_db(config)
+
+    area_id = args.area_id if args.area_id is not None else config.area_id
+    report = {
+        "date": datetime.today().strftime('%d.%m.%Y %H:%M'),
+        "area_id": area_id,
+        "engine": args.engine,
+    }
+    for edge_selection in EDGE_SELECTIONS:
+        report[edge_selection] = benchmark_edge_selection(edge_selection, area_id, args.engine, args.runs)
+
+    report["same_components"] = all(
+        report["geometry"][key] == report["area"][key] for key in ("components", "nodes", "largest_component_nodes")
+    )
+
+    reports = []
+    if JSON_FILE.exists():
+        with open(JSON_FILE, 'r') as f:
+            reports = json.load(f)
+    reports.append(report)
+    with open(JSON_FILE, mode='w') as f:
+        json.dump(reports, f, indent=4)
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
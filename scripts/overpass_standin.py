@@ -0,0 +1,32 @@
+import argparse
+import logging
+from pathlib import Path
+
+from roadgraphtool.overpass_standin import OverpassStandIn, create_server, endpoint_url
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve a local OSM file through a minimal Overpass API stand-in.")
+    parser.add_argument("input_file", help="Path to the OSM file (.osm, .osm.pbf, .osm.bz2)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=12345, help="Port to listen on")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt='%H:%M:%S',
+    )
+
+    server = create_server(OverpassStandIn.from_file(Path(args.input_file)), args.host, args.port)
+    logging.info("Overpass stand-in listening on %s (set overpass.endpoint to this URL)", endpoint_url(server))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,3 +1,15 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Function: get_restricted_nodes
+-- Description: Returns the nodes of the road_segments table that cannot be contracted. The in- and out-neighbours of
+--              every node are collected in one pass over road_segments into the node_degrees table and the
+--              contraction rules are evaluated on it:
+--              - case A: one outgoing and one incoming segment, to/from different nodes,
+--              - case B: two outgoing and two incoming segments, all connecting the node to the same two nodes.
+--              A node with a self-loop is never contractible (the same rule as in roadgraphtool.contraction).
+--              Only nodes of road_segments (i.e. of the target area) are returned.
+-- Required tables: road_segments (temporary, from_node, to_node)
+-- Affected tables: None
+------------------------------------------------------------------------------------------------------------------------
 CREATE OR REPLACE FUNCTION get_restricted_nodes()
     RETURNS bigint[]
     LANGUAGE plpgsql
@@ -8,42 +20,48 @@ DECLARE
 BEGIN
     RAISE NOTICE 'Computing restricted nodes';
 
+    DROP TABLE IF EXISTS node_degrees;
+    CREATE TEMPORARY TABLE node_degrees AS
+    SELECT
+        incidences.node_id,
+        count(*) FILTER (WHERE incidences.outgoing) AS out_degree,
+        count(*) FILTER (WHERE NOT incidences.outgoing) AS in_degree,
+        -- DISTINCT sorts the neighbours, so the sets can be compared as arrays
+        array_agg(DISTINCT incidences.neighbour_id) FILTER (WHERE incidences.outgoing) AS out_neighbours,
+        array_agg(DISTINCT incidences.neighbour_id) FILTER (WHERE NOT incidences.outgoing) AS in_neighbours
+    FROM road_segments
+        CROSS JOIN LATERAL (
+            VALUES
+                (road_segments.from_node, road_segments.to_node, TRUE),
+                (road_segments.to_node, road_segments.from_node, FALSE)
+        ) AS incidences(node_id, neighbour_id, outgoing)
+    GROUP BY incidences.node_id;
+
     restricted_nodes := (
-        SELECT array_agg(nodes.id)
-        FROM nodes
-            LEFT JOIN (
-            -- case A: one ways to contract
-            SELECT max(nodes.id) AS contract_node_id
-            FROM nodes
-                JOIN road_segments
-                     ON nodes.id = road_segments.from_node -- fileter nodes with from edges
-                JOIN road_segments AS to_road_segments ON nodes.id = to_road_segments.to_node -- filter nodes with to edges
-            GROUP BY nodes.id
-            HAVING count(road_segments.to_node) = 1
-               AND count(to_road_segments.from_node) = 1
-               AND max(road_segments.to_node) != max(to_road_segments.from_node)
-            UNION
+        SELECT coalesce(array_agg(node_id), ARRAY[]::bigint[])
+        FROM node_degrees
+        WHERE node_id = ANY(out_neighbours) -- self-loop
+            OR NOT (
+            -- case A: one way to contract
+            (
+                out_degree = 1
+                AND in_degree = 1
+                AND out_neighbours <> in_neighbours
+            )
             -- case B: two ways to contract
-            SELECT max(nodes.id) AS contract_node_id
-            FROM nodes
-                JOIN road_segments AS from_road_segments
-                     ON nodes.id = from_road_segments.from_node -- fileter nodes with from edges
-                JOIN road_segments AS to_road_segments
-                     ON nodes.id = to_road_segments.to_node -- filter nodes with to edges
-                JOIN nodes AS neighbour_nodes
-                     ON neighbour_nodes.id IN (from_road_segments.to_node, to_road_segments.from_node)
-            GROUP BY nodes.id
-            HAVING count(DISTINCT from_road_segments.to_node) = 2
-               AND count(DISTINCT to_road_segments.from_node) = 2
-               AND count(DISTINCT neighbour_nodes.id) = 2
-               AND count(1) = 6
-        ) AS contract_nodes
-                      ON nodes.id = contract_node_id
-        WHERE contract_node_id IS NULL
+            OR (
+                out_degree = 2
+                AND in_degree = 2
+                AND cardinality(out_neighbours) = 2
+                AND out_neighbours = in_neighbours
+            )
+        )
     );
 
-    RAISE NOTICE 'Computed % restricted nodes', array_length(restricted_nodes, 1);
+    DROP TABLE node_degrees;
+
+    RAISE NOTICE 'Computed % restricted nodes', cardinality(restricted_nodes);
 
     RETURN restricted_nodes;
 END;
-$$
\ No newline at end of file
+$$
@@ -0,0 +1,83 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Function: get_speed_coverage
+-- Description: Returns the number and length of the road segments of the area by speed quality, highway class and
+--              time slot, computed in one aggregate scan over the segments of the area (node_segments). Rows with
+--              NULL isodow and hour describe the speeds in nodes_ways_speeds, including the segments without speed
+--              (NULL quality), so their sums are the totals of the area. The other rows describe the slot speeds of
+--              the dataset in nodes_ways_slot_speeds, which have no rows for segments without speed. Rows with NULL
+--              highway are the sums over all highway classes, segments without a highway tag have highway 'none'.
+-- Parameters:
+--      - target_area_id: area of the segments
+--      - speed_records_dataset: dataset of the slot speeds, NULL for no slot rows
+-- Required tables: node_segments, nodes_ways_speeds, nodes_ways_slot_speeds, ways_tags, tags
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION get_speed_coverage(
+	IN target_area_id smallint,
+	IN speed_records_dataset smallint DEFAULT NULL::smallint
+)
+RETURNS TABLE
+(
+	isodow smallint,
+	hour smallint,
+	highway text,
+	quality smallint,
+	segment_count integer,
+	length double precision
+)
+LANGUAGE sql
+STABLE
+AS $$
+WITH area_segments AS (
+	SELECT
+		node_segments.from_id,
+		node_segments.to_id,
+		coalesce(highway_tags.tag_value, 'none') AS highway,
+		-- meters, independent of the SRID of the segments
+		st_length(st_transform(node_segments.geom, 4326)::geography) AS length
+	FROM node_segments
+		LEFT JOIN (
+			SELECT ways_tags.way_id, ways_tags.tag_value
+			FROM ways_tags
+				JOIN tags ON tags.id = ways_tags.tag_id AND tags.key = 'highway'
+		) highway_tags ON highway_tags.way_id = node_segments.way_id
+	WHERE node_segments.area = target_area_id
+),
+segment_speeds AS (
+	SELECT
+		NULL::smallint AS isodow,
+		NULL::smallint AS hour,
+		area_segments.highway,
+		nodes_ways_speeds.quality,
+		area_segments.length
+	FROM area_segments
+		LEFT JOIN nodes_ways_speeds ON
+				nodes_ways_speeds.from_node_ways_id = area_segments.from_id
+			AND nodes_ways_speeds.to_node_ways_id = area_segments.to_id
+	UNION ALL
+	SELECT
+		nodes_ways_slot_speeds.isodow,
+		nodes_ways_slot_speeds.hour,
+		area_segments.highway,
+		nodes_ways_slot_speeds.quality,
+		area_segments.length
+	FROM area_segments
+		JOIN nodes_ways_slot_speeds ON
+				nodes_ways_slot_speeds.from_node_ways_id = area_segments.from_id
+			AND nodes_ways_slot_speeds.to_node_ways_id = area_segments.to_id
+	WHERE nodes_ways_slot_speeds.dataset = speed_records_dataset
+)
+SELECT
+	segment_speeds.isodow,
+	segment_speeds.hour,
+	segment_speeds.highway,
+	segment_speeds.quality,
+	count(1)::integer AS segment_count,
+	sum(segment_speeds.length) AS length
+FROM segment_speeds
+GROUP BY GROUPING SETS (
+	(segment_speeds.isodow, segment_speeds.hour, segment_speeds.quality),
+	(segment_speeds.isodow, segment_speeds.hour, segment_speeds.highway, segment_speeds.quality)
+)
+ORDER BY segment_speeds.isodow NULLS FIRST, segment_speeds.hour NULLS FIRST, segment_speeds.highway NULLS FIRST,
+	segment_speeds.quality NULLS LAST
+$$;
@@ -14,9 +14,13 @@ BEGIN
         RAISE EXCEPTION 'The target area with id % has a NULL geometry', target_area_id;
     END IF;
 
+	-- the area is tested part by part (see area_parts), each way is probed via the GiST index on the parts
 	RETURN QUERY SELECT ways.id, ways.geom, ways.area, ways."from", ways."to", ways.oneway
 	        FROM ways
-	            JOIN areas ON areas.id = target_area_id AND st_intersects(areas.geom, ways.geom);
+	        WHERE EXISTS (
+	            SELECT 1 FROM area_parts
+	            WHERE area_parts.area = target_area_id AND st_intersects(area_parts.geom, ways.geom)
+	        );
 END;
 $$;
 
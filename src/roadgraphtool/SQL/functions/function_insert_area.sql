@@ -8,7 +8,7 @@
 --      - geom: json
 -- Returns: ID of the newly inserted area: integer
 -- Required tables: None
--- Affected tables: areas
+-- Affected tables: areas, area_parts (through the areas_refresh_area_parts trigger)
 -- Author: Vladyslav Zlochevskyi, David Fiedler
 -- Date: 2024
 ------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,39 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Function: refresh_area_parts
+-- Description: Trigger function keeping the area_parts table in sync with areas.geom. The area geometry is split by
+--              ST_Subdivide into parts with at most 256 vertices, so that spatial filters by area (joined with the
+--              GiST index on area_parts.geom) test only a few small polygons instead of the whole area geometry.
+-- Required tables: areas, area_parts
+-- Affected tables: area_parts
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION refresh_area_parts()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS
+$$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM area_parts WHERE area = OLD.id;
+    END IF;
+
+    IF NEW.geom IS NOT NULL THEN
+        INSERT INTO area_parts (area, geom)
+        SELECT NEW.id, st_subdivide(NEW.geom, 256);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS areas_refresh_area_parts ON areas;
+CREATE TRIGGER areas_refresh_area_parts
+    AFTER INSERT OR UPDATE OF id, geom ON areas
+    FOR EACH ROW
+EXECUTE FUNCTION refresh_area_parts();
+
+-- parts of areas inserted before the trigger existed
+INSERT INTO area_parts (area, geom)
+SELECT areas.id, st_subdivide(areas.geom, 256)
+FROM areas
+WHERE areas.geom IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM area_parts WHERE area_parts.area = areas.id);
@@ -41,11 +41,15 @@ SELECT
 						)
 			JOIN nodes from_nodes ON from_nodes_ways.node_id = from_nodes.id
 			JOIN nodes to_nodes ON to_node_ways.node_id = to_nodes.id
-			-- ensure that nodes are within the target area, even if the way reaches outside
-			JOIN areas
-			    ON areas.id = target_area_id
-			   	AND st_within(from_nodes.geom, areas.geom)
-				AND st_within(to_nodes.geom, areas.geom);
+	-- ensure that nodes are within the target area, even if the way reaches outside
+	WHERE EXISTS (
+			SELECT 1 FROM area_parts
+			WHERE area_parts.area = target_area_id AND st_intersects(area_parts.geom, from_nodes.geom)
+		)
+		AND EXISTS (
+			SELECT 1 FROM area_parts
+			WHERE area_parts.area = target_area_id AND st_intersects(area_parts.geom, to_nodes.geom)
+		);
 
 DROP TABLE target_ways;
 
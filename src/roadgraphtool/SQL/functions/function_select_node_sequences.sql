@@ -0,0 +1,84 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Function: select_node_sequences
+-- Description: Returns the road segments of the area covered by the node sequences of the speed records. A node
+--              sequence connects the from/to OSM node pair of a speed record along one way: it goes from the start
+--              of a segment to the end of the same or a later segment of the way in the same direction. The segments
+--              in between are not checked, so for a way leaving and re-entering the area, the sequence spans the part
+--              outside the area. A from/to pair can have more sequences, as the same node can appear multiple times
+--              in a way (cycles); a segment is returned once for every sequence covering it.
+-- Parameters:
+--      - target_area_id: area of the segments (node_segments, refreshed by refresh_node_segments)
+-- Required tables: node_segments, grouped_speed_records (temporary, from_osm_id, to_osm_id)
+-- Affected tables: None
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION select_node_sequences(IN target_area_id smallint)
+RETURNS TABLE
+(
+	from_osm_id bigint,
+	to_osm_id bigint,
+	from_id bigint,
+	to_id bigint
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+CREATE TEMPORARY TABLE sequence_segments AS
+	SELECT from_id, to_id, from_node, to_node, from_position, to_position, way_id
+	FROM node_segments
+	WHERE area = target_area_id;
+CREATE INDEX sequence_segments_from_node_idx ON sequence_segments(from_node);
+CREATE INDEX sequence_segments_way_to_node_idx ON sequence_segments(way_id, to_node);
+CREATE INDEX sequence_segments_way_from_position_idx ON sequence_segments(way_id, from_position);
+RAISE NOTICE '% segments selected', (SELECT count(1) FROM sequence_segments);
+
+-- only the sequences between the node pairs of the speed records
+CREATE TEMPORARY TABLE node_sequences AS
+	SELECT
+		first_segments.from_node AS from_osm_id,
+		last_segments.to_node AS to_osm_id,
+		first_segments.way_id,
+		first_segments.from_position,
+		last_segments.to_position
+		FROM
+			(SELECT DISTINCT from_osm_id, to_osm_id FROM grouped_speed_records) node_pairs
+				JOIN sequence_segments first_segments ON first_segments.from_node = node_pairs.from_osm_id
+				JOIN sequence_segments last_segments
+					 ON last_segments.way_id = first_segments.way_id
+						 AND last_segments.to_node = node_pairs.to_osm_id
+						 AND (
+									(first_segments.from_position < first_segments.to_position
+										AND last_segments.from_position < last_segments.to_position
+										AND first_segments.from_position <= last_segments.from_position)
+								OR (first_segments.from_position > first_segments.to_position
+										AND last_segments.from_position > last_segments.to_position
+										AND first_segments.from_position >= last_segments.from_position)
+							);
+RAISE NOTICE '% node sequences of the speed records generated', (SELECT count(1) FROM node_sequences);
+
+RETURN QUERY
+SELECT
+	ns.from_osm_id,
+	ns.to_osm_id,
+	segments.from_id,
+	segments.to_id
+	FROM node_sequences ns
+			 -- the segments of the sequence
+			 JOIN sequence_segments segments ON
+					segments.way_id = ns.way_id
+				AND (
+						(ns.from_position < ns.to_position
+							AND segments.from_position < segments.to_position
+							AND segments.from_position >= ns.from_position
+							AND segments.to_position <= ns.to_position)
+					OR (ns.from_position > ns.to_position
+							AND segments.from_position > segments.to_position
+							AND segments.from_position <= ns.from_position
+							AND segments.to_position >= ns.to_position)
+					);
+
+DROP TABLE sequence_segments, node_sequences;
+
+RETURN;
+END;
+$$
@@ -0,0 +1,117 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Function: select_segment_speeds_from_records
+-- Description: Returns the speeds of the road segments of the area computed from the speed records for the given hour
+--              and day of week, the selection part of compute_speeds_for_segments. A speed record from/to OSM node
+--              pair is matched to the sequence of segments of a way between the two nodes (select_node_sequences)
+--              and the speed of a segment is the mean of its matched records. The st_dev of a segment without a
+--              standard deviation of its records is 0.
+-- Parameters:
+--      - target_area_id: area of the segments (node_segments, refreshed by refresh_node_segments)
+--      - speed_records_dataset: speed records dataset
+--      - hour: hour of the speeds
+--      - day_of_week: ISO day of week of the speeds. If NULL, the speeds are computed from speed_records_quarterly
+--        for all days of the week (quality 2), otherwise from speed_profiles (quality 1)
+--      - speed_percentile: if set (0-1), the speed is this percentile of the speed records, computed from the speed
+--        sketches (speed_sketch_quantile), instead of the mean; speed records without a sketch are skipped
+-- Required tables: node_segments, speed_profiles, speed_records_quarterly
+-- Affected tables: node_segments, speed_profiles
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION select_segment_speeds_from_records(
+	IN target_area_id smallint,
+	IN speed_records_dataset smallint,
+	IN hour smallint,
+	IN day_of_week smallint DEFAULT NULL::smallint,
+	IN speed_percentile double precision DEFAULT NULL::double precision
+)
+RETURNS TABLE
+(
+	from_id bigint,
+	to_id bigint,
+	speed double precision,
+	st_dev double precision,
+	quality smallint,
+	source_records_count integer
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+	dataset_quality smallint = 1;
+BEGIN
+
+-- segments in area, the node sequences are selected by select_node_sequences
+RAISE NOTICE 'Selecting segments in area: "%"', (SELECT name FROM areas WHERE id = target_area_id);
+CALL refresh_node_segments(target_area_id);
+
+IF day_of_week IS NULL THEN
+	dataset_quality = 2;
+	RAISE NOTICE 'Grouping speed records using speed dataset aggregated by hour (%). Hour %',
+		(SELECT name FROM speed_datasets WHERE id = speed_records_dataset), hour;
+	-- group the speed records - exact hour
+	CREATE TEMPORARY TABLE grouped_speed_records AS
+	(
+		SELECT
+			from_osm_id,
+			to_osm_id,
+			CASE WHEN speed_percentile IS NULL
+				THEN avg(speed_mean)
+				ELSE speed_sketch_quantile(
+					speed_sketch_merge_agg(speed_sketch) FILTER (WHERE speed_percentile IS NOT NULL), speed_percentile
+				)
+			END as speed,
+			avg(st_dev) as st_dev
+			FROM
+				speed_records_quarterly
+			WHERE
+					dataset = speed_records_dataset
+				AND speed_records_quarterly.hour = select_segment_speeds_from_records.hour
+				AND (speed_percentile IS NULL OR speed_sketch IS NOT NULL)
+			GROUP BY
+				from_osm_id, to_osm_id
+	);
+ELSE
+	-- speed records grouped by exact day in week and hour, precomputed in speed_profiles
+	CALL refresh_speed_profiles(speed_records_dataset);
+	RAISE NOTICE 'Grouping speed records using exact speed dataset %. Hour %, day of week: %',
+		(SELECT name FROM speed_datasets WHERE id = speed_records_dataset), hour, day_of_week;
+	CREATE TEMPORARY TABLE grouped_speed_records AS
+	(
+		SELECT
+			from_osm_id,
+			to_osm_id,
+			CASE WHEN speed_percentile IS NULL
+				THEN speed_mean
+				ELSE speed_sketch_quantile(speed_sketch, speed_percentile)
+			END as speed,
+			st_dev_mean as st_dev
+			FROM
+				speed_profiles
+			WHERE
+					dataset = speed_records_dataset
+				AND speed_profiles.isodow = select_segment_speeds_from_records.day_of_week
+				AND speed_profiles.hour = select_segment_speeds_from_records.hour
+				AND (speed_percentile IS NULL OR speed_sketch IS NOT NULL)
+	);
+END IF;
+RAISE NOTICE '% speed records aggregated by from/to selected', (SELECT count(1) FROM grouped_speed_records);
+
+RETURN QUERY
+SELECT
+	segments.from_id,
+	segments.to_id,
+	avg(speed_records.speed) AS speed,
+	-- the records of a single-record cell or without st_dev have no deviation, nodes_ways_speeds.st_dev is NOT NULL
+	coalesce(avg(speed_records.st_dev), 0) AS st_dev,
+	dataset_quality,
+	count(1)::integer AS source_records_count
+	FROM grouped_speed_records speed_records
+			 JOIN select_node_sequences(target_area_id) segments ON
+					speed_records.from_osm_id = segments.from_osm_id
+				AND speed_records.to_osm_id = segments.to_osm_id
+	GROUP BY segments.from_id, segments.to_id;
+
+DROP TABLE grouped_speed_records;
+
+RETURN;
+END;
+$$
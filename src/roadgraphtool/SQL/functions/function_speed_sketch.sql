@@ -0,0 +1,83 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Functions: speed_sketch_*
+-- Description: Mergeable quantile sketches of speeds (DDSketch with a relative accuracy of 1 %), stored as bytea.
+--              A speed is counted in the bucket ceil(ln(speed) / ln(gamma)), gamma = 1.01 / 0.99, speeds <= 0 in
+--              the bucket -2147483648. The sketch is the sequence of (bucket, count) pairs ordered by bucket, both
+--              as big-endian 4-byte integers. Any quantile of the merged speeds is then within 1 % of the exact
+--              one. The same encoding is produced by roadgraphtool.speed_sketch.
+--
+--              - speed_sketch_bucket(speed): bucket of a speed
+--              - speed_sketch_buckets(sketch): (bucket, count) rows of a sketch
+--              - speed_sketch_merge(sketch, sketch): sum of two sketches, NULL is an empty sketch
+--              - speed_sketch_merge_agg(sketch): aggregate merging sketches
+--              - speed_sketch_quantile(sketch, quantile): quantile (0-1) of the speeds of a sketch
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION speed_sketch_bucket(speed double precision)
+    RETURNS integer
+    LANGUAGE sql
+    IMMUTABLE
+AS
+$$
+SELECT CASE
+    WHEN speed > 0 THEN ceil(ln(speed) / ln(1.01::double precision / 0.99))::integer
+    ELSE -2147483648
+END
+$$;
+
+CREATE OR REPLACE FUNCTION speed_sketch_buckets(sketch bytea)
+    RETURNS TABLE (bucket integer, count integer)
+    LANGUAGE sql
+    IMMUTABLE
+AS
+$$
+SELECT
+    ('x' || encode(substring(sketch FROM entry * 8 + 1 FOR 4), 'hex'))::bit(32)::integer,
+    ('x' || encode(substring(sketch FROM entry * 8 + 5 FOR 4), 'hex'))::bit(32)::integer
+FROM generate_series(0, coalesce(length(sketch), 0) / 8 - 1) AS entry
+$$;
+
+CREATE OR REPLACE FUNCTION speed_sketch_merge(sketch bytea, other_sketch bytea)
+    RETURNS bytea
+    LANGUAGE sql
+    IMMUTABLE
+AS
+$$
+SELECT string_agg(int4send(bucket) || int4send(count::integer), ''::bytea ORDER BY bucket)
+FROM (
+    SELECT bucket, sum(count) AS count
+    FROM (
+        SELECT * FROM speed_sketch_buckets(sketch)
+        UNION ALL
+        SELECT * FROM speed_sketch_buckets(other_sketch)
+    ) AS entries
+    GROUP BY bucket
+) AS merged
+$$;
+
+CREATE OR REPLACE AGGREGATE speed_sketch_merge_agg(bytea) (
+    SFUNC = speed_sketch_merge,
+    STYPE = bytea
+);
+
+CREATE OR REPLACE FUNCTION speed_sketch_quantile(sketch bytea, quantile double precision)
+    RETURNS double precision
+    LANGUAGE sql
+    IMMUTABLE
+AS
+$$
+SELECT CASE
+    WHEN bucket = -2147483648 THEN 0::double precision
+    ELSE 2 * power(1.01::double precision / 0.99, bucket) / (1.01::double precision / 0.99 + 1)
+END::double precision
+FROM (
+    SELECT
+        bucket,
+        sum(count) OVER (ORDER BY bucket) AS cumulative_count,
+        sum(count) OVER () AS total_count
+    FROM speed_sketch_buckets(sketch)
+) AS entries
+-- DDSketch rank of the quantile
+WHERE cumulative_count > quantile * (total_count - 1)
+ORDER BY bucket
+LIMIT 1
+$$;
@@ -0,0 +1,30 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Migration: nodes_edges keys
+-- Description: node_id widened to bigint (OSM node ids), primary key, edge index and edge foreign key of nodes_edges
+--              (tables/16_nodes_edges.sql) on databases created before they were added.
+------------------------------------------------------------------------------------------------------------------------
+ALTER TABLE public.nodes_edges ALTER COLUMN node_id TYPE bigint;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'nodes_edges_pk') THEN
+        -- duplicates were possible without the key
+        DELETE FROM public.nodes_edges duplicates
+            USING public.nodes_edges kept
+            WHERE duplicates.node_id = kept.node_id
+                AND duplicates.edge_id = kept.edge_id
+                AND duplicates.ctid > kept.ctid;
+        ALTER TABLE ONLY public.nodes_edges ADD CONSTRAINT nodes_edges_pk PRIMARY KEY (node_id, edge_id);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'nodes_edges_edges_id_fk') THEN
+        DELETE FROM public.nodes_edges WHERE NOT EXISTS (SELECT 1 FROM public.edges WHERE edges.id = nodes_edges.edge_id);
+        ALTER TABLE ONLY public.nodes_edges
+            ADD CONSTRAINT nodes_edges_edges_id_fk FOREIGN KEY (edge_id) REFERENCES public.edges(id) ON DELETE CASCADE;
+    END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS nodes_edges_edge_id_index ON public.nodes_edges USING btree (edge_id);
+
+COMMENT ON TABLE public.nodes_edges IS 'Contracted nodes and the edges they were contracted into. Filled by the contraction procedures; a node in the middle of a two-way road belongs to the edges of both directions';
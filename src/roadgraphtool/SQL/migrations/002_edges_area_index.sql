@@ -0,0 +1,5 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Migration: edges area index
+-- Description: index of edges by area (tables/05_edges.sql) on databases created before it was added.
+------------------------------------------------------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS edges_area_index ON public.edges USING btree (area);
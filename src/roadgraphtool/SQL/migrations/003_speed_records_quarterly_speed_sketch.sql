@@ -0,0 +1,8 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Migration: speed_records_quarterly speed sketch
+-- Description: speed_sketch column of speed_records_quarterly (tables/14_speed_records_quarterly.sql) on databases
+--              created before it was added. The existing rows keep a NULL sketch.
+------------------------------------------------------------------------------------------------------------------------
+ALTER TABLE public.speed_records_quarterly ADD COLUMN IF NOT EXISTS speed_sketch bytea;
+
+COMMENT ON COLUMN public.speed_records_quarterly.speed_sketch IS 'Quantile sketch of the speeds (see the speed_sketch_* functions), filled by roadgraphtool.speed_import';
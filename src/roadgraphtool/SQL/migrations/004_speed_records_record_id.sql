@@ -0,0 +1,36 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Migration: speed records insertion order
+-- Description: record_id of speed_records (tables/13_speed_records.sql) and records_to_id of speed_profiles_datasets
+--              (tables/25_speed_profiles_datasets.sql), which replaces the records_to datetime watermark. Adding
+--              record_id numbers the existing records. The profiles aggregated with the datetime watermark are
+--              dropped, refresh_speed_profiles aggregates them again.
+------------------------------------------------------------------------------------------------------------------------
+CREATE SEQUENCE IF NOT EXISTS public.speed_records_record_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+ALTER TABLE public.speed_records
+    ADD COLUMN IF NOT EXISTS record_id bigint NOT NULL DEFAULT nextval('public.speed_records_record_id_seq'::regclass);
+
+CREATE INDEX IF NOT EXISTS speed_records_record_id_index ON public.speed_records USING brin (record_id);
+
+COMMENT ON COLUMN public.speed_records.record_id IS 'Insertion order of the record, refresh_speed_profiles aggregates the records inserted after the last aggregated one, whatever their datetime';
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'speed_profiles_datasets' AND column_name = 'records_to'
+    ) THEN
+        -- speed_profiles rows are deleted with their dataset
+        DELETE FROM public.speed_profiles_datasets;
+        ALTER TABLE public.speed_profiles_datasets DROP COLUMN records_to;
+        ALTER TABLE public.speed_profiles_datasets ADD COLUMN records_to_id bigint NOT NULL;
+    END IF;
+END
+$$;
+
+COMMENT ON TABLE public.speed_profiles_datasets IS 'Datasets aggregated in speed_profiles. records_to_id is the speed_records.record_id of the latest speed record aggregated, refresh_speed_profiles adds only the records inserted after it';
@@ -0,0 +1,6 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Migration: edges geom index
+-- Description: spatial index of edges (tables/05_edges.sql) used by the geometry edge selection of
+--              compute_strong_components, on databases created without it.
+------------------------------------------------------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS edges_geom_index ON public.edges USING gist (geom);
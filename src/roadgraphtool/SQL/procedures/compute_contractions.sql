@@ -18,6 +18,7 @@ BEGIN
     );
     CREATE INDEX contractions_index_contracted_vertex ON contractions (contracted_vertex);
     CREATE INDEX contractions_index_from_to ON contractions (source, target);
+    CREATE INDEX contractions_index_id_contracted_vertex ON contractions (id, contracted_vertex);
     RAISE NOTICE '% nodes contracted', (SELECT count(*) FROM contractions);
 END
 $$; 
\ No newline at end of file
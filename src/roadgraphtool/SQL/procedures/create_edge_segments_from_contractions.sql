@@ -1,87 +1,99 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: create_edge_segments_from_contractions
+-- Description: Creates the temporary table contraction_segments with the road segments of each contraction. Every
+--              contraction is expanded once into its ordered vertex sequence (source, contracted vertices in the
+--              order of travel, target) by walking road_segments from the source, and the segments are the
+--              consecutive pairs of the sequence (lead() over the position in the chain). A loop contraction
+--              (source = target) with both neighbours of the source contracted can be walked both ways; the walks
+--              are told apart by their first node and only the walk with the lowest first node is kept.
+-- Parameters:
+--   - fill_speed: if TRUE, the speed of the road segments is copied to contraction_segments
+-- Required tables: contractions, road_segments
+-- Affected tables: contraction_segments (created)
+------------------------------------------------------------------------------------------------------------------------
 CREATE OR REPLACE PROCEDURE create_edge_segments_from_contractions(IN fill_speed boolean DEFAULT FALSE)
     LANGUAGE plpgsql
 AS $$
 BEGIN
 RAISE NOTICE 'Generating contraction segments';
-IF fill_speed THEN
-CREATE TEMPORARY TABLE contraction_segments AS (
-    SELECT
-        from_contraction.id,
-        from_contraction.source AS edge_from,
-        from_contraction.target AS edge_to,
-        from_contraction.contracted_vertex AS from_node,
-        to_contraction.contracted_vertex AS to_node,
-        geom,
-        speed
-    FROM
-        contractions from_contraction
-            JOIN contractions to_contraction
-                 ON from_contraction.id = to_contraction.id
-            JOIN road_segments
-                 ON road_segments.from_node = from_contraction.contracted_vertex
-                     AND road_segments.to_node = to_contraction.contracted_vertex
-    UNION
+
+CREATE INDEX IF NOT EXISTS road_segments_index_from_node_to_node ON road_segments (from_node, to_node);
+
+CREATE TEMPORARY TABLE contraction_chain_pairs AS (
+    WITH RECURSIVE chain_vertices(id, source, target, walk, position, node, previous_node) AS (
+        SELECT DISTINCT id, source, target, NULL::bigint, 0, source::bigint, NULL::bigint
+        FROM contractions
+        UNION ALL
+        SELECT
+            chain_vertices.id,
+            chain_vertices.source,
+            chain_vertices.target,
+            coalesce(chain_vertices.walk, road_segments.to_node::bigint),
+            chain_vertices.position + 1,
+            road_segments.to_node::bigint,
+            chain_vertices.node
+        FROM chain_vertices
+            JOIN road_segments ON road_segments.from_node = chain_vertices.node
+        -- the walk ends at the target (the source of a loop is its target as well)
+        WHERE (chain_vertices.node != chain_vertices.target OR chain_vertices.position = 0)
+            -- two-way chains: do not go back
+            AND road_segments.to_node IS DISTINCT FROM chain_vertices.previous_node
+            AND (
+                (road_segments.to_node = chain_vertices.target AND chain_vertices.position > 0)
+                OR EXISTS (
+                    SELECT 1
+                    FROM contractions
+                    WHERE contractions.id = chain_vertices.id
+                        AND contractions.contracted_vertex = road_segments.to_node
+                )
+            )
+    )
     SELECT
         id,
         source AS edge_from,
         target AS edge_to,
-        source AS from_node,
-        contracted_vertex AS to_node,
-        geom,
-        speed
-    FROM contractions
-             JOIN road_segments ON road_segments.from_node = source AND road_segments.to_node = contracted_vertex
-    UNION
+        node AS from_node,
+        lead(node) OVER (PARTITION BY id ORDER BY position) AS to_node
+    FROM (
+        SELECT *, min(walk) OVER (PARTITION BY id) AS first_walk FROM chain_vertices
+    ) walks
+    -- the source (walk NULL) starts every walk
+    WHERE walk IS NULL OR walk = first_walk
+);
+
+IF fill_speed THEN
+CREATE TEMPORARY TABLE contraction_segments AS (
     SELECT
-        id,
-        source AS edge_from,
-        target AS edge_to,
-        contracted_vertex AS from_node,
-        target AS to_node,
+        contraction_chain_pairs.id,
+        contraction_chain_pairs.edge_from,
+        contraction_chain_pairs.edge_to,
+        road_segments.from_node,
+        road_segments.to_node,
         geom,
         speed
-    FROM contractions
-             JOIN road_segments ON road_segments.from_node = contracted_vertex AND road_segments.to_node = target
+    FROM contraction_chain_pairs
+        JOIN road_segments
+             ON road_segments.from_node = contraction_chain_pairs.from_node
+                 AND road_segments.to_node = contraction_chain_pairs.to_node
 );
 ELSE
 CREATE TEMPORARY TABLE contraction_segments AS (
     SELECT
-        from_contraction.id,
-        from_contraction.source AS edge_from,
-        from_contraction.target AS edge_to,
-        from_contraction.contracted_vertex AS from_node,
-        to_contraction.contracted_vertex AS to_node,
-        geom
-    FROM
-        contractions from_contraction
-            JOIN contractions to_contraction
-                 ON from_contraction.id = to_contraction.id
-            JOIN road_segments
-                 ON road_segments.from_node = from_contraction.contracted_vertex
-                     AND road_segments.to_node = to_contraction.contracted_vertex
-    UNION
-    SELECT
-        id,
-        source AS edge_from,
-        target AS edge_to,
-        source AS from_node,
-        contracted_vertex AS to_node,
+        contraction_chain_pairs.id,
+        contraction_chain_pairs.edge_from,
+        contraction_chain_pairs.edge_to,
+        road_segments.from_node,
+        road_segments.to_node,
         geom
-    FROM contractions
-             JOIN road_segments ON road_segments.from_node = source AND road_segments.to_node = contracted_vertex
-    UNION
-    SELECT
-        id,
-        source AS edge_from,
-        target AS edge_to,
-        contracted_vertex AS from_node,
-        target AS to_node,
-        geom
-    FROM contractions
-             JOIN road_segments ON road_segments.from_node = contracted_vertex AND road_segments.to_node = target
+    FROM contraction_chain_pairs
+        JOIN road_segments
+             ON road_segments.from_node = contraction_chain_pairs.from_node
+                 AND road_segments.to_node = contraction_chain_pairs.to_node
 );
 END IF;
 
+DROP TABLE contraction_chain_pairs;
+
 RAISE NOTICE '% contraction segments generated', (SELECT count(*) FROM contraction_segments);
 END
-$$;
\ No newline at end of file
+$$;
@@ -0,0 +1,169 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: complete_speeds_in_area
+-- Description: Computes the speeds of all road segments of the area in one staged pass and stores them in
+--              nodes_ways_speeds. The segments are read from node_segments once and each stage fills the segments
+--              left without speed by the previous stages:
+--                1. speed from the speed records (select_segment_speeds_from_records): quality 1 with day_of_week,
+--                   quality 2 without
+--                2. mean speed of the segments of stage 1 within 10 units of the SRID (quality 3)
+--                3. mean speed of the segments of stage 1 within 200 units of the SRID (quality 4)
+--                4. mean speed of all segments of stage 1 (quality 5)
+--              The result is upserted into nodes_ways_speeds, so unlike compute_speeds_for_segments,
+--              compute_speeds_from_neighborhood_segments and assign_average_speed_to_all_segments_in_area, the
+--              stored speeds of the area are replaced. Rows whose values would not change are not written, so a
+--              re-run with another dataset or time slot rewrites only the segments whose speed changed.
+-- Parameters:
+--      - target_area_id: area of the segments
+--      - target_area_srid: SRID of the segments (see refresh_node_segments), the neighborhood distances are in its
+--        units
+--      - speed_records_dataset: speed records dataset
+--      - hour: hour of the speeds
+--      - day_of_week: ISO day of week of the speeds, NULL for all days (speed_records_quarterly)
+--      - speed_percentile: if set (0-1), the speed records percentile instead of the mean (speed_sketch_quantile)
+-- Required tables: areas, node_segments, speed_profiles, speed_records_quarterly
+-- Affected tables: nodes_ways_speeds, node_segments, speed_profiles
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE complete_speeds_in_area(
+	IN target_area_id smallint,
+	IN target_area_srid integer,
+	IN speed_records_dataset smallint,
+	IN hour smallint,
+	IN day_of_week smallint DEFAULT NULL::smallint,
+	IN speed_percentile double precision DEFAULT NULL::double precision
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	-- neighborhood distances of the quality 3 and 4 stages
+	neighborhood_distances double precision[] := ARRAY[10, 200];
+	stage integer;
+	stage_start timestamp with time zone;
+	assigned_segments_count integer;
+BEGIN
+	IF target_area_id IS NULL THEN
+		RAISE EXCEPTION 'target_area_id cannot be NULL' USING ERRCODE = '22004';
+	END IF;
+
+	IF target_area_srid IS NULL THEN
+		RAISE EXCEPTION 'target_area_srid cannot be NULL' USING ERRCODE = '22004';
+	END IF;
+
+	IF NOT EXISTS (SELECT 1 FROM areas WHERE id = target_area_id) THEN
+		RAISE EXCEPTION 'Area with ID % does not exist', target_area_id USING ERRCODE = '22023';
+	END IF;
+
+	-- 1. The segments of the area, all without speed
+	CALL refresh_node_segments(target_area_id, target_area_srid);
+	CREATE TEMPORARY TABLE area_segment_speeds AS
+		SELECT
+			from_id,
+			to_id,
+			geom,
+			NULL::double precision AS speed,
+			NULL::double precision AS st_dev,
+			NULL::smallint AS quality,
+			NULL::integer AS source_records_count
+		FROM node_segments
+		WHERE area = target_area_id;
+	ALTER TABLE area_segment_speeds ADD PRIMARY KEY (from_id, to_id);
+	RAISE NOTICE '% segments in area %', (SELECT count(1) FROM area_segment_speeds), target_area_id;
+
+	-- 2. Speeds from the speed records (quality 1 or 2)
+	stage_start = clock_timestamp();
+	UPDATE area_segment_speeds
+	SET
+		speed = record_speeds.speed,
+		st_dev = record_speeds.st_dev,
+		quality = record_speeds.quality,
+		source_records_count = record_speeds.source_records_count
+	FROM select_segment_speeds_from_records(
+		target_area_id, speed_records_dataset, complete_speeds_in_area.hour, day_of_week, speed_percentile
+	) record_speeds
+	WHERE area_segment_speeds.from_id = record_speeds.from_id
+		AND area_segment_speeds.to_id = record_speeds.to_id;
+	GET DIAGNOSTICS assigned_segments_count = ROW_COUNT;
+	RAISE NOTICE 'speed from speed records computed for % segments in %',
+		assigned_segments_count, clock_timestamp() - stage_start;
+
+	IF assigned_segments_count = 0 THEN
+		RAISE NOTICE 'no speeds from speed records in area %, no speeds stored', target_area_id;
+		DROP TABLE area_segment_speeds;
+		RETURN;
+	END IF;
+
+	-- 3. Speeds from the neighborhood (quality 3 and 4), the neighbors are found through a partial GiST index of the
+	-- segments with speed from the records
+	CREATE INDEX area_segment_speeds_record_speeds_geom_idx
+		ON area_segment_speeds
+		USING GIST (geom)
+		WHERE quality <= 2;
+	ANALYZE area_segment_speeds;
+
+	FOR stage IN 1 .. array_length(neighborhood_distances, 1) LOOP
+		stage_start = clock_timestamp();
+		UPDATE area_segment_speeds
+		SET
+			speed = neighborhood_speeds.speed,
+			st_dev = neighborhood_speeds.st_dev,
+			quality = 2 + stage,
+			source_records_count = neighborhood_speeds.count
+		FROM (
+			SELECT
+				unassigned.from_id,
+				unassigned.to_id,
+				avg(neighbors.speed) AS speed,
+				avg(neighbors.st_dev) AS st_dev,
+				count(1) AS count
+			FROM area_segment_speeds unassigned
+				JOIN area_segment_speeds neighbors ON
+						neighbors.quality <= 2
+					AND st_dwithin(unassigned.geom, neighbors.geom, neighborhood_distances[stage])
+			WHERE unassigned.speed IS NULL
+			GROUP BY unassigned.from_id, unassigned.to_id
+		) neighborhood_speeds
+		WHERE area_segment_speeds.from_id = neighborhood_speeds.from_id
+			AND area_segment_speeds.to_id = neighborhood_speeds.to_id;
+		GET DIAGNOSTICS assigned_segments_count = ROW_COUNT;
+		RAISE NOTICE 'speed from neighborhood within % computed for % segments in %',
+			neighborhood_distances[stage], assigned_segments_count, clock_timestamp() - stage_start;
+	END LOOP;
+
+	-- 4. Average speed of the segments with speed from the records (quality 5)
+	stage_start = clock_timestamp();
+	UPDATE area_segment_speeds
+	SET
+		speed = average_speed.speed,
+		st_dev = average_speed.st_dev,
+		quality = 5,
+		source_records_count = average_speed.count
+	FROM (
+		SELECT avg(speed) AS speed, avg(st_dev) AS st_dev, count(1) AS count
+		FROM area_segment_speeds
+		WHERE quality <= 2
+	) average_speed
+	WHERE area_segment_speeds.speed IS NULL;
+	GET DIAGNOSTICS assigned_segments_count = ROW_COUNT;
+	RAISE NOTICE 'Average speed assigned to % segments in %', assigned_segments_count, clock_timestamp() - stage_start;
+
+	-- 5. Store the speeds, skipping the unchanged rows
+	INSERT INTO nodes_ways_speeds (from_node_ways_id, to_node_ways_id, speed, st_dev, quality, source_records_count)
+	SELECT from_id, to_id, speed, st_dev, quality, source_records_count
+	FROM area_segment_speeds
+	ON CONFLICT (from_node_ways_id, to_node_ways_id) DO UPDATE
+		SET
+			speed = excluded.speed,
+			st_dev = excluded.st_dev,
+			quality = excluded.quality,
+			source_records_count = excluded.source_records_count
+		WHERE (
+			nodes_ways_speeds.speed,
+			nodes_ways_speeds.st_dev,
+			nodes_ways_speeds.quality,
+			nodes_ways_speeds.source_records_count
+		) IS DISTINCT FROM (excluded.speed, excluded.st_dev, excluded.quality, excluded.source_records_count);
+	GET DIAGNOSTICS assigned_segments_count = ROW_COUNT;
+	RAISE NOTICE 'Speeds of % segments stored, the speeds of the other segments are unchanged', assigned_segments_count;
+
+	DROP TABLE area_segment_speeds;
+END
+$$
@@ -0,0 +1,127 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: compute_edge_slot_speeds
+-- Description: Aggregates the slot speeds of the road segments (nodes_ways_slot_speeds) onto the contracted edges of
+--              the area, using the length-weighted average of contract_graph_in_area. The segments of an edge are
+--              found by equi-joins on the segment nodes: an edge without contracted nodes consists of the segments
+--              from its start to its end, a contracted edge of the segments between the consecutive nodes of its
+--              chain. The chain is walked along node_segments from the edge start through the nodes contracted into
+--              the edge (nodes_edges) to the edge end, in the direction of the edge. Segments without a slot speed
+--              are skipped, the share of the edge length with a speed is stored in covered_length_ratio. The
+--              previous slot speeds of the edges of the area are replaced.
+-- Parameters:
+--      - target_area_id: area of the edges (edges.area)
+--      - speed_records_dataset: dataset of the slot speeds
+-- Required tables: edges, nodes_edges, node_segments, nodes_ways_slot_speeds
+-- Affected tables: edges_slot_speeds, node_segments
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE compute_edge_slot_speeds(IN target_area_id smallint, IN speed_records_dataset smallint)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted_count integer;
+BEGIN
+CALL refresh_node_segments(target_area_id);
+
+RAISE NOTICE 'Mapping road segments to the edges of area %', target_area_id;
+-- the ordered node chains of the contracted edges, walked along node_segments from the edge start through the contracted
+-- nodes, as in create_edge_segments_from_contractions. On two-way ways, the walk does not go back, so the segments of
+-- the opposite direction are not mapped to the edge. A loop edge with both neighbours of its start contracted can be
+-- walked both ways, only the walk with the lowest first node is kept.
+CREATE TEMPORARY TABLE contracted_edge_chain_pairs AS
+WITH RECURSIVE chain_vertices(edge_id, edge_to, walk, position, node, previous_node) AS (
+    SELECT edges.id, edges."to", NULL::bigint, 0, edges."from", NULL::bigint
+        FROM edges
+        WHERE edges.area = target_area_id AND EXISTS (SELECT 1 FROM nodes_edges WHERE nodes_edges.edge_id = edges.id)
+    UNION
+    SELECT
+        chain_vertices.edge_id,
+        chain_vertices.edge_to,
+        coalesce(chain_vertices.walk, node_segments.to_node),
+        chain_vertices.position + 1,
+        node_segments.to_node,
+        chain_vertices.node
+        FROM chain_vertices
+            JOIN node_segments ON node_segments.area = target_area_id
+                AND node_segments.from_node = chain_vertices.node
+        -- the walk ends at the edge end (the start of a loop is its end as well)
+        WHERE (chain_vertices.node != chain_vertices.edge_to OR chain_vertices.position = 0)
+            AND node_segments.to_node IS DISTINCT FROM chain_vertices.previous_node
+            AND (
+                (node_segments.to_node = chain_vertices.edge_to AND chain_vertices.position > 0)
+                OR EXISTS (
+                    SELECT 1
+                    FROM nodes_edges
+                    WHERE nodes_edges.edge_id = chain_vertices.edge_id AND nodes_edges.node_id = node_segments.to_node
+                )
+            )
+)
+SELECT edge_id, from_node, to_node
+    FROM (
+        SELECT
+            edge_id,
+            node AS from_node,
+            lead(node) OVER (PARTITION BY edge_id ORDER BY position) AS to_node
+            FROM (
+                SELECT *, min(walk) OVER (PARTITION BY edge_id) AS first_walk FROM chain_vertices
+            ) walks
+            WHERE walk IS NULL OR walk = first_walk
+    ) chain_pairs
+    WHERE to_node IS NOT NULL;
+
+-- the two parts cover disjoint edges: the edges without contracted nodes and the contracted edges
+CREATE TEMPORARY TABLE edge_segments AS
+SELECT
+    edges.id AS edge_id,
+    node_segments.from_id,
+    node_segments.to_id,
+    st_length(node_segments.geom) AS length
+    FROM edges
+        JOIN node_segments ON node_segments.area = target_area_id
+            AND node_segments.from_node = edges."from"
+            AND node_segments.to_node = edges."to"
+    WHERE edges.area = target_area_id
+        AND NOT EXISTS (SELECT 1 FROM nodes_edges WHERE nodes_edges.edge_id = edges.id)
+UNION ALL
+SELECT
+    contracted_edge_chain_pairs.edge_id,
+    node_segments.from_id,
+    node_segments.to_id,
+    st_length(node_segments.geom) AS length
+    FROM contracted_edge_chain_pairs
+        JOIN node_segments ON node_segments.area = target_area_id
+            AND node_segments.from_node = contracted_edge_chain_pairs.from_node
+            AND node_segments.to_node = contracted_edge_chain_pairs.to_node;
+CREATE INDEX edge_segments_from_id_to_id_idx ON edge_segments (from_id, to_id);
+ANALYZE edge_segments;
+RAISE NOTICE '% road segments mapped to % edges',
+    (SELECT count(*) FROM edge_segments), (SELECT count(DISTINCT edge_id) FROM edge_segments);
+
+DELETE FROM edges_slot_speeds
+    USING edges
+    WHERE edges.id = edges_slot_speeds.edge_id
+        AND edges.area = target_area_id
+        AND edges_slot_speeds.dataset = speed_records_dataset;
+
+INSERT INTO edges_slot_speeds (edge_id, dataset, isodow, hour, speed, covered_length_ratio)
+SELECT
+    edge_segments.edge_id,
+    speed_records_dataset,
+    nodes_ways_slot_speeds.isodow,
+    nodes_ways_slot_speeds.hour,
+    sum(nodes_ways_slot_speeds.speed * edge_segments.length) / sum(edge_segments.length) AS speed,
+    sum(edge_segments.length) / edge_lengths.length AS covered_length_ratio
+    FROM edge_segments
+        JOIN nodes_ways_slot_speeds ON nodes_ways_slot_speeds.dataset = speed_records_dataset
+            AND nodes_ways_slot_speeds.from_node_ways_id = edge_segments.from_id
+            AND nodes_ways_slot_speeds.to_node_ways_id = edge_segments.to_id
+        JOIN (
+            SELECT edge_id, sum(length) AS length FROM edge_segments GROUP BY edge_id
+        ) edge_lengths ON edge_lengths.edge_id = edge_segments.edge_id
+    GROUP BY edge_segments.edge_id, nodes_ways_slot_speeds.isodow, nodes_ways_slot_speeds.hour, edge_lengths.length
+    HAVING sum(edge_segments.length) > 0;
+GET DIAGNOSTICS inserted_count = ROW_COUNT;
+RAISE NOTICE '% edge slot speeds computed', inserted_count;
+
+DROP TABLE edge_segments, contracted_edge_chain_pairs;
+END
+$$
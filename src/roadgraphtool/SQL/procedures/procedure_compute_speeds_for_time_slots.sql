@@ -0,0 +1,139 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: compute_speeds_for_time_slots
+-- Description: Batch variant of compute_speeds_for_segments. The segments and node sequences of the area are
+--              selected once (select_node_sequences) and the speeds of all requested time slots (every
+--              combination of the hours and days of week) are computed in one grouped query. The speeds are stored in
+--              nodes_ways_slot_speeds. A re-run replaces the stored speeds of the requested slots and dataset for
+--              all segments of the area: the segments without speed records in the re-run lose their slot speeds.
+-- Parameters:
+--      - target_area_id: area of the segments
+--      - speed_records_dataset: dataset of the speed records
+--      - hours: hours of the slots (0-23)
+--      - days_of_week: ISO days of week of the slots (1-7). If NULL, the hours are computed from
+--        speed_records_quarterly for all days of the week (isodow 0, quality 2), otherwise from speed_profiles
+--        (quality 1)
+--      - speed_percentile: if set (0-1), the speed is this percentile of the speed records, computed from the speed
+--        sketches (speed_sketch_quantile), instead of the mean; speed records without a sketch are skipped
+-- Required tables: node_segments, speed_profiles, speed_records, speed_records_quarterly
+-- Affected tables: nodes_ways_slot_speeds, speed_profiles
+------------------------------------------------------------------------------------------------------------------------
+-- speed_percentile added, the old signature would remain as an overload
+DROP PROCEDURE IF EXISTS compute_speeds_for_time_slots(smallint, smallint, smallint[], smallint[]);
+
+CREATE OR REPLACE PROCEDURE compute_speeds_for_time_slots(
+    IN target_area_id smallint,
+    IN speed_records_dataset smallint,
+    IN hours smallint[],
+    IN days_of_week smallint[] DEFAULT NULL::smallint[],
+    IN speed_percentile double precision DEFAULT NULL::double precision
+)
+	LANGUAGE plpgsql
+AS
+$$
+DECLARE
+	dataset_quality smallint = 1;
+	deleted_count integer;
+	inserted_count integer;
+BEGIN
+
+-- segments in area, the node sequences are selected by select_node_sequences
+RAISE NOTICE 'Selecting segments in area: "%"', (SELECT name FROM areas WHERE id = target_area_id);
+CALL refresh_node_segments(target_area_id);
+
+IF days_of_week IS NULL THEN
+	dataset_quality = 2;
+	RAISE NOTICE 'Grouping speed records using speed dataset aggregated by hour (%). Hours %',
+		(SELECT name FROM speed_datasets WHERE id = speed_records_dataset), hours;
+	CREATE TEMPORARY TABLE grouped_speed_records AS
+	(
+		SELECT
+			0::smallint AS isodow,
+			speed_records_quarterly.hour,
+			from_osm_id,
+			to_osm_id,
+			CASE WHEN speed_percentile IS NULL
+				THEN avg(speed_mean)
+				ELSE speed_sketch_quantile(
+					speed_sketch_merge_agg(speed_sketch) FILTER (WHERE speed_percentile IS NOT NULL), speed_percentile
+				)
+			END as speed,
+			avg(st_dev) as st_dev
+			FROM
+				speed_records_quarterly
+			WHERE
+					dataset = speed_records_dataset
+				AND speed_records_quarterly.hour = ANY(hours)
+				AND (speed_percentile IS NULL OR speed_sketch IS NOT NULL)
+			GROUP BY
+				speed_records_quarterly.hour, from_osm_id, to_osm_id
+	);
+ELSE
+	CALL refresh_speed_profiles(speed_records_dataset);
+	RAISE NOTICE 'Grouping speed records using exact speed dataset %. Hours %, days of week: %',
+		(SELECT name FROM speed_datasets WHERE id = speed_records_dataset), hours, days_of_week;
+	CREATE TEMPORARY TABLE grouped_speed_records AS
+	(
+		SELECT
+			speed_profiles.isodow,
+			speed_profiles.hour,
+			from_osm_id,
+			to_osm_id,
+			CASE WHEN speed_percentile IS NULL
+				THEN speed_mean
+				ELSE speed_sketch_quantile(speed_sketch, speed_percentile)
+			END as speed,
+			st_dev_mean as st_dev
+			FROM
+				speed_profiles
+			WHERE
+					dataset = speed_records_dataset
+				AND speed_profiles.isodow = ANY(days_of_week)
+				AND speed_profiles.hour = ANY(hours)
+				AND (speed_percentile IS NULL OR speed_sketch IS NOT NULL)
+	);
+END IF;
+CREATE INDEX grouped_speed_records_osm_id_idx ON grouped_speed_records(from_osm_id, to_osm_id);
+RAISE NOTICE '% speed records aggregated by slot and from/to selected', (SELECT count(1) FROM grouped_speed_records);
+
+RAISE NOTICE 'Replacing the speeds of the slots in nodes_ways_slot_speeds';
+DELETE FROM nodes_ways_slot_speeds
+	USING node_segments
+	WHERE node_segments.area = target_area_id
+		AND nodes_ways_slot_speeds.from_node_ways_id = node_segments.from_id
+		AND nodes_ways_slot_speeds.to_node_ways_id = node_segments.to_id
+		AND nodes_ways_slot_speeds.dataset = speed_records_dataset
+		AND nodes_ways_slot_speeds.isodow = ANY(coalesce(days_of_week, ARRAY[0]::smallint[]))
+		AND nodes_ways_slot_speeds.hour = ANY(hours);
+GET DIAGNOSTICS deleted_count = ROW_COUNT;
+
+INSERT INTO nodes_ways_slot_speeds
+(
+	from_node_ways_id,
+	to_node_ways_id,
+	dataset,
+	isodow,
+	hour,
+	speed,
+	st_dev,
+	quality,
+	source_records_count
+)
+SELECT
+	segments.from_id AS "from",
+	segments.to_id AS "to",
+	speed_records_dataset,
+	speed_records.isodow,
+	speed_records.hour,
+	avg(speed_records.speed) AS speed,
+	avg(speed_records.st_dev) AS st_dev,
+	dataset_quality,
+	count(1) AS source_records_count
+	FROM grouped_speed_records speed_records
+			 JOIN select_node_sequences(target_area_id) segments ON
+					speed_records.from_osm_id = segments.from_osm_id
+				AND speed_records.to_osm_id = segments.to_osm_id
+	GROUP BY speed_records.isodow, speed_records.hour, segments.from_id, segments.to_id;
+GET DIAGNOSTICS inserted_count = ROW_COUNT;
+RAISE NOTICE 'Replaced % slot speeds of node segments by %, quality %', deleted_count, inserted_count, dataset_quality;
+DROP TABLE grouped_speed_records;
+END$$;
\ No newline at end of file
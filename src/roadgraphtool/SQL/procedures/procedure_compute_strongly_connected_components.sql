@@ -1,16 +1,57 @@
-CREATE OR REPLACE PROCEDURE compute_strong_components(IN target_area_id smallint)
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: compute_strong_components
+-- Description: Computes the strongly connected components of the edges in the area with pgr_strongcomponents and
+--              stores them in component_data, numbered from the largest component.
+-- Parameters:
+--   - target_area_id: area of the edges
+--   - edge_selection: how the edges of the area are selected:
+--     - 'geometry': edges lying within the area geometry,
+--     - 'area': edges generated for the area (edges.area, no spatial test) and the edges without an area lying
+--       within the area geometry. If there are no edges generated for the area (e.g., the graph was contracted for
+--       an enclosing area), the edges are selected by geometry.
+-- Required tables: edges, areas, area_parts
+-- Affected tables: component_data
+------------------------------------------------------------------------------------------------------------------------
+DROP PROCEDURE IF EXISTS compute_strong_components(smallint);
+CREATE OR REPLACE PROCEDURE compute_strong_components(
+    IN target_area_id smallint,
+    IN edge_selection text DEFAULT 'geometry'
+)
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    geometry_filter text;
+    edge_filter text;
 BEGIN
+IF edge_selection NOT IN ('geometry', 'area') THEN
+    RAISE EXCEPTION 'Unsupported edge selection %, expected geometry or area', edge_selection;
+END IF;
+
+geometry_filter := format(
+    -- an edge within a single area part is within the area; only edges crossing part borders are tested against
+    -- the whole area geometry
+    'EXISTS (SELECT 1 FROM area_parts WHERE area_parts.area = %1$L AND st_intersects(area_parts.geom, edges.geom)) ' ||
+    'AND (EXISTS (SELECT 1 FROM area_parts WHERE area_parts.area = %1$L AND st_within(edges.geom, area_parts.geom)) ' ||
+    'OR st_within(edges.geom, (SELECT geom FROM areas WHERE id = %1$L)))', target_area_id
+);
+
+IF edge_selection = 'area' AND EXISTS (SELECT 1 FROM edges WHERE area = target_area_id) THEN
+    -- edges without an area (not generated by a contraction) are still selected by geometry
+    edge_filter := format('WHERE edges.area = %L OR (edges.area IS NULL AND %s)', target_area_id, geometry_filter);
+ELSE
+    IF edge_selection = 'area' THEN
+        RAISE NOTICE 'No edges generated for area %, selecting edges by geometry', target_area_id;
+    END IF;
+    edge_filter := 'WHERE ' || geometry_filter;
+END IF;
 
 RAISE NOTICE 'Computing strong components for area %', (SELECT name FROM areas WHERE id = target_area_id);
 CREATE TEMPORARY TABLE components AS
 SELECT * FROM
-pgr_strongcomponents(format(
-    'WITH target_area AS (SELECT geom FROM areas WHERE id = %L) ' ||
+pgr_strongcomponents(
     'SELECT row_number() OVER () AS id, "from" AS source, "to" AS target, 0 AS cost, -1 AS reverse_cost ' ||
-    'FROM edges CROSS JOIN target_area WHERE st_within(edges.geom, target_area.geom)', target_area_id
-));
+    'FROM edges ' || edge_filter
+);
 RAISE NOTICE 'Strong components computed: % components', (SELECT count(1) OVER () FROM components GROUP BY component LIMIT 1);
 
 RAISE NOTICE 'Storing the results in the component_data table';
@@ -36,4 +77,4 @@ FROM
 
 DROP TABLE components;
 END
-$$
\ No newline at end of file
+$$
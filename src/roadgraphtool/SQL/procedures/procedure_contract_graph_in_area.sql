@@ -4,11 +4,16 @@ CREATE OR REPLACE PROCEDURE contract_graph_in_area(
     LANGUAGE plpgsql
 AS $$
 DECLARE
-    non_contracted_edges_count integer;
     restricted_nodes bigint[];
+    previous_edge_count integer;
+    phase_start timestamp with time zone;
+    phase_durations jsonb := '{}';
 BEGIN
+previous_edge_count := (SELECT count(*) FROM edges WHERE area = target_area_id);
 
 -- road segments table
+phase_start := clock_timestamp();
+CALL refresh_node_segments(target_area_id, target_area_srid);
 RAISE NOTICE 'Creating road segments table';
 IF fill_speed THEN
 CREATE TEMPORARY TABLE road_segments AS (
@@ -23,93 +28,46 @@ CREATE TEMPORARY TABLE road_segments AS (
     geom,
     nodes_ways_speeds.speed AS speed,
     nodes_ways_speeds.quality AS quality
-    FROM select_node_segments_in_area(target_area_id, target_area_srid)
+    FROM node_segments
         JOIN nodes_ways_speeds ON
             from_id = nodes_ways_speeds.from_node_ways_id
             AND to_id = nodes_ways_speeds.to_node_ways_id
+    WHERE node_segments.area = target_area_id
 );
 ELSE
     CREATE TEMPORARY TABLE road_segments AS (
-    SELECT * FROM select_node_segments_in_area(target_area_id, target_area_srid)
+    SELECT from_id, to_id, from_node, to_node, from_position, to_position, way_id, geom
+    FROM node_segments
+    WHERE area = target_area_id
 );
 end if;
 
 CREATE INDEX road_segments_index_from_to ON road_segments (from_id, to_id);
 RAISE NOTICE 'Road segments table created: % road segments', (SELECT count(*) FROM road_segments);
+phase_durations := phase_durations
+    || jsonb_build_object('road_segments', extract(EPOCH FROM clock_timestamp() - phase_start));
 
 -- get restricted nodes
 RAISE NOTICE 'Computing restricted nodes';
+phase_start := clock_timestamp();
 restricted_nodes = get_restricted_nodes();
+phase_durations := phase_durations
+    || jsonb_build_object('restricted_nodes', extract(EPOCH FROM clock_timestamp() - phase_start));
 
--- contraction
-CALL compute_contractions(restricted_nodes);
+-- contraction, nodes update and edges
+phase_start := clock_timestamp();
+CALL contract_road_segments(target_area_id, restricted_nodes, fill_speed);
+phase_durations := phase_durations
+    || jsonb_build_object('contraction', extract(EPOCH FROM clock_timestamp() - phase_start));
 
--- update nodes
-RAISE NOTICE 'Updating nodes';
-UPDATE nodes
-	SET contracted = TRUE
-WHERE id IN (
-	SELECT contracted_vertex
-	FROM contractions
+-- statistics
+CALL store_contraction_run(
+    target_area_id,
+    'sql',
+    restricted_nodes,
+    (SELECT count(*) FROM edges WHERE area = target_area_id)::integer - previous_edge_count,
+    phase_durations
 );
 
--- edges for non contracted road segments
-RAISE NOTICE 'Creating edges for non-contracted road segments';
-
-IF fill_speed THEN
-INSERT INTO edges ("from", "to", geom, area, speed)
-SELECT
-	road_segments.from_node,
-	road_segments.to_node,
-	st_multi(st_makeline(from_nodes.geom, to_nodes.geom)) as geom,
-	target_area_id AS area,
-	speed
-	FROM road_segments
-		JOIN nodes from_nodes ON from_nodes.id  = from_node AND from_nodes.contracted = FALSE
-		JOIN nodes to_nodes ON to_nodes.id  = to_node AND to_nodes.contracted = FALSE
-	JOIN ways ON ways.id = road_segments.way_id;
-ELSE
-INSERT INTO edges ("from", "to", geom, area)
-SELECT
-    road_segments.from_node,
-    road_segments.to_node,
-    st_multi(st_makeline(from_nodes.geom, to_nodes.geom)) as geom,
-    target_area_id AS area
-    FROM road_segments
-        JOIN nodes from_nodes ON from_nodes.id  = from_node AND from_nodes.contracted = FALSE
-        JOIN nodes to_nodes ON to_nodes.id  = to_node AND to_nodes.contracted = FALSE
-        JOIN ways ON ways.id = road_segments.way_id;
-END IF;
-
-non_contracted_edges_count := (SELECT count(*) FROM edges WHERE area = target_area_id);
-RAISE NOTICE '% Edges for non-contracted road segments created', non_contracted_edges_count;
-
--- contraction segments generation
-CALL create_edge_segments_from_contractions(fill_speed);
-
--- edges for contracted road segments
-RAISE NOTICE 'Creating edges for contracted road segments';
-IF fill_speed THEN
-    INSERT INTO edges ("from", "to", area, geom, speed)
-    SELECT
-        max(edge_from),
-        max(edge_to),
-        target_area_id AS area,
-        st_transform(st_multi(st_union(geom)), 4326) AS geom,
-        sum(speed * st_length(geom)) / sum(st_length(geom)) AS speed
-    FROM contraction_segments
-    GROUP BY id;
-ELSE
-    INSERT INTO edges ("from", "to", area, geom)
-    SELECT
-        max(edge_from),
-        max(edge_to),
-        target_area_id AS area,
-        st_transform(st_multi(st_union(geom)), 4326) AS geom
-    FROM contraction_segments
-    GROUP BY id;
-END IF;
-RAISE NOTICE '% Edges for contracted road segments created', (SELECT count(*) FROM edges WHERE area = target_area_id) - non_contracted_edges_count;
-
 END
 $$
\ No newline at end of file
@@ -0,0 +1,50 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: contract_graph_in_tile
+-- Description: Second step of the tiled contraction, run for every tile, possibly in parallel sessions. Contracts the
+--              road segments of one tile from contraction_tile_segments. Nodes on the tile boundary (nodes of
+--              segments crossing to another tile) are restricted, so the tiles can be contracted independently.
+-- Parameters:
+--      - target_area_id: contracted area
+--      - target_tile: tile from contraction_tile_segments
+--      - fill_speed: store the segment speeds in edges.speed
+-- Required tables: contraction_tile_segments, nodes, ways
+-- Affected tables: nodes, edges
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE contract_graph_in_tile(
+    IN target_area_id smallint, IN target_tile integer, IN fill_speed boolean DEFAULT FALSE
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    restricted_nodes bigint[];
+    boundary_nodes bigint[];
+BEGIN
+CREATE TEMPORARY TABLE road_segments AS
+    SELECT from_id, to_id, from_node, to_node, from_position, to_position, way_id, geom, speed, quality
+    FROM contraction_tile_segments
+    WHERE area = target_area_id AND tile = target_tile;
+
+CREATE INDEX road_segments_index_from_to ON road_segments (from_id, to_id);
+RAISE NOTICE 'Tile %: % road segments', target_tile, (SELECT count(*) FROM road_segments);
+
+restricted_nodes = get_restricted_nodes();
+
+boundary_nodes = ARRAY(
+    SELECT boundary_segment_nodes.node_id
+    FROM contraction_tile_segments
+        CROSS JOIN LATERAL (
+            VALUES (contraction_tile_segments.from_node), (contraction_tile_segments.to_node)
+        ) AS boundary_segment_nodes(node_id)
+    WHERE contraction_tile_segments.area = target_area_id AND contraction_tile_segments.tile IS NULL
+    INTERSECT
+    (
+        SELECT from_node FROM road_segments
+        UNION
+        SELECT to_node FROM road_segments
+    )
+);
+RAISE NOTICE 'Tile %: % nodes on the tile boundary', target_tile, cardinality(boundary_nodes);
+
+CALL contract_road_segments(target_area_id, restricted_nodes || boundary_nodes, fill_speed);
+END
+$$
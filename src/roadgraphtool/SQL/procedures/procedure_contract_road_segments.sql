@@ -0,0 +1,74 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: contract_road_segments
+-- Description: Contracts the graph given by the temporary road_segments table and stores the result: the contracted
+--              nodes are marked in nodes.contracted and the edges (contracted chains and the remaining road segments)
+--              are inserted into edges with the given area, the contracted nodes are mapped to their edges in
+--              nodes_edges. Used by contract_graph_in_area and contract_graph_in_tile.
+-- Parameters:
+--      - target_area_id: area of the created edges
+--      - restricted_nodes: nodes that must not be contracted
+--      - fill_speed: whether road_segments has a speed column that should be stored in edges.speed
+-- Required tables: road_segments (temporary), nodes, ways
+-- Affected tables: nodes, edges, nodes_edges
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE contract_road_segments(
+    IN target_area_id smallint, IN restricted_nodes bigint[], IN fill_speed boolean DEFAULT FALSE
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    non_contracted_edges_count integer;
+BEGIN
+
+-- contraction
+CALL compute_contractions(restricted_nodes);
+
+-- update nodes
+RAISE NOTICE 'Updating nodes';
+UPDATE nodes
+	SET contracted = TRUE
+WHERE id IN (
+	SELECT contracted_vertex
+	FROM contractions
+);
+
+-- edges for non contracted road segments
+RAISE NOTICE 'Creating edges for non-contracted road segments';
+
+IF fill_speed THEN
+INSERT INTO edges ("from", "to", geom, area, speed)
+SELECT
+	road_segments.from_node,
+	road_segments.to_node,
+	st_multi(st_makeline(from_nodes.geom, to_nodes.geom)) as geom,
+	target_area_id AS area,
+	speed
+	FROM road_segments
+		JOIN nodes from_nodes ON from_nodes.id  = from_node AND from_nodes.contracted = FALSE
+		JOIN nodes to_nodes ON to_nodes.id  = to_node AND to_nodes.contracted = FALSE
+	JOIN ways ON ways.id = road_segments.way_id;
+ELSE
+INSERT INTO edges ("from", "to", geom, area)
+SELECT
+    road_segments.from_node,
+    road_segments.to_node,
+    st_multi(st_makeline(from_nodes.geom, to_nodes.geom)) as geom,
+    target_area_id AS area
+    FROM road_segments
+        JOIN nodes from_nodes ON from_nodes.id  = from_node AND from_nodes.contracted = FALSE
+        JOIN nodes to_nodes ON to_nodes.id  = to_node AND to_nodes.contracted = FALSE
+        JOIN ways ON ways.id = road_segments.way_id;
+END IF;
+
+GET DIAGNOSTICS non_contracted_edges_count = ROW_COUNT;
+RAISE NOTICE '% Edges for non-contracted road segments created', non_contracted_edges_count;
+
+-- contraction segments generation
+CALL create_edge_segments_from_contractions(fill_speed);
+
+-- edges for contracted road segments
+RAISE NOTICE 'Creating edges for contracted road segments';
+CALL insert_contracted_edges(target_area_id, fill_speed);
+
+END
+$$
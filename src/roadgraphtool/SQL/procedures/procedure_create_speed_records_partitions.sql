@@ -0,0 +1,56 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: create_speed_records_partitions
+-- Description: Creates the partitions of speed_records for a dataset and the months between from_datetime and
+--              to_datetime (both included): the dataset partition speed_records_dataset_<dataset> (partitioned by
+--              datetime, with a default partition) and its monthly partitions speed_records_dataset_<dataset>_<yyyy>_<mm>.
+--              Existing partitions are kept. Should be called before loading the records of new months, a monthly
+--              partition cannot be created while the default partition of the dataset holds records of that month.
+-- Parameters:
+--      - target_dataset: dataset of the records
+--      - from_datetime: first month to create
+--      - to_datetime: last month to create
+-- Required tables: speed_records (partitioned)
+-- Affected tables: speed_records partitions
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE create_speed_records_partitions(
+    IN target_dataset smallint,
+    IN from_datetime timestamp without time zone,
+    IN to_datetime timestamp without time zone
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    dataset_partition text := format('speed_records_dataset_%s', target_dataset);
+    month_start timestamp without time zone;
+    month_partition text;
+    created_count integer := 0;
+BEGIN
+IF target_dataset IS NULL THEN
+    RAISE EXCEPTION 'target_dataset cannot be NULL, records without a dataset are stored in speed_records_default';
+END IF;
+
+IF to_regclass(dataset_partition) IS NULL THEN
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF speed_records FOR VALUES IN (%L) PARTITION BY RANGE (datetime)',
+        dataset_partition, target_dataset
+    );
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', dataset_partition || '_default', dataset_partition);
+    RAISE NOTICE 'Partition % created', dataset_partition;
+END IF;
+
+FOR month_start IN
+    SELECT generate_series(date_trunc('month', from_datetime), date_trunc('month', to_datetime), INTERVAL '1 month')
+LOOP
+    month_partition := format('%s_%s', dataset_partition, to_char(month_start, 'YYYY_MM'));
+    IF to_regclass(month_partition) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            month_partition, dataset_partition, month_start, month_start + INTERVAL '1 month'
+        );
+        created_count := created_count + 1;
+    END IF;
+END LOOP;
+
+RAISE NOTICE '% monthly partitions of dataset % created', created_count, target_dataset;
+END
+$$
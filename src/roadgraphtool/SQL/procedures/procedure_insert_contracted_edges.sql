@@ -0,0 +1,54 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: insert_contracted_edges
+-- Description: Inserts an edge for every contraction in contraction_segments and maps the contracted vertices from
+--              contractions to their edge in nodes_edges. The contraction ids and the ids of the new edges are kept in
+--              the temporary contracted_edges table (contraction_id, edge_id).
+-- Parameters:
+--      - target_area_id: area of the created edges
+--      - fill_speed: whether contraction_segments has a speed column that should be stored in edges.speed
+-- Required tables: contractions (temporary), contraction_segments (temporary)
+-- Affected tables: edges, nodes_edges
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE insert_contracted_edges(IN target_area_id smallint, IN fill_speed boolean DEFAULT FALSE)
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+CREATE TEMPORARY TABLE contracted_edges AS
+SELECT
+    contraction_ids.id AS contraction_id,
+    nextval('edge_id_seq')::integer AS edge_id
+    FROM (SELECT DISTINCT id FROM contraction_segments) AS contraction_ids;
+
+IF fill_speed THEN
+    INSERT INTO edges (id, "from", "to", area, geom, speed)
+    SELECT
+        contracted_edges.edge_id,
+        max(edge_from),
+        max(edge_to),
+        target_area_id AS area,
+        st_transform(st_multi(st_union(geom)), 4326) AS geom,
+        sum(speed * st_length(geom)) / sum(st_length(geom)) AS speed
+    FROM contraction_segments
+        JOIN contracted_edges ON contracted_edges.contraction_id = contraction_segments.id
+    GROUP BY contracted_edges.edge_id;
+ELSE
+    INSERT INTO edges (id, "from", "to", area, geom)
+    SELECT
+        contracted_edges.edge_id,
+        max(edge_from),
+        max(edge_to),
+        target_area_id AS area,
+        st_transform(st_multi(st_union(geom)), 4326) AS geom
+    FROM contraction_segments
+        JOIN contracted_edges ON contracted_edges.contraction_id = contraction_segments.id
+    GROUP BY contracted_edges.edge_id;
+END IF;
+
+INSERT INTO nodes_edges (node_id, edge_id)
+SELECT DISTINCT contractions.contracted_vertex, contracted_edges.edge_id
+    FROM contractions
+        JOIN contracted_edges ON contracted_edges.contraction_id = contractions.id;
+
+RAISE NOTICE '% Edges for contracted road segments created', (SELECT count(*) FROM contracted_edges);
+END
+$$
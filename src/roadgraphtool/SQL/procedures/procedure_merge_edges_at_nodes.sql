@@ -0,0 +1,82 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: merge_edges_at_nodes
+-- Description: Contracts the given nodes in the already contracted graph of the area: the edges meeting in these
+--              nodes are merged with pgr_contraction, the same way as the road segments in contract_graph_in_area.
+--              Only the edges around the given nodes are processed. The nodes have to be contractible (see
+--              get_restricted_nodes) with respect to the road segments of the area. The nodes_edges mapping of the
+--              merged edges is moved to the new edges.
+-- Parameters:
+--      - target_area_id: area of the edges
+--      - target_area_srid: SRID used for the length weights of the merged speeds
+--      - merged_nodes: nodes to contract
+--      - fill_speed: store the speeds in edges.speed
+-- Required tables: edges, nodes_edges, nodes
+-- Affected tables: nodes, edges, nodes_edges
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE merge_edges_at_nodes(
+    IN target_area_id smallint, IN target_area_srid integer, IN merged_nodes bigint[], IN fill_speed boolean DEFAULT FALSE
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    restricted_nodes bigint[];
+BEGIN
+IF coalesce(cardinality(merged_nodes), 0) = 0 THEN
+    RETURN;
+END IF;
+
+-- the edges around the merged nodes are the road segments of this contraction
+CREATE TEMPORARY TABLE road_segments AS
+SELECT
+    edges.id AS edge_id,
+    edges."from" AS from_node,
+    edges."to" AS to_node,
+    st_transform(edges.geom, target_area_srid) AS geom,
+    edges.speed
+    FROM edges
+    WHERE edges.area = target_area_id
+        AND (edges."from" = ANY(merged_nodes) OR edges."to" = ANY(merged_nodes));
+
+restricted_nodes = ARRAY(
+    SELECT from_node FROM road_segments
+    UNION
+    SELECT to_node FROM road_segments
+    EXCEPT
+    SELECT unnest(merged_nodes)
+);
+
+CALL compute_contractions(restricted_nodes);
+CALL create_edge_segments_from_contractions(fill_speed);
+CALL insert_contracted_edges(target_area_id, fill_speed);
+
+-- nodes contracted into the merged edges before
+INSERT INTO nodes_edges (node_id, edge_id)
+SELECT DISTINCT nodes_edges.node_id, contracted_edges.edge_id
+    FROM contraction_segments
+        JOIN contracted_edges ON contracted_edges.contraction_id = contraction_segments.id
+        JOIN road_segments
+             ON road_segments.from_node = contraction_segments.from_node
+                 AND road_segments.to_node = contraction_segments.to_node
+        JOIN nodes_edges ON nodes_edges.edge_id = road_segments.edge_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM edges
+WHERE id IN (
+    SELECT edge_id
+    FROM road_segments
+    WHERE from_node IN (SELECT contracted_vertex FROM contractions)
+        OR to_node IN (SELECT contracted_vertex FROM contractions)
+);
+
+UPDATE nodes
+    SET contracted = TRUE
+WHERE id IN (
+    SELECT contracted_vertex
+    FROM contractions
+);
+
+RAISE NOTICE '% nodes contracted by merging edges', (SELECT count(DISTINCT contracted_vertex) FROM contractions);
+
+DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+END
+$$
@@ -0,0 +1,71 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: migrate_speed_records_to_partitions
+-- Description: Converts a speed_records table created before the partitioning into the partitioned table (see
+--              tables/13_speed_records.sql). The old table is renamed to speed_records_unpartitioned, the partitions
+--              are created for all datasets and months of the old records and the records are copied. The new
+--              table is created LIKE the old one, with the generated hour and isodow columns added. Does nothing if
+--              speed_records is already partitioned.
+-- Parameters:
+--      - drop_old_table: drop speed_records_unpartitioned after the records are copied
+-- Required tables: speed_records (with record_id, see migrations/004_speed_records_record_id.sql)
+-- Affected tables: speed_records, speed_records_unpartitioned
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE migrate_speed_records_to_partitions(IN drop_old_table boolean DEFAULT TRUE)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    dataset_months record;
+    migrated_count bigint;
+BEGIN
+IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('speed_records')) = 'p' THEN
+    RAISE NOTICE 'speed_records is already partitioned';
+    RETURN;
+END IF;
+
+RAISE NOTICE 'Renaming speed_records to speed_records_unpartitioned';
+ALTER TABLE speed_records RENAME TO speed_records_unpartitioned;
+ALTER INDEX IF EXISTS speed_records_from_osm_id_to_osm_id_index
+    RENAME TO speed_records_unpartitioned_from_osm_id_to_osm_id_index;
+ALTER INDEX IF EXISTS speed_records_record_id_index RENAME TO speed_records_unpartitioned_record_id_index;
+
+RAISE NOTICE 'Creating the partitioned speed_records table';
+-- the columns, defaults and indexes are taken from the old table, only the generated columns and the indexes added with
+-- the partitioning are declared here
+CREATE TABLE speed_records (
+    LIKE speed_records_unpartitioned INCLUDING ALL,
+    hour smallint GENERATED ALWAYS AS (EXTRACT(HOUR FROM datetime)::smallint) STORED,
+    isodow smallint GENERATED ALWAYS AS (EXTRACT(ISODOW FROM datetime)::smallint) STORED
+)
+PARTITION BY LIST (dataset);
+-- named as in tables/13_speed_records.sql
+ALTER INDEX IF EXISTS speed_records_from_osm_id_to_osm_id_idx RENAME TO speed_records_from_osm_id_to_osm_id_index;
+ALTER INDEX IF EXISTS speed_records_record_id_idx RENAME TO speed_records_record_id_index;
+CREATE TABLE speed_records_default PARTITION OF speed_records DEFAULT;
+CREATE INDEX speed_records_datetime_index ON speed_records USING brin (datetime);
+CREATE INDEX speed_records_isodow_hour_index ON speed_records USING btree (isodow, hour);
+
+FOR dataset_months IN
+    SELECT dataset, min(datetime) AS from_datetime, max(datetime) AS to_datetime
+    FROM speed_records_unpartitioned
+    WHERE dataset IS NOT NULL
+    GROUP BY dataset
+LOOP
+    CALL create_speed_records_partitions(
+        dataset_months.dataset, dataset_months.from_datetime, dataset_months.to_datetime
+    );
+END LOOP;
+
+RAISE NOTICE 'Copying the speed records';
+INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset, record_id)
+SELECT datetime, from_osm_id, to_osm_id, speed, st_dev, dataset, record_id
+FROM speed_records_unpartitioned;
+GET DIAGNOSTICS migrated_count = ROW_COUNT;
+RAISE NOTICE '% speed records migrated', migrated_count;
+
+IF drop_old_table THEN
+    DROP TABLE speed_records_unpartitioned;
+END IF;
+
+ANALYZE speed_records;
+END
+$$
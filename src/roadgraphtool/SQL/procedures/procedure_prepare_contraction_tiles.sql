@@ -0,0 +1,83 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: prepare_contraction_tiles
+-- Description: First step of the tiled contraction. Stores the road segments of the area in contraction_tile_segments
+--              together with the tile of the segment. Tiles are squares of tile_size (in units of target_area_srid)
+--              numbered row by row from the south-west corner of the area extent. A segment whose nodes lie in
+--              different tiles crosses a tile boundary and gets tile NULL.
+-- Parameters:
+--      - target_area_id: area to contract
+--      - target_area_srid: SRID used for the segment geometries and tiles
+--      - tile_size: tile side length in units of target_area_srid
+--      - fill_speed: keep only segments with a speed in nodes_ways_speeds and store the speed
+-- Required tables: node_segments (refreshed by refresh_node_segments), nodes_ways_speeds
+-- Affected tables: contraction_tile_segments, node_segments
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE prepare_contraction_tiles(
+    IN target_area_id smallint, IN target_area_srid integer, IN tile_size double precision,
+    IN fill_speed boolean DEFAULT FALSE
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    x_min double precision;
+    y_min double precision;
+    tile_columns integer;
+BEGIN
+IF tile_size <= 0 THEN
+    RAISE EXCEPTION 'tile_size must be positive, got %', tile_size;
+END IF;
+
+DELETE FROM contraction_tile_segments WHERE area = target_area_id;
+
+RAISE NOTICE 'Creating road segments table';
+CALL refresh_node_segments(target_area_id, target_area_srid);
+CREATE TEMPORARY TABLE area_segments AS
+    SELECT from_id, to_id, from_node, to_node, from_position, to_position, way_id, geom
+    FROM node_segments
+    WHERE area = target_area_id;
+
+SELECT
+    st_xmin(area_extent.extent),
+    st_ymin(area_extent.extent),
+    floor((st_xmax(area_extent.extent) - st_xmin(area_extent.extent)) / tile_size)::integer + 1
+    INTO x_min, y_min, tile_columns
+    FROM (SELECT st_extent(geom) AS extent FROM area_segments) AS area_extent;
+
+INSERT INTO contraction_tile_segments (
+    area, tile, from_id, to_id, from_node, to_node, from_position, to_position, way_id, geom, speed, quality
+)
+SELECT
+    target_area_id,
+    CASE WHEN tiled_segments.from_tile = tiled_segments.to_tile THEN tiled_segments.from_tile END,
+    tiled_segments.from_id,
+    tiled_segments.to_id,
+    tiled_segments.from_node,
+    tiled_segments.to_node,
+    tiled_segments.from_position,
+    tiled_segments.to_position,
+    tiled_segments.way_id,
+    tiled_segments.geom,
+    nodes_ways_speeds.speed,
+    nodes_ways_speeds.quality
+    FROM (
+        SELECT
+            area_segments.*,
+            floor((st_y(st_startpoint(geom)) - y_min) / tile_size)::integer * tile_columns
+                + floor((st_x(st_startpoint(geom)) - x_min) / tile_size)::integer AS from_tile,
+            floor((st_y(st_endpoint(geom)) - y_min) / tile_size)::integer * tile_columns
+                + floor((st_x(st_endpoint(geom)) - x_min) / tile_size)::integer AS to_tile
+        FROM area_segments
+    ) AS tiled_segments
+        LEFT JOIN nodes_ways_speeds ON
+            tiled_segments.from_id = nodes_ways_speeds.from_node_ways_id
+            AND tiled_segments.to_id = nodes_ways_speeds.to_node_ways_id
+    WHERE NOT fill_speed OR nodes_ways_speeds.speed IS NOT NULL;
+
+DROP TABLE area_segments;
+
+RAISE NOTICE '% road segments in % tiles, % segments on tile boundaries',
+    (SELECT count(*) FROM contraction_tile_segments WHERE area = target_area_id),
+    (SELECT count(DISTINCT tile) FROM contraction_tile_segments WHERE area = target_area_id),
+    (SELECT count(*) FROM contraction_tile_segments WHERE area = target_area_id AND tile IS NULL);
+END
+$$
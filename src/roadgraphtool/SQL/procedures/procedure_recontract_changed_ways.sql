@@ -0,0 +1,176 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: recontract_changed_ways
+-- Description: Updates the contracted graph of an area after some of its ways changed, without contracting the whole
+--              area again. The edges touching the nodes of the changed ways (as an endpoint, or as a contracted node
+--              found through nodes_edges) are deleted, and the road segments between the nodes of the deleted edges
+--              and of the changed ways are contracted again. Nodes of this neighbourhood that are also connected to
+--              the rest of the graph are restricted in this contraction; the ones that are contractible in the
+--              whole area are contracted afterwards by merging their edges (merge_edges_at_nodes). The work
+--              depends only on the size of the change, not on the size of the area.
+--              The ways are found by their nodes_ways rows, so ways removed from the database are not covered.
+-- Parameters:
+--      - target_area_id: contracted area
+--      - target_area_srid: SRID used for the road segment geometries
+--      - changed_way_ids: ids of the added or modified ways
+--      - fill_speed: contract with the speeds from nodes_ways_speeds
+-- Required tables: nodes, ways, nodes_ways, area_parts, edges, nodes_edges, nodes_ways_speeds
+-- Affected tables: nodes, edges, nodes_edges
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE recontract_changed_ways(
+    IN target_area_id smallint, IN target_area_srid integer, IN changed_way_ids bigint[],
+    IN fill_speed boolean DEFAULT FALSE
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    restricted_nodes bigint[];
+    border_nodes bigint[];
+    merged_nodes bigint[];
+BEGIN
+CREATE TEMPORARY TABLE changed_nodes AS
+SELECT DISTINCT node_id FROM nodes_ways WHERE way_id = ANY(changed_way_ids);
+
+-- edges ending in a changed node or containing it as a contracted node
+CREATE TEMPORARY TABLE affected_edges AS
+SELECT edges.id, edges."from", edges."to"
+    FROM edges
+    WHERE edges.area = target_area_id
+        AND (
+            edges."from" IN (SELECT node_id FROM changed_nodes)
+            OR edges."to" IN (SELECT node_id FROM changed_nodes)
+            OR edges.id IN (
+                SELECT nodes_edges.edge_id FROM nodes_edges WHERE nodes_edges.node_id IN (SELECT node_id FROM changed_nodes)
+            )
+        );
+
+CREATE TEMPORARY TABLE local_nodes AS
+SELECT node_id FROM changed_nodes
+UNION
+SELECT "from" FROM affected_edges
+UNION
+SELECT "to" FROM affected_edges
+UNION
+SELECT nodes_edges.node_id FROM nodes_edges WHERE nodes_edges.edge_id IN (SELECT id FROM affected_edges);
+
+RAISE NOTICE '% changed ways: % edges and % nodes affected',
+    cardinality(changed_way_ids), (SELECT count(*) FROM affected_edges), (SELECT count(*) FROM local_nodes);
+
+UPDATE nodes
+    SET contracted = FALSE
+WHERE id IN (
+    SELECT nodes_edges.node_id FROM nodes_edges WHERE nodes_edges.edge_id IN (SELECT id FROM affected_edges)
+);
+
+-- the nodes_edges rows are deleted with the edges
+DELETE FROM edges WHERE id IN (SELECT id FROM affected_edges);
+
+-- all road segments in the area touching a local node
+CREATE TEMPORARY TABLE neighbourhood_segments AS
+SELECT
+    from_nodes_ways.id::bigint AS from_id,
+    to_node_ways.id::bigint AS to_id,
+    from_nodes.id::bigint AS from_node,
+    to_nodes.id::bigint AS to_node,
+    from_nodes_ways.position AS from_position,
+    to_node_ways.position AS to_position,
+    to_node_ways.way_id::bigint AS way_id,
+    st_transform(st_makeline(from_nodes.geom, to_nodes.geom), target_area_srid) AS geom
+    FROM
+        nodes_ways from_nodes_ways
+            JOIN ways ON from_nodes_ways.way_id = ways.id
+            JOIN nodes_ways to_node_ways
+                 ON from_nodes_ways.way_id = to_node_ways.way_id
+                     AND (
+                                from_nodes_ways.position = to_node_ways.position - 1
+                            OR (from_nodes_ways.position = to_node_ways.position + 1 AND ways.oneway = false)
+                        )
+            JOIN nodes from_nodes ON from_nodes_ways.node_id = from_nodes.id
+            JOIN nodes to_nodes ON to_node_ways.node_id = to_nodes.id
+    WHERE from_nodes_ways.way_id IN (
+            SELECT nodes_ways.way_id FROM nodes_ways WHERE nodes_ways.node_id IN (SELECT node_id FROM local_nodes)
+        )
+        AND (
+            from_nodes.id IN (SELECT node_id FROM local_nodes)
+            OR to_nodes.id IN (SELECT node_id FROM local_nodes)
+        )
+        AND EXISTS (
+            SELECT 1 FROM area_parts
+            WHERE area_parts.area = target_area_id AND st_intersects(area_parts.geom, from_nodes.geom)
+        )
+        AND EXISTS (
+            SELECT 1 FROM area_parts
+            WHERE area_parts.area = target_area_id AND st_intersects(area_parts.geom, to_nodes.geom)
+        );
+
+-- contractibility of the local nodes, evaluated on all their segments
+CREATE TEMPORARY TABLE road_segments AS
+SELECT from_node, to_node FROM neighbourhood_segments;
+
+restricted_nodes = get_restricted_nodes();
+
+DROP TABLE road_segments;
+
+-- the segments of the deleted edges and of the changed ways: both nodes are local and the segment is not a
+-- remaining (non-contracted) edge
+IF fill_speed THEN
+    CREATE TEMPORARY TABLE road_segments AS
+    SELECT neighbourhood_segments.*, nodes_ways_speeds.speed AS speed, nodes_ways_speeds.quality AS quality
+        FROM neighbourhood_segments
+            JOIN nodes_ways_speeds ON
+                neighbourhood_segments.from_id = nodes_ways_speeds.from_node_ways_id
+                AND neighbourhood_segments.to_id = nodes_ways_speeds.to_node_ways_id
+        WHERE neighbourhood_segments.from_node IN (SELECT node_id FROM local_nodes)
+            AND neighbourhood_segments.to_node IN (SELECT node_id FROM local_nodes)
+            AND NOT EXISTS (
+                SELECT 1 FROM edges
+                WHERE edges.area = target_area_id
+                    AND edges."from" = neighbourhood_segments.from_node
+                    AND edges."to" = neighbourhood_segments.to_node
+            );
+ELSE
+    CREATE TEMPORARY TABLE road_segments AS
+    SELECT neighbourhood_segments.*
+        FROM neighbourhood_segments
+        WHERE neighbourhood_segments.from_node IN (SELECT node_id FROM local_nodes)
+            AND neighbourhood_segments.to_node IN (SELECT node_id FROM local_nodes)
+            AND NOT EXISTS (
+                SELECT 1 FROM edges
+                WHERE edges.area = target_area_id
+                    AND edges."from" = neighbourhood_segments.from_node
+                    AND edges."to" = neighbourhood_segments.to_node
+            );
+END IF;
+
+CREATE INDEX road_segments_index_from_to ON road_segments (from_id, to_id);
+RAISE NOTICE 'Road segments table created: % road segments', (SELECT count(*) FROM road_segments);
+
+-- local nodes connected to the rest of the graph
+border_nodes = ARRAY(
+    SELECT neighbourhood_segments.from_node FROM neighbourhood_segments
+    WHERE neighbourhood_segments.to_node NOT IN (SELECT node_id FROM local_nodes)
+    UNION
+    SELECT neighbourhood_segments.to_node FROM neighbourhood_segments
+    WHERE neighbourhood_segments.from_node NOT IN (SELECT node_id FROM local_nodes)
+    UNION
+    SELECT edges."from" FROM edges
+    WHERE edges.area = target_area_id AND edges."from" IN (SELECT node_id FROM local_nodes)
+    UNION
+    SELECT edges."to" FROM edges
+    WHERE edges.area = target_area_id AND edges."to" IN (SELECT node_id FROM local_nodes)
+);
+
+CALL contract_road_segments(target_area_id, restricted_nodes || border_nodes, fill_speed);
+
+DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+
+-- border nodes that are contractible in the whole area
+merged_nodes = ARRAY(
+    SELECT unnest(border_nodes)
+    EXCEPT
+    SELECT unnest(restricted_nodes)
+);
+CALL merge_edges_at_nodes(target_area_id, target_area_srid, merged_nodes, fill_speed);
+
+DROP TABLE changed_nodes, affected_edges, local_nodes, neighbourhood_segments;
+END
+$$
@@ -0,0 +1,55 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: refresh_node_segments
+-- Description: Makes sure node_segments contains the road segments of the area (select_node_segments_in_area) in the
+--              requested SRID. The segments are recomputed only if the area has no segments yet, if it was marked
+--              stale by a change of its ways (see mark_stale_node_segments) or if the SRID differs.
+-- Parameters:
+--      - target_area_id: area of the segments
+--      - target_area_srid: SRID of the segment geometries; NULL keeps the SRID of the stored segments (4326 if the
+--        area has no segments yet)
+-- Required tables: areas, area_parts, ways, nodes_ways, nodes
+-- Affected tables: node_segments, node_segments_areas
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE refresh_node_segments(IN target_area_id smallint, IN target_area_srid integer DEFAULT NULL)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    segments_srid integer;
+BEGIN
+segments_srid := coalesce(
+    target_area_srid,
+    (SELECT srid FROM node_segments_areas WHERE area = target_area_id),
+    4326
+);
+
+IF EXISTS (
+    SELECT 1 FROM node_segments_areas WHERE area = target_area_id AND srid = segments_srid AND NOT stale
+) THEN
+    RAISE NOTICE 'Node segments of area % are up to date', target_area_id;
+    RETURN;
+END IF;
+
+RAISE NOTICE 'Computing node segments of area %', target_area_id;
+DELETE FROM node_segments WHERE area = target_area_id;
+
+-- the area is marked fresh before the segments are computed, so changes made in the meantime mark it stale again
+INSERT INTO node_segments_areas (area, srid, refreshed_at, stale)
+VALUES (target_area_id, segments_srid, now(), FALSE)
+ON CONFLICT (area) DO UPDATE SET srid = excluded.srid, refreshed_at = excluded.refreshed_at, stale = FALSE;
+
+INSERT INTO node_segments (area, from_id, to_id, from_node, to_node, from_position, to_position, way_id, geom)
+SELECT
+    target_area_id,
+    from_id,
+    to_id,
+    from_node,
+    to_node,
+    from_position,
+    to_position,
+    way_id,
+    geom
+    FROM select_node_segments_in_area(target_area_id, segments_srid);
+
+RAISE NOTICE '% node segments stored', (SELECT count(*) FROM node_segments WHERE area = target_area_id);
+END
+$$
@@ -0,0 +1,92 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: refresh_speed_profiles
+-- Description: Aggregates the speed records of a dataset into speed_profiles, by from/to OSM node, ISO day of week
+--              and hour, in one pass over the records. Only the records inserted after the latest aggregated record
+--              (speed_records.record_id after speed_profiles_datasets.records_to_id) are added to the stored sums
+--              and merged into the stored speed sketches (speed_sketch_merge), so records loaded later with older
+--              datetimes are added as well. Should not run concurrently with an import into the dataset: records committed after the
+--              refresh with a lower record_id than an aggregated one would be skipped.
+-- Parameters:
+--      - target_dataset: dataset of the speed records
+--      - full_refresh: drop the profiles of the dataset and aggregate all its records
+-- Required tables: speed_records
+-- Affected tables: speed_profiles, speed_profiles_datasets
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE refresh_speed_profiles(IN target_dataset smallint, IN full_refresh boolean DEFAULT FALSE)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    aggregated_to_id bigint;
+    new_records_to_id bigint;
+    updated_count integer;
+BEGIN
+IF full_refresh THEN
+    RAISE NOTICE 'Dropping speed profiles of dataset %', target_dataset;
+    DELETE FROM speed_profiles_datasets WHERE dataset = target_dataset;
+END IF;
+
+aggregated_to_id := (SELECT records_to_id FROM speed_profiles_datasets WHERE dataset = target_dataset);
+new_records_to_id := (
+    SELECT max(record_id)
+    FROM speed_records
+    WHERE dataset = target_dataset AND (aggregated_to_id IS NULL OR record_id > aggregated_to_id)
+);
+
+IF new_records_to_id IS NULL THEN
+    RAISE NOTICE 'Speed profiles of dataset % are up to date', target_dataset;
+    RETURN;
+END IF;
+
+RAISE NOTICE 'Aggregating speed records of dataset % from record % to %',
+    target_dataset, aggregated_to_id, new_records_to_id;
+INSERT INTO speed_profiles_datasets (dataset, records_to_id, refreshed_at)
+VALUES (target_dataset, new_records_to_id, now())
+ON CONFLICT (dataset) DO UPDATE SET records_to_id = excluded.records_to_id, refreshed_at = excluded.refreshed_at;
+
+INSERT INTO speed_profiles (
+    dataset, from_osm_id, to_osm_id, isodow, hour,
+    record_count, speed_sum, speed_square_sum, st_dev_count, st_dev_sum, speed_sketch
+)
+SELECT
+    target_dataset,
+    from_osm_id,
+    to_osm_id,
+    isodow,
+    hour,
+    sum(record_count),
+    sum(speed_sum),
+    sum(speed_square_sum),
+    sum(st_dev_count),
+    sum(st_dev_sum),
+    string_agg(int4send(bucket) || int4send(record_count::integer), ''::bytea ORDER BY bucket)
+    FROM (
+        -- records by sketch bucket, the cell sketch is the sequence of the bucket counts
+        SELECT
+            from_osm_id,
+            to_osm_id,
+            isodow,
+            hour,
+            speed_sketch_bucket(speed) AS bucket,
+            count(*) AS record_count,
+            sum(speed::double precision) AS speed_sum,
+            sum(speed::double precision * speed::double precision) AS speed_square_sum,
+            count(st_dev) AS st_dev_count,
+            coalesce(sum(st_dev::double precision), 0) AS st_dev_sum
+            FROM speed_records
+            WHERE dataset = target_dataset
+                AND (aggregated_to_id IS NULL OR record_id > aggregated_to_id)
+                AND record_id <= new_records_to_id
+            GROUP BY from_osm_id, to_osm_id, isodow, hour, speed_sketch_bucket(speed)
+    ) AS bucket_records
+    GROUP BY from_osm_id, to_osm_id, isodow, hour
+ON CONFLICT (dataset, isodow, hour, from_osm_id, to_osm_id) DO UPDATE SET
+    record_count = speed_profiles.record_count + excluded.record_count,
+    speed_sum = speed_profiles.speed_sum + excluded.speed_sum,
+    speed_square_sum = speed_profiles.speed_square_sum + excluded.speed_square_sum,
+    st_dev_count = speed_profiles.st_dev_count + excluded.st_dev_count,
+    st_dev_sum = speed_profiles.st_dev_sum + excluded.st_dev_sum,
+    speed_sketch = speed_sketch_merge(speed_profiles.speed_sketch, excluded.speed_sketch);
+GET DIAGNOSTICS updated_count = ROW_COUNT;
+RAISE NOTICE '% speed profile cells inserted or updated', updated_count;
+END
+$$
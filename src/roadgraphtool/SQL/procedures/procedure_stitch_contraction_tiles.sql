@@ -0,0 +1,97 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: stitch_contraction_tiles
+-- Description: Last step of the tiled contraction, run after contract_graph_in_tile finished for all tiles. Creates
+--              the edges for the segments crossing tile boundaries and then contracts the tile boundary nodes that
+--              are contractible in the graph of the whole area (merge_edges_at_nodes). Finally, the run is stored
+--              in contraction_runs (store_tiled_contraction_run) and contraction_tile_segments is emptied for the
+--              area.
+-- Parameters:
+--      - target_area_id: contracted area
+--      - target_area_srid: SRID used for the length weights of the merged speeds
+--      - fill_speed: store the speeds in edges.speed
+--      - previous_max_edge_id: highest edges.id before the tiled contraction; if NULL, the run is not stored
+--      - phase_durations: durations of the previous steps in seconds by phase name, the stitch duration is added
+-- Required tables: contraction_tile_segments, edges, nodes_edges, nodes, ways
+-- Affected tables: nodes, edges, nodes_edges, contraction_tile_segments, contraction_runs
+------------------------------------------------------------------------------------------------------------------------
+-- previous_max_edge_id and phase_durations added, the old signature would remain as an overload
+DROP PROCEDURE IF EXISTS stitch_contraction_tiles(smallint, integer, boolean);
+
+CREATE OR REPLACE PROCEDURE stitch_contraction_tiles(
+    IN target_area_id smallint,
+    IN target_area_srid integer,
+    IN fill_speed boolean DEFAULT FALSE,
+    IN previous_max_edge_id integer DEFAULT NULL,
+    IN phase_durations jsonb DEFAULT '{}'
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    stitch_start timestamp with time zone := clock_timestamp();
+    boundary_edges_count integer;
+    restricted_nodes bigint[];
+    stitched_nodes bigint[];
+BEGIN
+-- edges for segments crossing tile boundaries, their nodes were restricted in all tiles
+INSERT INTO edges ("from", "to", geom, area, speed)
+SELECT
+    contraction_tile_segments.from_node,
+    contraction_tile_segments.to_node,
+    st_multi(st_makeline(from_nodes.geom, to_nodes.geom)) AS geom,
+    target_area_id AS area,
+    CASE WHEN fill_speed THEN contraction_tile_segments.speed END AS speed
+    FROM contraction_tile_segments
+        JOIN nodes from_nodes ON from_nodes.id = contraction_tile_segments.from_node AND from_nodes.contracted = FALSE
+        JOIN nodes to_nodes ON to_nodes.id = contraction_tile_segments.to_node AND to_nodes.contracted = FALSE
+        JOIN ways ON ways.id = contraction_tile_segments.way_id
+    WHERE contraction_tile_segments.area = target_area_id AND contraction_tile_segments.tile IS NULL;
+
+GET DIAGNOSTICS boundary_edges_count = ROW_COUNT;
+RAISE NOTICE '% Edges for tile boundary segments created', boundary_edges_count;
+
+-- boundary nodes contractible in the whole area: evaluated on all segments around the boundary nodes
+CREATE TEMPORARY TABLE boundary_nodes AS
+SELECT DISTINCT boundary_segment_nodes.node_id
+    FROM contraction_tile_segments
+        CROSS JOIN LATERAL (
+            VALUES (contraction_tile_segments.from_node), (contraction_tile_segments.to_node)
+        ) AS boundary_segment_nodes(node_id)
+    WHERE contraction_tile_segments.area = target_area_id AND contraction_tile_segments.tile IS NULL;
+
+CREATE TEMPORARY TABLE road_segments AS
+SELECT from_node, to_node
+    FROM contraction_tile_segments
+    WHERE contraction_tile_segments.area = target_area_id
+        AND (
+            from_node IN (SELECT node_id FROM boundary_nodes)
+            OR to_node IN (SELECT node_id FROM boundary_nodes)
+        );
+
+restricted_nodes = get_restricted_nodes();
+
+DROP TABLE road_segments;
+
+stitched_nodes = ARRAY(
+    SELECT node_id FROM boundary_nodes
+    EXCEPT
+    SELECT unnest(restricted_nodes)
+);
+
+RAISE NOTICE '% of % tile boundary nodes can be contracted',
+    cardinality(stitched_nodes), (SELECT count(*) FROM boundary_nodes);
+
+CALL merge_edges_at_nodes(target_area_id, target_area_srid, stitched_nodes, fill_speed);
+
+DROP TABLE boundary_nodes;
+
+IF previous_max_edge_id IS NOT NULL THEN
+    CALL store_tiled_contraction_run(
+        target_area_id,
+        previous_max_edge_id,
+        phase_durations || jsonb_build_object('stitch', extract(EPOCH FROM clock_timestamp() - stitch_start))
+    );
+END IF;
+
+DELETE FROM contraction_tile_segments WHERE area = target_area_id;
+END
+$$
@@ -0,0 +1,68 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: store_contraction_run
+-- Description: Stores the statistics of a finished contraction of an area in contraction_runs: the nodes and road
+--              segments before the contraction, the restricted and contracted nodes, the created edges and the
+--              histogram of the number of road segments merged into an edge.
+-- Parameters:
+--      - target_area_id: contracted area
+--      - engine: contraction engine name
+--      - restricted_nodes: nodes that were not allowed to be contracted
+--      - edge_count: number of edges created by the contraction
+--      - phase_durations: duration of the contraction phases in seconds by phase name
+-- Required tables: road_segments (temporary), contractions (temporary), contracted_edges (temporary)
+-- Affected tables: contraction_runs
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE store_contraction_run(
+    IN target_area_id smallint,
+    IN engine text,
+    IN restricted_nodes bigint[],
+    IN edge_count integer,
+    IN phase_durations jsonb
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    node_count integer;
+    contracted_edge_count integer;
+BEGIN
+node_count := (
+    SELECT count(*)
+    FROM (SELECT from_node FROM road_segments UNION SELECT to_node FROM road_segments) AS segment_nodes
+);
+contracted_edge_count := (SELECT count(*) FROM contracted_edges);
+
+INSERT INTO contraction_runs (
+    area, engine, node_count, segment_count, restricted_node_count, restricted_node_ratio, contracted_node_count,
+    edge_count, chain_length_histogram, phase_durations
+)
+SELECT
+    target_area_id,
+    engine,
+    node_count,
+    (SELECT count(*) FROM road_segments),
+    coalesce(cardinality(restricted_nodes), 0),
+    coalesce(cardinality(restricted_nodes), 0)::double precision / nullif(node_count, 0),
+    (SELECT count(DISTINCT contracted_vertex) FROM contractions),
+    edge_count,
+    (
+        SELECT coalesce(jsonb_object_agg(chain_length, chain_count), '{}'::jsonb)
+        FROM (
+            SELECT segment_count AS chain_length, count(*) AS chain_count
+            FROM (
+                SELECT count(*) + 1 AS segment_count
+                FROM contractions
+                    JOIN contracted_edges ON contracted_edges.contraction_id = contractions.id
+                GROUP BY contractions.id
+            ) AS contracted_chains
+            GROUP BY segment_count
+            UNION ALL
+            SELECT 1, edge_count - contracted_edge_count
+            WHERE edge_count > contracted_edge_count
+        ) AS chains
+    ),
+    phase_durations;
+
+RAISE NOTICE 'Contraction run stored: % nodes, % road segments, % edges', node_count,
+    (SELECT count(*) FROM road_segments), edge_count;
+END
+$$
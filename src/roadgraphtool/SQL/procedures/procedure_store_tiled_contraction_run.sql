@@ -0,0 +1,78 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: store_tiled_contraction_run
+-- Description: Stores the statistics of a finished tiled contraction of an area in contraction_runs, the counterpart
+--              of store_contraction_run. Called by stitch_contraction_tiles before contraction_tile_segments is
+--              emptied. The restricted nodes are those of the whole area (get_restricted_nodes on all its segments),
+--              not the tile boundary nodes restricted in the tiles. The edges of the run are the edges of the area
+--              with an id above previous_max_edge_id, so the histogram and the contracted nodes reflect the edges
+--              after the stitching.
+-- Parameters:
+--      - target_area_id: contracted area
+--      - previous_max_edge_id: highest edges.id before the tiled contraction
+--      - phase_durations: duration of the contraction phases in seconds by phase name
+-- Required tables: contraction_tile_segments, edges, nodes_edges
+-- Affected tables: contraction_runs
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE store_tiled_contraction_run(
+    IN target_area_id smallint,
+    IN previous_max_edge_id integer,
+    IN phase_durations jsonb
+)
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    node_count integer;
+    segment_count integer;
+    restricted_node_count integer;
+BEGIN
+CREATE TEMPORARY TABLE road_segments AS
+SELECT from_node, to_node
+    FROM contraction_tile_segments
+    WHERE area = target_area_id;
+
+node_count := (
+    SELECT count(*)
+    FROM (SELECT from_node FROM road_segments UNION SELECT to_node FROM road_segments) AS segment_nodes
+);
+segment_count := (SELECT count(*) FROM road_segments);
+restricted_node_count := coalesce(cardinality(get_restricted_nodes()), 0);
+
+DROP TABLE road_segments;
+
+INSERT INTO contraction_runs (
+    area, engine, node_count, segment_count, restricted_node_count, restricted_node_ratio, contracted_node_count,
+    edge_count, chain_length_histogram, phase_durations
+)
+SELECT
+    target_area_id,
+    'sql-tiled',
+    node_count,
+    segment_count,
+    restricted_node_count,
+    restricted_node_count::double precision / nullif(node_count, 0),
+    (
+        SELECT count(DISTINCT nodes_edges.node_id)
+        FROM edges
+            JOIN nodes_edges ON nodes_edges.edge_id = edges.id
+        WHERE edges.area = target_area_id AND edges.id > previous_max_edge_id
+    ),
+    (SELECT count(*) FROM edges WHERE edges.area = target_area_id AND edges.id > previous_max_edge_id),
+    (
+        SELECT coalesce(jsonb_object_agg(chain_length, chain_count), '{}'::jsonb)
+        FROM (
+            SELECT chain_length, count(*) AS chain_count
+            FROM (
+                SELECT count(nodes_edges.node_id) + 1 AS chain_length
+                FROM edges
+                    LEFT JOIN nodes_edges ON nodes_edges.edge_id = edges.id
+                WHERE edges.area = target_area_id AND edges.id > previous_max_edge_id
+                GROUP BY edges.id
+            ) AS edge_chains
+            GROUP BY chain_length
+        ) AS chains
+    ),
+    phase_durations;
+
+RAISE NOTICE 'Tiled contraction run stored: % nodes, % road segments', node_count, segment_count;
+END
+$$
@@ -2,10 +2,10 @@
 -- Procedure: wipe_road_network_data()
 --
 -- Truncates OSM-derived tables: nodes, ways, contracted edges, nodes_ways(_speeds),
--- tags junction rows, OSM relations, import scratch tables.
+-- tags junction rows, OSM relations, import scratch tables, stored node segments.
 --
 -- Preserves: areas, speed_datasets, speed_record_datasets, speed_records,
--- speed_records_quarterly, and the canonical tags table (empty nodes_tags / ways_tags).
+-- speed_records_quarterly, speed_profiles, and the canonical tags table (empty nodes_tags / ways_tags).
 --
 -- WARNING: Other tables may reference nodes(id) logically (e.g. demand outside strict FK).
 -- After this procedure those ids are stale unless those rows are removed or updated first.
@@ -17,6 +17,8 @@ BEGIN
     SET LOCAL statement_timeout = '0';
 
     TRUNCATE TABLE ways, nodes RESTART IDENTITY CASCADE;
+    -- no foreign keys to ways/nodes and TRUNCATE does not fire the mark_stale_node_segments triggers
+    TRUNCATE TABLE node_segments_areas CASCADE;
 
     ANALYZE areas;
     ANALYZE speed_datasets;
@@ -46,6 +46,13 @@ ALTER TABLE ONLY public.edges
     ADD CONSTRAINT edges_pk PRIMARY KEY (id);
 
 
+--
+-- Name: edges_area_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX edges_area_index ON public.edges USING btree (area);
+
+
 --
 -- Name: edges_from_index; Type: INDEX; Schema: public
 --
@@ -8,8 +8,52 @@ CREATE TABLE IF NOT EXISTS public.speed_records (
     to_osm_id bigint NOT NULL,
     speed real NOT NULL,
     st_dev real,
-    dataset smallint
-);
+    dataset smallint,
+    hour smallint GENERATED ALWAYS AS (EXTRACT(HOUR FROM datetime)::smallint) STORED,
+    isodow smallint GENERATED ALWAYS AS (EXTRACT(ISODOW FROM datetime)::smallint) STORED,
+    record_id bigint NOT NULL
+)
+PARTITION BY LIST (dataset);
+
+
+--
+-- Name: TABLE speed_records; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.speed_records IS 'Speed records partitioned by dataset and, within a dataset, by month of datetime. The partitions are created by create_speed_records_partitions, records outside of the created partitions are stored in the default partitions. Tables created before the partitioning are converted by migrate_speed_records_to_partitions';
+
+
+--
+-- Name: COLUMN speed_records.record_id; Type: COMMENT; Schema: public
+--
+
+COMMENT ON COLUMN public.speed_records.record_id IS 'Insertion order of the record, refresh_speed_profiles aggregates the records inserted after the last aggregated one, whatever their datetime';
+
+
+--
+-- Name: speed_records_record_id_seq; Type: SEQUENCE; Schema: public
+--
+
+CREATE SEQUENCE IF NOT EXISTS public.speed_records_record_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+--
+-- Name: speed_records record_id; Type: DEFAULT; Schema: public
+--
+
+ALTER TABLE public.speed_records ALTER COLUMN record_id SET DEFAULT nextval('public.speed_records_record_id_seq'::regclass);
+
+
+--
+-- Name: speed_records_default; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.speed_records_default PARTITION OF public.speed_records DEFAULT;
 
 
 --
@@ -17,3 +61,24 @@ CREATE TABLE IF NOT EXISTS public.speed_records (
 --
 
 CREATE INDEX speed_records_from_osm_id_to_osm_id_index ON public.speed_records USING btree (from_osm_id, to_osm_id);
+
+
+--
+-- Name: speed_records_datetime_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX speed_records_datetime_index ON public.speed_records USING brin (datetime);
+
+
+--
+-- Name: speed_records_isodow_hour_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX speed_records_isodow_hour_index ON public.speed_records USING btree (isodow, hour);
+
+
+--
+-- Name: speed_records_record_id_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX speed_records_record_id_index ON public.speed_records USING brin (record_id);
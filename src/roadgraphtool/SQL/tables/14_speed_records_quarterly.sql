@@ -12,5 +12,13 @@ CREATE TABLE IF NOT EXISTS public.speed_records_quarterly (
     st_dev double precision,
     speed_p50 double precision,
     speed_p85 double precision,
-    dataset smallint
+    dataset smallint,
+    speed_sketch bytea
 );
+
+
+--
+-- Name: COLUMN speed_records_quarterly.speed_sketch; Type: COMMENT; Schema: public
+--
+
+COMMENT ON COLUMN public.speed_records_quarterly.speed_sketch IS 'Quantile sketch of the speeds (see the speed_sketch_* functions), filled by roadgraphtool.speed_import';
@@ -3,6 +3,36 @@
 --
 
 CREATE TABLE IF NOT EXISTS public.nodes_edges (
-    node_id integer NOT NULL,
+    node_id bigint NOT NULL,
     edge_id integer NOT NULL
 );
+
+
+--
+-- Name: TABLE nodes_edges; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.nodes_edges IS 'Contracted nodes and the edges they were contracted into. Filled by the contraction procedures; a node in the middle of a two-way road belongs to the edges of both directions';
+
+
+--
+-- Name: nodes_edges nodes_edges_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.nodes_edges
+    ADD CONSTRAINT nodes_edges_pk PRIMARY KEY (node_id, edge_id);
+
+
+--
+-- Name: nodes_edges_edge_id_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX nodes_edges_edge_id_index ON public.nodes_edges USING btree (edge_id);
+
+
+--
+-- Name: nodes_edges nodes_edges_edges_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.nodes_edges
+    ADD CONSTRAINT nodes_edges_edges_id_fk FOREIGN KEY (edge_id) REFERENCES public.edges(id) ON DELETE CASCADE;
@@ -0,0 +1,66 @@
+--
+-- Name: area_parts; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.area_parts (
+    id integer NOT NULL,
+    area integer NOT NULL,
+    geom public.geometry NOT NULL
+);
+
+
+--
+-- Name: TABLE area_parts; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.area_parts IS 'Area geometries subdivided by ST_Subdivide into parts with a limited number of vertices. Maintained by the areas_refresh_area_parts trigger. Spatial filters by area should join this table instead of testing against the whole areas.geom';
+
+
+--
+-- Name: area_parts_id_seq; Type: SEQUENCE; Schema: public
+--
+
+CREATE SEQUENCE IF NOT EXISTS public.area_parts_id_seq
+    AS integer
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+--
+-- Name: area_parts id; Type: DEFAULT; Schema: public
+--
+
+ALTER TABLE ONLY public.area_parts ALTER COLUMN id SET DEFAULT nextval('public.area_parts_id_seq'::regclass);
+
+
+--
+-- Name: area_parts area_parts_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.area_parts
+    ADD CONSTRAINT area_parts_pk PRIMARY KEY (id);
+
+
+--
+-- Name: area_parts_area_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX area_parts_area_index ON public.area_parts USING btree (area);
+
+
+--
+-- Name: area_parts_geom_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX area_parts_geom_index ON public.area_parts USING gist (geom);
+
+
+--
+-- Name: area_parts area_parts_areas_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.area_parts
+    ADD CONSTRAINT area_parts_areas_id_fk FOREIGN KEY (area) REFERENCES public.areas(id) ON DELETE CASCADE;
@@ -0,0 +1,32 @@
+--
+-- Name: contraction_tile_segments; Type: TABLE; Schema: public
+--
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.contraction_tile_segments (
+    area smallint NOT NULL,
+    tile integer,
+    from_id bigint NOT NULL,
+    to_id bigint NOT NULL,
+    from_node bigint NOT NULL,
+    to_node bigint NOT NULL,
+    from_position smallint,
+    to_position smallint,
+    way_id bigint NOT NULL,
+    geom public.geometry NOT NULL,
+    speed double precision,
+    quality smallint
+);
+
+
+--
+-- Name: TABLE contraction_tile_segments; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.contraction_tile_segments IS 'Working table of the tiled contraction (contract_graph_in_area_tiled): road segments of the contracted area with the tile of the segment. Segments crossing a tile boundary have tile NULL. Filled by prepare_contraction_tiles and emptied by stitch_contraction_tiles';
+
+
+--
+-- Name: contraction_tile_segments_area_tile_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX contraction_tile_segments_area_tile_index ON public.contraction_tile_segments USING btree (area, tile);
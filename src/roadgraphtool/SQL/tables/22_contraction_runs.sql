@@ -0,0 +1,62 @@
+--
+-- Name: contraction_runs; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.contraction_runs (
+    id integer NOT NULL GENERATED ALWAYS AS IDENTITY,
+    area smallint NOT NULL,
+    engine text NOT NULL,
+    finished_at timestamp with time zone NOT NULL DEFAULT now(),
+    node_count integer NOT NULL,
+    segment_count integer NOT NULL,
+    restricted_node_count integer NOT NULL,
+    restricted_node_ratio double precision,
+    contracted_node_count integer NOT NULL,
+    edge_count integer NOT NULL,
+    chain_length_histogram jsonb NOT NULL,
+    phase_durations jsonb NOT NULL
+);
+
+
+--
+-- Name: TABLE contraction_runs; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.contraction_runs IS 'One row per graph contraction of an area (contract_graph_in_area, both engines) with the graph size before and after the contraction and the duration of the contraction phases';
+
+
+--
+-- Name: COLUMN contraction_runs.chain_length_histogram; Type: COMMENT; Schema: public
+--
+
+COMMENT ON COLUMN public.contraction_runs.chain_length_histogram IS 'Number of created edges by the number of road segments merged into the edge, e.g. {"1": 120, "2": 40}';
+
+
+--
+-- Name: COLUMN contraction_runs.phase_durations; Type: COMMENT; Schema: public
+--
+
+COMMENT ON COLUMN public.contraction_runs.phase_durations IS 'Duration of the contraction phases in seconds by phase name';
+
+
+--
+-- Name: contraction_runs contraction_runs_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.contraction_runs
+    ADD CONSTRAINT contraction_runs_pk PRIMARY KEY (id);
+
+
+--
+-- Name: contraction_runs_area_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX contraction_runs_area_index ON public.contraction_runs USING btree (area);
+
+
+--
+-- Name: contraction_runs contraction_runs_areas_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.contraction_runs
+    ADD CONSTRAINT contraction_runs_areas_id_fk FOREIGN KEY (area) REFERENCES public.areas(id);
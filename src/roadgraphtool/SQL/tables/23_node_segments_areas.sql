@@ -0,0 +1,33 @@
+--
+-- Name: node_segments_areas; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.node_segments_areas (
+    area smallint NOT NULL,
+    srid integer NOT NULL,
+    refreshed_at timestamp with time zone NOT NULL DEFAULT now(),
+    stale boolean NOT NULL DEFAULT FALSE
+);
+
+
+--
+-- Name: TABLE node_segments_areas; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.node_segments_areas IS 'Areas with road segments stored in node_segments. The segments of an area are recomputed by refresh_node_segments only when the area is marked stale (by the triggers on ways and nodes_ways) or when a different SRID is requested';
+
+
+--
+-- Name: node_segments_areas node_segments_areas_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.node_segments_areas
+    ADD CONSTRAINT node_segments_areas_pk PRIMARY KEY (area);
+
+
+--
+-- Name: node_segments_areas node_segments_areas_areas_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.node_segments_areas
+    ADD CONSTRAINT node_segments_areas_areas_id_fk FOREIGN KEY (area) REFERENCES public.areas(id) ON DELETE CASCADE;
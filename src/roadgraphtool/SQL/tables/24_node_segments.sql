@@ -0,0 +1,184 @@
+--
+-- Name: node_segments; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.node_segments (
+    area smallint NOT NULL,
+    from_id bigint NOT NULL,
+    to_id bigint NOT NULL,
+    from_node bigint NOT NULL,
+    to_node bigint NOT NULL,
+    from_position smallint,
+    to_position smallint,
+    way_id bigint NOT NULL,
+    geom public.geometry NOT NULL
+);
+
+
+--
+-- Name: TABLE node_segments; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.node_segments IS 'Road segments (lines between two subsequent nodes of a way) by area, as returned by select_node_segments_in_area. The geometry is projected to the SRID in node_segments_areas. Maintained by refresh_node_segments';
+
+
+--
+-- Name: node_segments node_segments_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.node_segments
+    ADD CONSTRAINT node_segments_pk PRIMARY KEY (area, from_id, to_id);
+
+
+--
+-- Name: node_segments_from_node_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX node_segments_from_node_index ON public.node_segments USING btree (from_node);
+
+
+--
+-- Name: node_segments_geom_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX node_segments_geom_index ON public.node_segments USING gist (geom);
+
+
+--
+-- Name: node_segments_to_node_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX node_segments_to_node_index ON public.node_segments USING btree (to_node);
+
+
+--
+-- Name: node_segments_way_id_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX node_segments_way_id_index ON public.node_segments USING btree (way_id);
+
+
+--
+-- Name: node_segments node_segments_node_segments_areas_area_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.node_segments
+    ADD CONSTRAINT node_segments_node_segments_areas_area_fk FOREIGN KEY (area)
+        REFERENCES public.node_segments_areas(area) ON DELETE CASCADE;
+
+
+--
+-- Name: mark_stale_node_segments(); Type: FUNCTION; Schema: public
+--
+-- Marks the areas in node_segments_areas whose segments are affected by changed ways or nodes_ways rows as stale, so
+-- that refresh_node_segments recomputes them. An area is affected if its segments contain a changed way or if a
+-- changed way intersects the area. Statement-level, the changed rows are read from the changed_rows transition table.
+-- The OSM import copies the ways and nodes_ways with one statement each, so the areas are marked once per copy.
+--
+
+CREATE OR REPLACE FUNCTION public.mark_stale_node_segments()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS
+$$
+BEGIN
+    IF TG_TABLE_NAME = 'ways' THEN
+        UPDATE node_segments_areas
+        SET stale = TRUE
+        WHERE NOT stale
+            AND (
+                EXISTS (
+                    SELECT 1
+                    FROM changed_rows
+                        JOIN node_segments
+                             ON node_segments.area = node_segments_areas.area AND node_segments.way_id = changed_rows.id
+                )
+                OR EXISTS (
+                    SELECT 1
+                    FROM changed_rows
+                        JOIN area_parts
+                             ON area_parts.area = node_segments_areas.area
+                                 AND st_intersects(area_parts.geom, changed_rows.geom)
+                )
+            );
+    ELSE
+        UPDATE node_segments_areas
+        SET stale = TRUE
+        WHERE NOT stale
+            AND EXISTS (
+                SELECT 1
+                FROM changed_rows
+                    JOIN node_segments
+                         ON node_segments.area = node_segments_areas.area AND node_segments.way_id = changed_rows.way_id
+            );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+
+--
+-- Name: ways ways_insert_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER ways_insert_mark_stale_node_segments
+    AFTER INSERT ON public.ways
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
+
+
+--
+-- Name: ways ways_update_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER ways_update_mark_stale_node_segments
+    AFTER UPDATE ON public.ways
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
+
+
+--
+-- Name: ways ways_delete_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER ways_delete_mark_stale_node_segments
+    AFTER DELETE ON public.ways
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
+
+
+--
+-- Name: nodes_ways nodes_ways_insert_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER nodes_ways_insert_mark_stale_node_segments
+    AFTER INSERT ON public.nodes_ways
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
+
+
+--
+-- Name: nodes_ways nodes_ways_update_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER nodes_ways_update_mark_stale_node_segments
+    AFTER UPDATE ON public.nodes_ways
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
+
+
+--
+-- Name: nodes_ways nodes_ways_delete_mark_stale_node_segments; Type: TRIGGER; Schema: public
+--
+
+CREATE TRIGGER nodes_ways_delete_mark_stale_node_segments
+    AFTER DELETE ON public.nodes_ways
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT
+EXECUTE FUNCTION public.mark_stale_node_segments();
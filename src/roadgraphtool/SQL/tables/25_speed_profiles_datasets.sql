@@ -0,0 +1,24 @@
+--
+-- Name: speed_profiles_datasets; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.speed_profiles_datasets (
+    dataset smallint NOT NULL,
+    records_to_id bigint NOT NULL,
+    refreshed_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+
+--
+-- Name: TABLE speed_profiles_datasets; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.speed_profiles_datasets IS 'Datasets aggregated in speed_profiles. records_to_id is the speed_records.record_id of the latest speed record aggregated, refresh_speed_profiles adds only the records inserted after it';
+
+
+--
+-- Name: speed_profiles_datasets speed_profiles_datasets_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.speed_profiles_datasets
+    ADD CONSTRAINT speed_profiles_datasets_pk PRIMARY KEY (dataset);
@@ -0,0 +1,50 @@
+--
+-- Name: speed_profiles; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.speed_profiles (
+    dataset smallint NOT NULL,
+    from_osm_id bigint NOT NULL,
+    to_osm_id bigint NOT NULL,
+    isodow smallint NOT NULL,
+    hour smallint NOT NULL,
+    record_count integer NOT NULL,
+    speed_sum double precision NOT NULL,
+    speed_square_sum double precision NOT NULL,
+    st_dev_count integer NOT NULL,
+    st_dev_sum double precision NOT NULL,
+    speed_sketch bytea,
+    speed_mean double precision GENERATED ALWAYS AS (speed_sum / record_count) STORED,
+    speed_st_dev double precision GENERATED ALWAYS AS (
+        CASE WHEN record_count > 1
+            THEN sqrt(greatest(speed_square_sum - speed_sum * speed_sum / record_count, 0) / (record_count - 1))
+        END
+    ) STORED,
+    st_dev_mean double precision GENERATED ALWAYS AS (
+        CASE WHEN st_dev_count > 0 THEN st_dev_sum / st_dev_count END
+    ) STORED
+);
+
+
+--
+-- Name: TABLE speed_profiles; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.speed_profiles IS 'Speed records aggregated by dataset, from/to OSM node, ISO day of week and hour. The sums are stored so that new records can be added incrementally (refresh_speed_profiles), the means and the standard deviation of the speed are generated from them. speed_sketch is a mergeable quantile sketch of the speeds (see the speed_sketch_* functions)';
+
+
+--
+-- Name: speed_profiles speed_profiles_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.speed_profiles
+    ADD CONSTRAINT speed_profiles_pk PRIMARY KEY (dataset, isodow, hour, from_osm_id, to_osm_id);
+
+
+--
+-- Name: speed_profiles speed_profiles_speed_profiles_datasets_dataset_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.speed_profiles
+    ADD CONSTRAINT speed_profiles_speed_profiles_datasets_dataset_fk FOREIGN KEY (dataset)
+        REFERENCES public.speed_profiles_datasets(dataset) ON DELETE CASCADE;
@@ -0,0 +1,56 @@
+--
+-- Name: nodes_ways_slot_speeds; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.nodes_ways_slot_speeds (
+    from_node_ways_id integer NOT NULL,
+    to_node_ways_id integer NOT NULL,
+    dataset smallint NOT NULL,
+    isodow smallint NOT NULL,
+    hour smallint NOT NULL,
+    speed double precision NOT NULL,
+    st_dev double precision,
+    quality smallint,
+    source_records_count integer,
+    CONSTRAINT nodes_ways_slot_speeds_isodow_check CHECK (isodow BETWEEN 0 AND 7),
+    CONSTRAINT nodes_ways_slot_speeds_hour_check CHECK (hour BETWEEN 0 AND 23)
+);
+
+
+--
+-- Name: TABLE nodes_ways_slot_speeds; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.nodes_ways_slot_speeds IS 'Speeds of road segments by time slot (ISO day of week and hour), computed by compute_speeds_for_time_slots. isodow 0 is a slot of all days of the week (hour only)';
+
+
+--
+-- Name: nodes_ways_slot_speeds nodes_ways_slot_speeds_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.nodes_ways_slot_speeds
+    ADD CONSTRAINT nodes_ways_slot_speeds_pk PRIMARY KEY (dataset, isodow, hour, from_node_ways_id, to_node_ways_id);
+
+
+--
+-- Name: nodes_ways_slot_speeds_from_node_ways_id_to_node_ways_id_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX nodes_ways_slot_speeds_from_node_ways_id_to_node_ways_id_index
+    ON public.nodes_ways_slot_speeds USING btree (from_node_ways_id, to_node_ways_id);
+
+
+--
+-- Name: nodes_ways_slot_speeds nodes_ways_slot_speeds_nodes_ways_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.nodes_ways_slot_speeds
+    ADD CONSTRAINT nodes_ways_slot_speeds_nodes_ways_id_fk FOREIGN KEY (from_node_ways_id) REFERENCES public.nodes_ways(id);
+
+
+--
+-- Name: nodes_ways_slot_speeds nodes_ways_slot_speeds_nodes_ways_id_fk2; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.nodes_ways_slot_speeds
+    ADD CONSTRAINT nodes_ways_slot_speeds_nodes_ways_id_fk2 FOREIGN KEY (to_node_ways_id) REFERENCES public.nodes_ways(id);
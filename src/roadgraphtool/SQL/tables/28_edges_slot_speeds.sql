@@ -0,0 +1,42 @@
+--
+-- Name: edges_slot_speeds; Type: TABLE; Schema: public
+--
+
+CREATE TABLE IF NOT EXISTS public.edges_slot_speeds (
+    edge_id integer NOT NULL,
+    dataset smallint NOT NULL,
+    isodow smallint NOT NULL,
+    hour smallint NOT NULL,
+    speed double precision NOT NULL,
+    covered_length_ratio double precision NOT NULL
+);
+
+
+--
+-- Name: TABLE edges_slot_speeds; Type: COMMENT; Schema: public
+--
+
+COMMENT ON TABLE public.edges_slot_speeds IS 'Speeds of the contracted edges by time slot, the length-weighted average of the slot speeds of their road segments (nodes_ways_slot_speeds). Computed by compute_edge_slot_speeds';
+
+
+--
+-- Name: edges_slot_speeds edges_slot_speeds_pk; Type: CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.edges_slot_speeds
+    ADD CONSTRAINT edges_slot_speeds_pk PRIMARY KEY (dataset, isodow, hour, edge_id);
+
+
+--
+-- Name: edges_slot_speeds_edge_id_index; Type: INDEX; Schema: public
+--
+
+CREATE INDEX edges_slot_speeds_edge_id_index ON public.edges_slot_speeds USING btree (edge_id);
+
+
+--
+-- Name: edges_slot_speeds edges_slot_speeds_edges_id_fk; Type: FK CONSTRAINT; Schema: public
+--
+
+ALTER TABLE ONLY public.edges_slot_speeds
+    ADD CONSTRAINT edges_slot_speeds_edges_id_fk FOREIGN KEY (edge_id) REFERENCES public.edges(id) ON DELETE CASCADE;
@@ -0,0 +1,93 @@
+------------------------------------------------------------------------------------------------------------------------
+-- Procedure: create_edge_segments_from_contractions_reference
+-- Description: The original create_edge_segments_from_contractions implementation (self-join of contractions on the
+--              contraction id, quadratic in the chain length). Kept only as the reference for the equivalence tests,
+--              the result is stored in contraction_segments_reference.
+------------------------------------------------------------------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE create_edge_segments_from_contractions_reference(IN fill_speed boolean DEFAULT FALSE)
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+RAISE NOTICE 'Generating contraction segments';
+IF fill_speed THEN
+CREATE TEMPORARY TABLE contraction_segments_reference AS (
+    SELECT
+        from_contraction.id,
+        from_contraction.source AS edge_from,
+        from_contraction.target AS edge_to,
+        from_contraction.contracted_vertex AS from_node,
+        to_contraction.contracted_vertex AS to_node,
+        geom,
+        speed
+    FROM
+        contractions from_contraction
+            JOIN contractions to_contraction
+                 ON from_contraction.id = to_contraction.id
+            JOIN road_segments
+                 ON road_segments.from_node = from_contraction.contracted_vertex
+                     AND road_segments.to_node = to_contraction.contracted_vertex
+    UNION
+    SELECT
+        id,
+        source AS edge_from,
+        target AS edge_to,
+        source AS from_node,
+        contracted_vertex AS to_node,
+        geom,
+        speed
+    FROM contractions
+             JOIN road_segments ON road_segments.from_node = source AND road_segments.to_node = contracted_vertex
+    UNION
+    SELECT
+        id,
+        source AS edge_from,
+        target AS edge_to,
+        contracted_vertex AS from_node,
+        target AS to_node,
+        geom,
+        speed
+    FROM contractions
+             JOIN road_segments ON road_segments.from_node = contracted_vertex AND road_segments.to_node = target
+);
+ELSE
+CREATE TEMPORARY TABLE contraction_segments_reference AS (
+    SELECT
+        from_contraction.id,
+        from_contraction.source AS edge_from,
+        from_contraction.target AS edge_to,
+        from_contraction.contracted_vertex AS from_node,
+        to_contraction.contracted_vertex AS to_node,
+        geom
+    FROM
+        contractions from_contraction
+            JOIN contractions to_contraction
+                 ON from_contraction.id = to_contraction.id
+            JOIN road_segments
+                 ON road_segments.from_node = from_contraction.contracted_vertex
+                     AND road_segments.to_node = to_contraction.contracted_vertex
+    UNION
+    SELECT
+        id,
+        source AS edge_from,
+        target AS edge_to,
+        source AS from_node,
+        contracted_vertex AS to_node,
+        geom
+    FROM contractions
+             JOIN road_segments ON road_segments.from_node = source AND road_segments.to_node = contracted_vertex
+    UNION
+    SELECT
+        id,
+        source AS edge_from,
+        target AS edge_to,
+        contracted_vertex AS from_node,
+        target AS to_node,
+        geom
+    FROM contractions
+             JOIN road_segments ON road_segments.from_node = contracted_vertex AND road_segments.to_node = target
+);
+END IF;
+
+RAISE NOTICE '% contraction segments generated', (SELECT count(*) FROM contraction_segments_reference);
+END
+$$;
\ No newline at end of file
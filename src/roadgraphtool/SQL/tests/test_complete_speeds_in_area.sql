@@ -0,0 +1,152 @@
+-- Test suite for complete_speeds_in_area procedure and select_segment_speeds_from_records function
+-- Uses the area 9999 with three two-way ways: 9997 (nodes 1 -> 2 -> 3, nodes_ways ids 1-3), 9998 (nodes 4 -> 5,
+-- nodes_ways ids 4-5) 45 from the way 9997 and 9999 (nodes 6 -> 7, nodes_ways ids 6-7) 285 from the way 9997. The
+-- speed records are of the dataset 9999; 2024-01-01 is a Monday (isodow 1)
+
+-- Renamed startup function to avoid pgtap auto-execution
+CREATE OR REPLACE FUNCTION prepare_complete_speeds_area() RETURNS VOID AS $$
+BEGIN
+    RAISE NOTICE 'execution of prepare_complete_speeds_area() started';
+
+    INSERT INTO areas (id, name, geom)
+    VALUES (9999, 'Test Area', ST_Multi(ST_GeomFromText('POLYGON((0 0, 0 80, 300 80, 300 0, 0 0))', 4326)));
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (1, ST_GeomFromText('POINT(1 1)', 4326), 9999),
+        (2, ST_GeomFromText('POINT(1 5)', 4326), 9999),
+        (3, ST_GeomFromText('POINT(5 5)', 4326), 9999),
+        (4, ST_GeomFromText('POINT(50 5)', 4326), 9999),
+        (5, ST_GeomFromText('POINT(60 5)', 4326), 9999),
+        (6, ST_GeomFromText('POINT(290 5)', 4326), 9999),
+        (7, ST_GeomFromText('POINT(295 5)', 4326), 9999);
+
+    INSERT INTO ways (id, geom, area, "from", "to", oneway)
+    VALUES
+        (9997, ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5)', 4326), 9999, 1, 3, FALSE),
+        (9998, ST_GeomFromText('LINESTRING(50 5, 60 5)', 4326), 9999, 4, 5, FALSE),
+        (9999, ST_GeomFromText('LINESTRING(290 5, 295 5)', 4326), 9999, 6, 7, FALSE);
+
+    INSERT INTO nodes_ways (way_id, node_id, position, area, id)
+    VALUES
+        (9997, 1, 1, 9999, 1), (9997, 2, 2, 9999, 2), (9997, 3, 3, 9999, 3),
+        (9998, 4, 1, 9999, 4), (9998, 5, 2, 9999, 5),
+        (9999, 6, 1, 9999, 6), (9999, 7, 2, 9999, 7);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the segment speeds from speed_records_quarterly: a record without st_dev gives the st_dev 0
+CREATE OR REPLACE FUNCTION test_select_segment_speeds_from_records_quarterly() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_complete_speeds_area();
+    RAISE NOTICE 'execution of test_select_segment_speeds_from_records_quarterly() started';
+
+    INSERT INTO speed_records_quarterly (year, quarter, hour, from_osm_id, to_osm_id, speed_mean, st_dev, dataset)
+    VALUES
+        (2024, 1, 8, 1, 2, 10, NULL, 9999),
+        (2024, 2, 8, 1, 2, 30, NULL, 9999),
+        (2024, 1, 8, 2, 3, 40, 3, 9999),
+        (2024, 1, 9, 2, 3, 70, 3, 9999);
+
+    RETURN NEXT set_eq(
+        'SELECT from_id, to_id, speed, st_dev, quality, source_records_count
+            FROM select_segment_speeds_from_records(9999::smallint, 9999::smallint, 8::smallint)',
+        'VALUES (1::bigint, 2::bigint, 20::double precision, 0::double precision, 2::smallint, 1),
+            (2::bigint, 3::bigint, 40::double precision, 3::double precision, 2::smallint, 1)',
+        'Segment speeds test: the quarters of the hour are averaged, a missing st_dev is 0'
+    );
+    RETURN NEXT is_empty(
+        'SELECT * FROM nodes_ways_speeds WHERE from_node_ways_id BETWEEN 1 AND 7',
+        'Segment speeds test: the speeds are not stored'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the segment speeds from speed_profiles: a record covers the segments of its node sequence
+CREATE OR REPLACE FUNCTION test_select_segment_speeds_from_records_profiles() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_complete_speeds_area();
+    RAISE NOTICE 'execution of test_select_segment_speeds_from_records_profiles() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES
+        ('2024-01-01 08:10', 1, 3, 30, 2, 9999),
+        ('2024-01-08 08:20', 1, 3, 50, NULL, 9999),
+        ('2024-01-02 08:10', 1, 3, 90, 2, 9999);
+
+    RETURN NEXT set_eq(
+        'SELECT from_id, to_id, speed, st_dev, quality, source_records_count
+            FROM select_segment_speeds_from_records(9999::smallint, 9999::smallint, 8::smallint, 1::smallint)',
+        'VALUES (1::bigint, 2::bigint, 40::double precision, 2::double precision, 1::smallint, 1),
+            (2::bigint, 3::bigint, 40::double precision, 2::double precision, 1::smallint, 1)',
+        'Segment speeds test: the records of the day of week and hour are matched to the segments between their nodes'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the record path: the segments with records get the record speeds, which replace the stored ones
+CREATE OR REPLACE FUNCTION test_complete_speeds_in_area_record_speeds() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_complete_speeds_area();
+    RAISE NOTICE 'execution of test_complete_speeds_in_area_record_speeds() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES ('2024-01-01 08:10', 1, 3, 30, 2, 9999), ('2024-01-01 08:40', 5, 4, 60, 4, 9999);
+    INSERT INTO nodes_ways_speeds (from_node_ways_id, to_node_ways_id, speed, st_dev, quality, source_records_count)
+    VALUES (1, 2, 99, 9, 1, 5);
+
+    CALL complete_speeds_in_area(9999::smallint, 4326, 9999::smallint, 8::smallint, 1::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT from_node_ways_id, to_node_ways_id, speed, st_dev, source_records_count FROM nodes_ways_speeds
+            WHERE quality = 1 AND from_node_ways_id BETWEEN 1 AND 7',
+        'VALUES (1, 2, 30::double precision, 2::double precision, 1),
+            (2, 3, 30::double precision, 2::double precision, 1),
+            (5, 4, 60::double precision, 4::double precision, 1)',
+        'Record path test: the speeds from the records replace the stored speeds'
+    );
+    RETURN NEXT is(
+        (SELECT count(1) FROM nodes_ways_speeds WHERE from_node_ways_id BETWEEN 1 AND 7)::integer,
+        8,
+        'Record path test: all segments of the area have a speed'
+    );
+    RETURN NEXT ok(
+        to_regclass('area_segment_speeds') IS NULL AND to_regclass('grouped_speed_records') IS NULL,
+        'Record path test: the temporary tables are dropped'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the neighborhood fallback: the segments without records get the mean of the record speeds within
+-- 10 (quality 3), within 200 (quality 4) or of all of them (quality 5)
+CREATE OR REPLACE FUNCTION test_complete_speeds_in_area_neighborhood_fallback() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_complete_speeds_area();
+    RAISE NOTICE 'execution of test_complete_speeds_in_area_neighborhood_fallback() started';
+
+    INSERT INTO speed_records_quarterly (year, quarter, hour, from_osm_id, to_osm_id, speed_mean, st_dev, dataset)
+    VALUES (2024, 1, 8, 1, 2, 20, NULL, 9999), (2024, 1, 8, 2, 3, 40, 3, 9999);
+
+    CALL complete_speeds_in_area(9999::smallint, 4326, 9999::smallint, 8::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT from_node_ways_id, to_node_ways_id, speed, st_dev, quality, source_records_count
+            FROM nodes_ways_speeds WHERE from_node_ways_id BETWEEN 1 AND 7',
+        'VALUES (1, 2, 20::double precision, 0::double precision, 2::smallint, 1),
+            (2, 3, 40::double precision, 3::double precision, 2::smallint, 1),
+            (2, 1, 30::double precision, 1.5::double precision, 3::smallint, 2),
+            (3, 2, 30::double precision, 1.5::double precision, 3::smallint, 2),
+            (4, 5, 30::double precision, 1.5::double precision, 4::smallint, 2),
+            (5, 4, 30::double precision, 1.5::double precision, 4::smallint, 2),
+            (6, 7, 30::double precision, 1.5::double precision, 5::smallint, 2),
+            (7, 6, 30::double precision, 1.5::double precision, 5::smallint, 2)',
+        'Neighborhood fallback test: the segments without records get the speeds of their neighborhood'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_select_segment_speeds_from_records_quarterly'); -- runs the quarterly speeds test
+-- SELECT * FROM mob_group_runtests('_select_segment_speeds_from_records_profiles'); -- runs the profile speeds test
+-- SELECT * FROM mob_group_runtests('_complete_speeds_in_area_record_speeds'); -- runs the record path test
+-- SELECT * FROM mob_group_runtests('_complete_speeds_in_area_neighborhood_fallback'); -- runs the fallback test
@@ -0,0 +1,137 @@
+-- Test suite for compute_edge_slot_speeds procedure
+-- Uses the area 9999 with the one-way way 9998 (nodes 1 -> 2 -> 3, nodes_ways ids 1-3) and the one-way way 9999
+-- (nodes 3 -> 4, nodes_ways ids 4-5). The edge 9998 is contracted (1 -> 3, node 2 contracted), the edge 9999 is a
+-- plain edge (3 -> 4). The two-way variant of the area has the two-way way 9999 (nodes 1 -> 2 -> 3 -> 4, nodes_ways
+-- ids 1-4) contracted into the edges 9998 (1 -> 4) and 9999 (4 -> 1), both with the nodes 2 and 3 contracted. The slot
+-- speeds are of the dataset 9999.
+
+-- Renamed startup function to avoid pgtap auto-execution
+CREATE OR REPLACE FUNCTION prepare_edge_slot_speeds_area() RETURNS VOID AS $$
+BEGIN
+    RAISE NOTICE 'execution of prepare_edge_slot_speeds_area() started';
+
+    INSERT INTO areas (id, name, geom)
+    VALUES (9999, 'Test Area', ST_Multi(ST_GeomFromText('POLYGON((0 0, 0 10, 10 10, 10 0, 0 0))', 4326)));
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (1, ST_GeomFromText('POINT(1 1)', 4326), 9999),
+        (2, ST_GeomFromText('POINT(1 5)', 4326), 9999),
+        (3, ST_GeomFromText('POINT(5 5)', 4326), 9999),
+        (4, ST_GeomFromText('POINT(9 5)', 4326), 9999);
+
+    INSERT INTO ways (id, geom, area, "from", "to", oneway)
+    VALUES
+        (9998, ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5)', 4326), 9999, 1, 3, TRUE),
+        (9999, ST_GeomFromText('LINESTRING(5 5, 9 5)', 4326), 9999, 3, 4, TRUE);
+
+    INSERT INTO nodes_ways (way_id, node_id, position, area, id)
+    VALUES (9998, 1, 1, 9999, 1), (9998, 2, 2, 9999, 2), (9998, 3, 3, 9999, 3), (9999, 3, 1, 9999, 4),
+        (9999, 4, 2, 9999, 5);
+
+    INSERT INTO edges ("from", "to", id, geom, area)
+    VALUES
+        (1, 3, 9998, ST_Multi(ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5)', 4326)), 9999),
+        (3, 4, 9999, ST_Multi(ST_GeomFromText('LINESTRING(5 5, 9 5)', 4326)), 9999);
+    INSERT INTO nodes_edges (node_id, edge_id) VALUES (2, 9998);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the edge speeds: the contracted edge gets the length-weighted average of the speeds of its two
+-- segments, the plain edge the speed of its segment, an edge with a speed of a part of its segments gets the speed of
+-- that part and its length ratio
+CREATE OR REPLACE FUNCTION test_compute_edge_slot_speeds_plain_and_contracted_edges() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_edge_slot_speeds_area();
+    RAISE NOTICE 'execution of test_compute_edge_slot_speeds_plain_and_contracted_edges() started';
+
+    INSERT INTO nodes_ways_slot_speeds (from_node_ways_id, to_node_ways_id, dataset, isodow, hour, speed)
+    VALUES
+        (1, 2, 9999, 0, 8, 30),
+        (2, 3, 9999, 0, 8, 60),
+        (4, 5, 9999, 0, 8, 40),
+        (1, 2, 9999, 0, 9, 50);
+
+    CALL compute_edge_slot_speeds(9999::smallint, 9999::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT edge_id, isodow, hour, speed, covered_length_ratio FROM edges_slot_speeds WHERE dataset = 9999',
+        'VALUES (9998, 0::smallint, 8::smallint, 45::double precision, 1::double precision),
+            (9999, 0::smallint, 8::smallint, 40::double precision, 1::double precision),
+            (9998, 0::smallint, 9::smallint, 50::double precision, 0.5::double precision)',
+        'Edge slot speeds test: the segment speeds are aggregated onto the plain and the contracted edge'
+    );
+
+    -- a re-run replaces the previous speeds
+    DELETE FROM nodes_ways_slot_speeds WHERE dataset = 9999 AND hour = 9;
+    CALL compute_edge_slot_speeds(9999::smallint, 9999::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT edge_id, hour FROM edges_slot_speeds WHERE dataset = 9999',
+        'VALUES (9998, 8::smallint), (9999, 8::smallint)',
+        'Edge slot speeds test: a re-run replaces the slot speeds of the edges'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Renamed startup function to avoid pgtap auto-execution
+CREATE OR REPLACE FUNCTION prepare_edge_slot_speeds_two_way_area() RETURNS VOID AS $$
+BEGIN
+    RAISE NOTICE 'execution of prepare_edge_slot_speeds_two_way_area() started';
+
+    INSERT INTO areas (id, name, geom)
+    VALUES (9999, 'Test Area', ST_Multi(ST_GeomFromText('POLYGON((0 0, 0 10, 10 10, 10 0, 0 0))', 4326)));
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (1, ST_GeomFromText('POINT(1 1)', 4326), 9999),
+        (2, ST_GeomFromText('POINT(1 5)', 4326), 9999),
+        (3, ST_GeomFromText('POINT(5 5)', 4326), 9999),
+        (4, ST_GeomFromText('POINT(9 5)', 4326), 9999);
+
+    INSERT INTO ways (id, geom, area, "from", "to", oneway)
+    VALUES (9999, ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5, 9 5)', 4326), 9999, 1, 4, FALSE);
+
+    INSERT INTO nodes_ways (way_id, node_id, position, area, id)
+    VALUES (9999, 1, 1, 9999, 1), (9999, 2, 2, 9999, 2), (9999, 3, 3, 9999, 3), (9999, 4, 4, 9999, 4);
+
+    INSERT INTO edges ("from", "to", id, geom, area)
+    VALUES
+        (1, 4, 9998, ST_Multi(ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5, 9 5)', 4326)), 9999),
+        (4, 1, 9999, ST_Multi(ST_GeomFromText('LINESTRING(9 5, 5 5, 1 5, 1 1)', 4326)), 9999);
+    INSERT INTO nodes_edges (node_id, edge_id) VALUES (2, 9998), (3, 9998), (2, 9999), (3, 9999);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the edges of a two-way way: each edge gets the speeds of the segments in its direction only
+CREATE OR REPLACE FUNCTION test_compute_edge_slot_speeds_two_way_edges() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_edge_slot_speeds_two_way_area();
+    RAISE NOTICE 'execution of test_compute_edge_slot_speeds_two_way_edges() started';
+
+    INSERT INTO nodes_ways_slot_speeds (from_node_ways_id, to_node_ways_id, dataset, isodow, hour, speed)
+    VALUES
+        (1, 2, 9999, 0, 8, 30),
+        (2, 3, 9999, 0, 8, 30),
+        (3, 4, 9999, 0, 8, 30),
+        (4, 3, 9999, 0, 8, 60),
+        (3, 2, 9999, 0, 8, 60),
+        (2, 1, 9999, 0, 8, 60),
+        (3, 2, 9999, 0, 9, 50);
+
+    CALL compute_edge_slot_speeds(9999::smallint, 9999::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT edge_id, isodow, hour, speed, round(covered_length_ratio::numeric, 6) FROM edges_slot_speeds
+            WHERE dataset = 9999',
+        'VALUES (9998, 0::smallint, 8::smallint, 30::double precision, 1::numeric),
+            (9999, 0::smallint, 8::smallint, 60::double precision, 1::numeric),
+            (9999, 0::smallint, 9::smallint, 50::double precision, round(1 / 3::numeric, 6))',
+        'Two-way edges test: the segments of the opposite direction are not mapped to the edge'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_compute_edge_slot_speeds_plain_and_contracted_edges'); -- runs the edges test
+-- SELECT * FROM mob_group_runtests('_compute_edge_slot_speeds_two_way_edges'); -- runs the two-way edges test
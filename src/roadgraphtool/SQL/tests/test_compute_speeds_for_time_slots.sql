@@ -0,0 +1,132 @@
+-- Test suite for compute_speeds_for_time_slots procedure and select_node_sequences function
+-- Uses the area 9999 with the two-way way 9999 through the nodes 1 -> 2 -> 3 -> 4 (nodes_ways ids 1-4) and the
+-- speed records dataset 9999; 2024-01-01 is a Monday (isodow 1)
+
+-- Renamed startup function to avoid pgtap auto-execution
+CREATE OR REPLACE FUNCTION prepare_segment_speeds_area() RETURNS VOID AS $$
+BEGIN
+    RAISE NOTICE 'execution of prepare_segment_speeds_area() started';
+
+    INSERT INTO areas (id, name, geom)
+    VALUES (9999, 'Test Area', ST_Multi(ST_GeomFromText('POLYGON((0 0, 0 10, 10 10, 10 0, 0 0))', 4326)));
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (1, ST_GeomFromText('POINT(1 1)', 4326), 9999),
+        (2, ST_GeomFromText('POINT(1 5)', 4326), 9999),
+        (3, ST_GeomFromText('POINT(5 5)', 4326), 9999),
+        (4, ST_GeomFromText('POINT(9 5)', 4326), 9999);
+
+    INSERT INTO ways (id, geom, area, "from", "to", oneway)
+    VALUES (9999, ST_GeomFromText('LINESTRING(1 1, 1 5, 5 5, 9 5)', 4326), 9999, 1, 4, FALSE);
+
+    INSERT INTO nodes_ways (way_id, node_id, position, area, id)
+    VALUES (9999, 1, 1, 9999, 1), (9999, 2, 2, 9999, 2), (9999, 3, 3, 9999, 3), (9999, 4, 4, 9999, 4);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the node sequences: a pair of nodes is matched to the segments between them in the direction of
+-- the record, pairs not connected in that direction by one way are not matched
+CREATE OR REPLACE FUNCTION test_select_node_sequences_segments_between_nodes() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_segment_speeds_area();
+    RAISE NOTICE 'execution of test_select_node_sequences_segments_between_nodes() started';
+
+    CALL refresh_node_segments(9999::smallint);
+    CREATE TEMPORARY TABLE grouped_speed_records (from_osm_id bigint, to_osm_id bigint);
+    INSERT INTO grouped_speed_records VALUES (1, 3), (1, 3), (4, 3), (2, 2), (1, 5);
+
+    RETURN NEXT set_eq(
+        'SELECT from_osm_id, to_osm_id, from_id, to_id FROM select_node_sequences(9999::smallint)',
+        'VALUES (1::bigint, 3::bigint, 1::bigint, 2::bigint), (1::bigint, 3::bigint, 2::bigint, 3::bigint),
+            (4::bigint, 3::bigint, 4::bigint, 3::bigint)',
+        'Node sequences test: the segments of the sequences between the record nodes are selected'
+    );
+
+    DROP TABLE grouped_speed_records;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the hour-only slots computed from speed_records_quarterly
+CREATE OR REPLACE FUNCTION test_compute_speeds_for_time_slots_quarterly() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_segment_speeds_area();
+    RAISE NOTICE 'execution of test_compute_speeds_for_time_slots_quarterly() started';
+
+    INSERT INTO speed_records_quarterly (year, quarter, hour, from_osm_id, to_osm_id, speed_mean, st_dev, dataset)
+    VALUES
+        (2024, 1, 8, 1, 3, 30, 2, 9999),
+        (2024, 1, 8, 4, 3, 10, 1, 9999),
+        (2024, 1, 9, 1, 2, 50, 4, 9999),
+        (2024, 1, 10, 1, 2, 70, 4, 9999);
+
+    CALL compute_speeds_for_time_slots(9999::smallint, 9999::smallint, ARRAY[8, 9]::smallint[]);
+
+    RETURN NEXT set_eq(
+        'SELECT from_node_ways_id, to_node_ways_id, isodow, hour, speed, st_dev, quality, source_records_count
+            FROM nodes_ways_slot_speeds WHERE dataset = 9999',
+        'VALUES (1, 2, 0::smallint, 8::smallint, 30::double precision, 2::double precision, 2::smallint, 1),
+            (2, 3, 0::smallint, 8::smallint, 30::double precision, 2::double precision, 2::smallint, 1),
+            (4, 3, 0::smallint, 8::smallint, 10::double precision, 1::double precision, 2::smallint, 1),
+            (1, 2, 0::smallint, 9::smallint, 50::double precision, 4::double precision, 2::smallint, 1)',
+        'Quarterly slots test: the requested hours are computed as slots of all days of the week'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the day of week slots computed from speed_profiles
+CREATE OR REPLACE FUNCTION test_compute_speeds_for_time_slots_profiles() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_segment_speeds_area();
+    RAISE NOTICE 'execution of test_compute_speeds_for_time_slots_profiles() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES
+        ('2024-01-01 08:10', 1, 3, 20, 1, 9999),
+        ('2024-01-08 08:40', 1, 3, 40, 3, 9999),
+        ('2024-01-02 08:10', 3, 4, 60, 1, 9999);
+
+    CALL compute_speeds_for_time_slots(
+        9999::smallint, 9999::smallint, ARRAY[8]::smallint[], ARRAY[1, 2]::smallint[]
+    );
+
+    RETURN NEXT set_eq(
+        'SELECT from_node_ways_id, to_node_ways_id, isodow, hour, speed, st_dev, quality
+            FROM nodes_ways_slot_speeds WHERE dataset = 9999',
+        'VALUES (1, 2, 1::smallint, 8::smallint, 30::double precision, 2::double precision, 1::smallint),
+            (2, 3, 1::smallint, 8::smallint, 30::double precision, 2::double precision, 1::smallint),
+            (3, 4, 2::smallint, 8::smallint, 60::double precision, 1::double precision, 1::smallint)',
+        'Profile slots test: the slots are computed by day of week and hour'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for a re-run: the stored speeds of the requested slots are replaced, other slots are kept
+CREATE OR REPLACE FUNCTION test_compute_speeds_for_time_slots_rerun_replaces_slots() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_segment_speeds_area();
+    RAISE NOTICE 'execution of test_compute_speeds_for_time_slots_rerun_replaces_slots() started';
+
+    INSERT INTO speed_records_quarterly (year, quarter, hour, from_osm_id, to_osm_id, speed_mean, st_dev, dataset)
+    VALUES (2024, 1, 8, 1, 3, 30, 2, 9999), (2024, 1, 9, 1, 2, 50, 4, 9999);
+    CALL compute_speeds_for_time_slots(9999::smallint, 9999::smallint, ARRAY[8, 9]::smallint[]);
+
+    -- new records of hour 8: 1 -> 2 changes, 2 -> 3 has no records any more
+    DELETE FROM speed_records_quarterly WHERE dataset = 9999 AND hour = 8;
+    INSERT INTO speed_records_quarterly (year, quarter, hour, from_osm_id, to_osm_id, speed_mean, st_dev, dataset)
+    VALUES (2024, 1, 8, 1, 2, 40, 3, 9999);
+    CALL compute_speeds_for_time_slots(9999::smallint, 9999::smallint, ARRAY[8]::smallint[]);
+
+    RETURN NEXT set_eq(
+        'SELECT from_node_ways_id, to_node_ways_id, hour, speed FROM nodes_ways_slot_speeds WHERE dataset = 9999',
+        'VALUES (1, 2, 8::smallint, 40::double precision), (1, 2, 9::smallint, 50::double precision)',
+        'Re-run test: the slots of the re-run are replaced, the other slots are kept'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_select_node_sequences_segments_between_nodes'); -- runs the node sequences test
+-- SELECT * FROM mob_group_runtests('_compute_speeds_for_time_slots_quarterly'); -- runs the quarterly slots test
+-- SELECT * FROM mob_group_runtests('_compute_speeds_for_time_slots_profiles'); -- runs the profile slots test
+-- SELECT * FROM mob_group_runtests('_compute_speeds_for_time_slots_rerun_replaces_slots'); -- runs the re-run test
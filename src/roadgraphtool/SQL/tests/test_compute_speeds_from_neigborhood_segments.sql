@@ -4,6 +4,7 @@
 -- 2. **Invalid data**. Given input is valid, but some data are missing from used tables (`areas`, `nodes`, `nodes_ways`) -> no new entries to target table. Basically check that no errors are raised.
 -- 3. **Standard case**. All values present both in args and tables -> check that average is as expected by every quality in range[3,5].
 -- 4. **Standard case**. Second execution of the procedure with the same args does not lead to creation of duplicates.
+-- 5. **Standard case**. Execution after a new way is added assigns speed only to the new segments, from the segments with speeds computed from speed records.
 -- Table dependency tree:
 -- `areas` <- `ways` <- `nodes` <- `nodes_ways` <- `nodes_ways_speeds`.
 
@@ -161,3 +162,39 @@ CREATE OR REPLACE FUNCTION test_compute_speeds_from_neighborhood_segments_4() RE
 	RETURN NEXT set_eq('SELECT * FROM expected_results_for_test_3_and_4', 'SELECT from_node_ways_id, speed, st_dev, to_node_ways_id, quality, source_records_count FROM nodes_ways_speeds WHERE quality IN (3,4,5)', 'Test 4 results unchanged after second call');
 	END;
 $$ LANGUAGE plpgsql;
+
+
+-- 5th case: Standard case. A new way is added after the first execution: only its segments are assigned, and only the
+-- speeds computed from speed records (quality <= 2) are used, not the speeds assigned by the first execution
+CREATE OR REPLACE FUNCTION test_compute_speeds_from_neighborhood_segments_5_new_way() RETURNS SETOF TEXT AS $$
+	BEGIN
+    PERFORM prepare_neighborhood_segments_base_data();
+		RAISE NOTICE '--- test_compute_speeds_from_neighborhood_segments_5_new_way ---';
+    PERFORM prepare_expected_results_for_test_3_and_4();
+
+	CALL compute_speeds_from_neighborhood_segments(1::smallint, 4326::integer);
+
+	-- the segment 13 -> 14 is 195 from the segment 11 -> 12 of way 6 and more than 200 from the other segments with
+	-- speed, the segment 12 -> 13 of way 8 with the quality 5 speed touches it
+	INSERT INTO nodes (id, geom, area) VALUES (14, ST_GeomFromText('POINT(100 -200)', 4326), 1);
+	INSERT INTO ways (id, geom, area, "from", "to", oneway) VALUES
+		(9, ST_GeomFromText('LINESTRING(100 -250, 100 -200)', 4326), 1, 13, 14, false);
+	INSERT INTO nodes_ways (way_id, node_id, position, area, id) VALUES (9, 13, 1, 1, 19), (9, 14, 2, 1, 20);
+	INSERT INTO expected_results_for_test_3_and_4 VALUES (19, 50, 1, 20, 4, 1), (20, 50, 1, 19, 4, 1);
+
+	CALL compute_speeds_from_neighborhood_segments(1::smallint, 4326::integer);
+	RETURN NEXT set_eq(
+		'SELECT * FROM expected_results_for_test_3_and_4',
+		'SELECT from_node_ways_id, speed, st_dev, to_node_ways_id, quality, source_records_count FROM nodes_ways_speeds WHERE quality IN (3,4,5)',
+		'Test 5 only the segments of the new way are assigned'
+	);
+	RETURN NEXT ok(
+		to_regclass('unassigned_node_segments') IS NULL AND to_regclass('speed_segment_data') IS NULL,
+		'Test 5 the temporary tables are dropped'
+	);
+	END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_compute_speeds_from_neighborhood_segments_3'); -- runs the standard case test
+-- SELECT * FROM mob_group_runtests('_compute_speeds_from_neighborhood_segments_5_new_way'); -- runs the new way test
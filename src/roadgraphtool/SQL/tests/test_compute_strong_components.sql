@@ -0,0 +1,126 @@
+-- Test suite for compute_strong_components procedure
+-- The two-way road 1 <-> 2 <-> 3 lies in the test area, the two-way edge 3 <-> 4 generated for the area leaves it.
+
+-- Renamed startup function to avoid pgtap auto-execution
+CREATE OR REPLACE FUNCTION prepare_strong_components_area() RETURNS VOID AS $$
+BEGIN
+    RAISE NOTICE 'execution of prepare_strong_components_area() started';
+
+    -- test area around [0,0] and an area with the same geometry without generated edges
+    INSERT INTO areas (id, name, geom)
+    VALUES
+        (9999, 'Test Area', ST_Multi(ST_Buffer(ST_SetSRID(ST_MakePoint(0, 0), 4326), 0.001))),
+        (9998, 'Test Area without edges', ST_Multi(ST_Buffer(ST_SetSRID(ST_MakePoint(0, 0), 4326), 0.001)));
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (1, ST_SetSRID(ST_MakePoint(0, 0), 4326), 9999),
+        (2, ST_SetSRID(ST_MakePoint(0.0001, 0), 4326), 9999),
+        (3, ST_SetSRID(ST_MakePoint(0.0002, 0), 4326), 9999),
+        (4, ST_SetSRID(ST_MakePoint(1, 0), 4326), 9999);
+
+    INSERT INTO edges ("from", "to", geom, area)
+    SELECT from_node, to_node, ST_Multi(ST_MakeLine(from_nodes.geom, to_nodes.geom)), 9999
+    FROM (VALUES (1, 2), (2, 1), (2, 3), (3, 2), (3, 4), (4, 3)) AS test_edges(from_node, to_node)
+        JOIN nodes AS from_nodes ON from_nodes.id = test_edges.from_node
+        JOIN nodes AS to_nodes ON to_nodes.id = test_edges.to_node;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the selection by edges.area: the edge leaving the area geometry is included
+CREATE OR REPLACE FUNCTION test_compute_strong_components_area_selection() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_strong_components_area();
+    RAISE NOTICE 'execution of test_compute_strong_components_area_selection() started';
+
+    CALL compute_strong_components(9999::smallint, 'area');
+
+    RETURN NEXT results_eq(
+        'SELECT component_id, node_id FROM component_data WHERE area = 9999 ORDER BY node_id',
+        'VALUES (0::smallint, 1::bigint), (0::smallint, 2::bigint), (0::smallint, 3::bigint), (0::smallint, 4::bigint)',
+        'Area selection test: all edges generated for the area form one component'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the selection by edges.area with edges without an area: the two-way edge 3 <-> 5 within the area
+-- geometry is included, the two-way edge 4 <-> 6 outside of it is not
+CREATE OR REPLACE FUNCTION test_compute_strong_components_area_selection_edges_without_area() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_strong_components_area();
+    RAISE NOTICE 'execution of test_compute_strong_components_area_selection_edges_without_area() started';
+
+    INSERT INTO nodes (id, geom, area)
+    VALUES
+        (5, ST_SetSRID(ST_MakePoint(0.0003, 0), 4326), 9999),
+        (6, ST_SetSRID(ST_MakePoint(2, 0), 4326), 9999);
+
+    INSERT INTO edges ("from", "to", geom, area)
+    SELECT from_node, to_node, ST_Multi(ST_MakeLine(from_nodes.geom, to_nodes.geom)), NULL
+    FROM (VALUES (3, 5), (5, 3), (4, 6), (6, 4)) AS test_edges(from_node, to_node)
+        JOIN nodes AS from_nodes ON from_nodes.id = test_edges.from_node
+        JOIN nodes AS to_nodes ON to_nodes.id = test_edges.to_node;
+
+    CALL compute_strong_components(9999::smallint, 'area');
+
+    RETURN NEXT results_eq(
+        'SELECT component_id, node_id FROM component_data WHERE area = 9999 ORDER BY node_id',
+        'VALUES (0::smallint, 1::bigint), (0::smallint, 2::bigint), (0::smallint, 3::bigint), (0::smallint, 4::bigint),
+            (0::smallint, 5::bigint)',
+        'Area selection with edges without area test: the edges without area are selected by geometry'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the selection by geometry: the edge leaving the area geometry is excluded
+CREATE OR REPLACE FUNCTION test_compute_strong_components_geometry_selection() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_strong_components_area();
+    RAISE NOTICE 'execution of test_compute_strong_components_geometry_selection() started';
+
+    CALL compute_strong_components(9999::smallint, 'geometry');
+
+    RETURN NEXT results_eq(
+        'SELECT component_id, node_id FROM component_data WHERE area = 9999 ORDER BY node_id',
+        'VALUES (0::smallint, 1::bigint), (0::smallint, 2::bigint), (0::smallint, 3::bigint)',
+        'Geometry selection test: only the edges within the area form the component'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the fallback: no edges were generated for area 9998, so they are selected by its geometry
+CREATE OR REPLACE FUNCTION test_compute_strong_components_area_selection_fallback() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_strong_components_area();
+    RAISE NOTICE 'execution of test_compute_strong_components_area_selection_fallback() started';
+
+    CALL compute_strong_components(9998::smallint, 'area');
+
+    RETURN NEXT results_eq(
+        'SELECT component_id, node_id FROM component_data WHERE area = 9998 ORDER BY node_id',
+        'VALUES (0::smallint, 1::bigint), (0::smallint, 2::bigint), (0::smallint, 3::bigint)',
+        'Area selection fallback test: the edges within the area geometry form the component'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for an unsupported edge selection
+CREATE OR REPLACE FUNCTION test_compute_strong_components_unsupported_selection() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_strong_components_area();
+    RAISE NOTICE 'execution of test_compute_strong_components_unsupported_selection() started';
+
+    RETURN NEXT throws_ok(
+        'CALL compute_strong_components(9999::smallint, ''tiles'')',
+        'Unsupported edge selection tiles, expected geometry or area',
+        'Unsupported selection test: the procedure raises an exception'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_compute_strong_components_area_selection$'); -- runs the area selection test
+-- SELECT * FROM mob_group_runtests('_compute_strong_components_area_selection_edges_without_area'); -- runs the edges without area test
+-- SELECT * FROM mob_group_runtests('_compute_strong_components_geometry_selection'); -- runs the geometry selection test
+-- SELECT * FROM mob_group_runtests('_compute_strong_components_area_selection_fallback'); -- runs the fallback test
+-- SELECT * FROM mob_group_runtests('_compute_strong_components_unsupported_selection'); -- runs the exception test
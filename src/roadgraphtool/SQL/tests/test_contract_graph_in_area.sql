@@ -143,10 +143,143 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Test function for the nodes_edges mapping: node 2 is contracted into the edges of both directions
+CREATE OR REPLACE FUNCTION test_contract_graph_in_area_nodes_edges_mapping() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_contract_graph_in_area_nodes_edges_mapping() started';
+
+    -- Setup test data
+    PERFORM load_graphml_to_nodes_edges('single_bidirectional_contraction');
+
+    -- Perform contraction
+    CALL contract_graph_in_area(9999::smallint, 4326);
+
+    -- Validate results
+    RETURN NEXT set_eq(
+        'SELECT nodes_edges.node_id, edges."from", edges."to"
+            FROM nodes_edges JOIN edges ON edges.id = nodes_edges.edge_id
+            WHERE edges.area = 9999',
+        'VALUES (2::bigint, 1::bigint, 3::bigint), (2::bigint, 3::bigint, 1::bigint)',
+        'Nodes edges mapping test: the contracted node is mapped to the edges of both directions'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the contraction statistics: 3 nodes and 4 road segments, node 2 is contracted into two edges
+-- of two road segments each
+CREATE OR REPLACE FUNCTION test_contract_graph_in_area_contraction_run() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_contract_graph_in_area_contraction_run() started';
+
+    -- Setup test data
+    PERFORM load_graphml_to_nodes_edges('single_bidirectional_contraction');
+    DELETE FROM contraction_runs WHERE area = 9999;
+
+    -- Perform contraction
+    CALL contract_graph_in_area(9999::smallint, 4326);
+
+    -- Validate results
+    RETURN NEXT results_eq(
+        'SELECT engine, node_count, segment_count, restricted_node_count, contracted_node_count, edge_count,
+                chain_length_histogram
+            FROM contraction_runs WHERE area = 9999',
+        'VALUES (''sql'', 3, 4, 2, 1, 2, ''{"2": 2}''::jsonb)',
+        'Contraction run test: the statistics of the contraction are stored'
+    );
+    RETURN NEXT ok(
+        (SELECT phase_durations ?& ARRAY['road_segments', 'restricted_nodes', 'contraction']
+            FROM contraction_runs WHERE area = 9999),
+        'Contraction run test: the phase durations are stored'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test function for the tiled contraction: the chain 1 -> 2 -> 3 crosses a tile boundary between nodes 2 and 3, so
+-- node 2 is restricted in its tile and contracted by the stitching
+CREATE OR REPLACE FUNCTION test_contract_graph_in_area_tiled_chain_across_tiles() RETURNS SETOF TEXT AS $$
+DECLARE
+    expected_contracted_nodes bigint[] := ARRAY[2]; -- node 2 should be contracted
+    tile_id integer;
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_contract_graph_in_area_tiled_chain_across_tiles() started';
+
+    -- Setup test data, nodes are moved apart so that node 3 falls into another tile
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    UPDATE nodes SET geom = ST_SetSRID(ST_MakePoint(id * 0.0001, 0), 4326) WHERE area = 9999;
+
+    -- Perform contraction, the steps run in separate sessions in contract_graph_in_area_tiled
+    CALL prepare_contraction_tiles(9999::smallint, 4326, 0.00015);
+    FOR tile_id IN SELECT DISTINCT tile FROM contraction_tile_segments WHERE area = 9999 AND tile IS NOT NULL LOOP
+        CALL contract_graph_in_tile(9999::smallint, tile_id);
+        DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+    END LOOP;
+    CALL stitch_contraction_tiles(9999::smallint, 4326);
+
+    -- Validate results
+    RETURN QUERY SELECT * FROM validate_contracted_nodes(expected_contracted_nodes, 'Tiled chain across tiles test');
+    RETURN NEXT results_eq(
+        'SELECT "from", "to" FROM edges WHERE area = 9999',
+        'VALUES (1::bigint, 3::bigint)',
+        'Tiled chain across tiles test: the chain is stitched into a single edge'
+    );
+    RETURN NEXT is_empty(
+        'SELECT * FROM contraction_tile_segments WHERE area = 9999',
+        'Tiled chain across tiles test: the tile segments are removed'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- the tiled contraction of the chain 1 -> 2 -> 3 split between two tiles is stored like an untiled run
+CREATE OR REPLACE FUNCTION test_contract_graph_in_area_tiled_contraction_run() RETURNS SETOF TEXT AS $$
+DECLARE
+    previous_max_edge_id integer;
+    tile_id integer;
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_contract_graph_in_area_tiled_contraction_run() started';
+
+    -- Setup test data, nodes are moved apart so that node 3 falls into another tile
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    UPDATE nodes SET geom = ST_SetSRID(ST_MakePoint(id * 0.0001, 0), 4326) WHERE area = 9999;
+    DELETE FROM contraction_runs WHERE area = 9999;
+    previous_max_edge_id := (SELECT coalesce(max(id), 0) FROM edges);
+
+    -- Perform contraction
+    CALL prepare_contraction_tiles(9999::smallint, 4326, 0.00015);
+    FOR tile_id IN SELECT DISTINCT tile FROM contraction_tile_segments WHERE area = 9999 AND tile IS NOT NULL LOOP
+        CALL contract_graph_in_tile(9999::smallint, tile_id);
+        DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+    END LOOP;
+    CALL stitch_contraction_tiles(
+        9999::smallint, 4326, FALSE, previous_max_edge_id, '{"prepare": 1.0, "tiles": 2.0}'::jsonb
+    );
+
+    -- Validate results
+    RETURN NEXT results_eq(
+        'SELECT engine, node_count, segment_count, restricted_node_count, contracted_node_count, edge_count,
+                chain_length_histogram
+            FROM contraction_runs WHERE area = 9999',
+        'VALUES (''sql-tiled'', 3, 2, 2, 1, 1, ''{"2": 1}''::jsonb)',
+        'Tiled contraction run test: the statistics of the contraction are stored'
+    );
+    RETURN NEXT ok(
+        (SELECT phase_durations ?& ARRAY['prepare', 'tiles', 'stitch'] FROM contraction_runs WHERE area = 9999),
+        'Tiled contraction run test: the phase durations are stored'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
 -- Example of running tests:
 -- SELECT * FROM mob_group_runtests('_contract_graph_in_area$'); -- runs only startup
 -- SELECT * FROM mob_group_runtests('_contract_graph_in_area_three_node_chain'); -- runs the first test
 -- SELECT * FROM mob_group_runtests('_contract_graph_in_area_no_contraction'); -- runs the second test
 -- SELECT * FROM mob_group_runtests('_contract_graph_in_area_test_3'); -- runs the third test
 -- SELECT * FROM mob_group_runtests('_contract_graph_in_area_single_bidirectional_contraction'); -- runs the fourth test
--- SELECT * FROM mob_group_runtests('_contract_graph_in_area_single_bidirectional_and_parallel'); -- runs the fifth test 
\ No newline at end of file
+-- SELECT * FROM mob_group_runtests('_contract_graph_in_area_single_bidirectional_and_parallel'); -- runs the fifth test 
+-- SELECT * FROM mob_group_runtests('_contract_graph_in_area_tiled_chain_across_tiles'); -- runs the tiled contraction test
+-- SELECT * FROM mob_group_runtests('_contract_graph_in_area_tiled_contraction_run'); -- runs the tiled contraction run test
+-- SELECT * FROM mob_group_runtests('_contract_graph_in_area_nodes_edges_mapping'); -- runs the nodes_edges test
+-- SELECT * FROM mob_group_runtests('_contract_graph_in_area_contraction_run'); -- runs the contraction statistics test
@@ -110,4 +110,164 @@ BEGIN
     );
 
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Contracts the current road_segments table and compares create_edge_segments_from_contractions with the original
+-- implementation (create_edge_segments_from_contractions_reference).
+CREATE OR REPLACE FUNCTION validate_contraction_segments_match_reference(test_name text) RETURNS SETOF TEXT AS $$
+BEGIN
+    DROP TABLE IF EXISTS contractions, contraction_segments, contraction_segments_reference;
+    CALL compute_contractions(get_restricted_nodes());
+    CALL create_edge_segments_from_contractions(FALSE);
+    CALL create_edge_segments_from_contractions_reference(FALSE);
+
+    RETURN NEXT set_eq(
+        'SELECT id, edge_from, edge_to, from_node, to_node FROM contraction_segments',
+        'SELECT id, edge_from, edge_to, from_node, to_node FROM contraction_segments_reference',
+        test_name || ': contraction segments match the reference'
+    );
+    RETURN NEXT is(
+        (SELECT count(*) FROM contraction_segments),
+        (SELECT count(*) FROM contraction_segments_reference),
+        test_name || ': no duplicate contraction segments'
+    );
+
+    DROP TABLE contractions, contraction_segments, contraction_segments_reference;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION _create_reference_test_road_segments()
+    RETURNS VOID
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    DROP TABLE IF EXISTS road_segments;
+    CREATE TEMP TABLE road_segments (
+        from_node bigint NOT NULL,
+        to_node bigint NOT NULL,
+        geom geometry(LineString, 4326)
+    ) ON COMMIT DROP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test_create_edge_segments_from_contractions_matches_reference_on_test_graphs()
+    RETURNS SETOF TEXT AS
+$$
+DECLARE
+    graph_name text;
+BEGIN
+    FOR graph_name IN SELECT name FROM test_graphs ORDER BY name LOOP
+        PERFORM _create_reference_test_road_segments();
+        PERFORM load_graphml_to_road_segments(graph_name);
+        RETURN QUERY SELECT * FROM validate_contraction_segments_match_reference(graph_name);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_create_edge_segments_from_contractions_matches_reference_on_long_chains()
+    RETURNS SETOF TEXT AS
+$$
+BEGIN
+    PERFORM _create_reference_test_road_segments();
+
+    -- one-way chain with node ids not ordered along the direction of travel
+    INSERT INTO road_segments (from_node, to_node)
+    VALUES (1001, 1019), (1019, 1005), (1005, 1012), (1012, 1002), (1002, 1020);
+
+    -- two-way chain 3001 <-> 2001 <-> ... <-> 2020 <-> 3002, 3001 and 3002 are connected by a one-way segment
+    INSERT INTO road_segments (from_node, to_node)
+    SELECT i, i + 1 FROM generate_series(2001, 2019) AS i
+    UNION ALL
+    SELECT i + 1, i FROM generate_series(2001, 2019) AS i
+    UNION ALL
+    VALUES (2001, 3001), (3001, 2001), (2020, 3002), (3002, 2020), (3001, 3002);
+
+    RETURN QUERY SELECT * FROM validate_contraction_segments_match_reference('Long chains');
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Contracts the current road_segments table and checks that the segments of every contraction form a single chain
+-- from the source to the target, made of the reference segments. Used where the reference differs: it also returns
+-- the segments of the opposite direction between the contracted vertices of two-way chains and loops.
+CREATE OR REPLACE FUNCTION validate_contraction_segments_are_chains(test_name text) RETURNS SETOF TEXT AS $$
+BEGIN
+    DROP TABLE IF EXISTS contractions, contraction_segments, contraction_segments_reference;
+    CALL compute_contractions(get_restricted_nodes());
+    CALL create_edge_segments_from_contractions(FALSE);
+    CALL create_edge_segments_from_contractions_reference(FALSE);
+
+    RETURN NEXT is_empty(
+        'SELECT id, edge_from, edge_to, from_node, to_node FROM contraction_segments
+        EXCEPT
+        SELECT id, edge_from, edge_to, from_node, to_node FROM contraction_segments_reference',
+        test_name || ': contraction segments are reference segments'
+    );
+    RETURN NEXT set_eq(
+        'SELECT id, count(*) FROM contraction_segments GROUP BY id',
+        'SELECT id, count(*) + 1 FROM contractions GROUP BY id',
+        test_name || ': every contraction has one segment more than contracted vertices'
+    );
+    RETURN NEXT is_empty(
+        'SELECT id, from_node FROM contraction_segments GROUP BY id, from_node HAVING count(*) > 1',
+        test_name || ': no vertex is left twice within a contraction'
+    );
+
+    DROP TABLE contractions, contraction_segments, contraction_segments_reference;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_create_edge_segments_from_contractions_two_way_loop() RETURNS SETOF TEXT AS
+$$
+BEGIN
+    PERFORM _create_reference_test_road_segments();
+    DROP TABLE IF EXISTS contractions;
+    CREATE TEMP TABLE contractions (
+        id integer,
+        source bigint,
+        target bigint,
+        contracted_vertex bigint
+    ) ON COMMIT DROP;
+
+    -- two-way loop 10 <-> 11 <-> 12 <-> 10 contracted into one edge from 10 to 10, both neighbours of 10 are
+    -- contracted, so the chain can be walked both ways from 10
+    INSERT INTO contractions (id, source, target, contracted_vertex) VALUES (200, 10, 10, 11), (200, 10, 10, 12);
+    INSERT INTO road_segments (from_node, to_node)
+    VALUES (10, 11), (11, 10), (11, 12), (12, 11), (12, 10), (10, 12);
+
+    RAISE NOTICE '--- test_create_edge_segments_from_contractions_two_way_loop ---';
+    CALL create_edge_segments_from_contractions(FALSE);
+
+    RETURN NEXT set_eq(
+        'SELECT id, edge_from, edge_to, from_node, to_node FROM contraction_segments',
+        'VALUES (200, 10::bigint, 10::bigint, 10::bigint, 11::bigint),
+            (200, 10::bigint, 10::bigint, 11::bigint, 12::bigint),
+            (200, 10::bigint, 10::bigint, 12::bigint, 10::bigint)',
+        'Two-way loop: a single walk around the loop'
+    );
+
+    DROP TABLE contraction_segments;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_create_edge_segments_from_contractions_chains_on_loops() RETURNS SETOF TEXT AS
+$$
+BEGIN
+    PERFORM _create_reference_test_road_segments();
+
+    -- two-way loop 4002 <-> 4003 <-> 4004 <-> 4002 attached to 4001 <-> 4002, and a one-way loop
+    -- 5002 -> 5003 -> 5004 -> 5002 attached to 5001 <-> 5002
+    INSERT INTO road_segments (from_node, to_node)
+    VALUES
+        (4001, 4002), (4002, 4001), (4002, 4003), (4003, 4002), (4003, 4004), (4004, 4003), (4004, 4002), (4002, 4004),
+        (5001, 5002), (5002, 5001), (5002, 5003), (5003, 5004), (5004, 5002);
+
+    RETURN QUERY SELECT * FROM validate_contraction_segments_are_chains('Loops');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_create_edge_segments_from_contractions_basic');
+-- SELECT * FROM mob_group_runtests('_create_edge_segments_from_contractions_matches_reference'); -- compares with the original implementation
+-- SELECT * FROM mob_group_runtests('_create_edge_segments_from_contractions_two_way_loop'); -- walks a loop once
+-- SELECT * FROM mob_group_runtests('_create_edge_segments_from_contractions_chains_on_loops'); -- chains on the loops
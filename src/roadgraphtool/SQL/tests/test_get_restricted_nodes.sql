@@ -173,9 +173,105 @@ END;
 $$;
 
 
+CREATE OR REPLACE FUNCTION test_get_restricted_nodes_self_loop()
+    RETURNS SETOF TEXT
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM prepare_restricted_nodes_test_env(); -- Ensure table exists
+    RAISE NOTICE 'execution of test_get_restricted_nodes_self_loop() started';
+
+    DELETE FROM road_segments;
+    -- node 2 is in the middle of the two-way road 1 <-> 2 <-> 3, node 5 has a self-loop and a two-way road to 4
+    INSERT INTO road_segments (from_node, to_node)
+    VALUES (1, 2), (2, 1), (2, 3), (3, 2), (4, 5), (5, 4), (5, 5);
+
+    RETURN QUERY SELECT * FROM validate_restricted_nodes(
+        ARRAY(SELECT unnest(get_restricted_nodes()) ORDER BY 1), ARRAY[1, 3, 4, 5], 'Self-loop test'
+    );
+END;
+$$;
+
+
+-- Compares get_restricted_nodes with the original implementation (get_restricted_nodes_reference) on the current
+-- road_segments table. The reference returns all non-contractible nodes of the nodes table, so it is limited to
+-- the nodes of road_segments before the comparison. The reference lets nodes with a self-loop through (pgr_contraction
+-- keeps them anyway), get_restricted_nodes restricts them.
+CREATE OR REPLACE FUNCTION validate_restricted_nodes_match_reference(test_name text) RETURNS SETOF TEXT AS $$
+DECLARE
+    restricted_nodes bigint[];
+    reference_nodes bigint[];
+BEGIN
+    restricted_nodes := ARRAY(SELECT unnest(get_restricted_nodes()) ORDER BY 1);
+    reference_nodes := ARRAY(
+        SELECT reference.node_id
+        FROM unnest(get_restricted_nodes_reference()) AS reference(node_id)
+        WHERE EXISTS (
+            SELECT 1 FROM road_segments
+            WHERE road_segments.from_node = reference.node_id OR road_segments.to_node = reference.node_id
+        )
+        UNION
+        SELECT from_node FROM road_segments WHERE from_node = to_node
+        ORDER BY 1
+    );
+
+    RETURN NEXT is(restricted_nodes, reference_nodes, test_name || ': restricted nodes match the reference');
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_get_restricted_nodes_matches_reference_on_test_graphs() RETURNS SETOF TEXT AS $$
+DECLARE
+    graph_name text;
+BEGIN
+    PERFORM prepare_restricted_nodes_test_env(); -- Ensure table exists
+    RAISE NOTICE 'execution of test_get_restricted_nodes_matches_reference_on_test_graphs() started';
+
+    FOR graph_name IN SELECT name FROM test_graphs ORDER BY name LOOP
+        DELETE FROM road_segments;
+        PERFORM load_graphml_to_road_segments(graph_name);
+        RETURN QUERY SELECT * FROM validate_restricted_nodes_match_reference(graph_name);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_get_restricted_nodes_matches_reference_on_generated_graph() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_restricted_nodes_test_env(); -- Ensure table exists
+    RAISE NOTICE 'execution of test_get_restricted_nodes_matches_reference_on_generated_graph() started';
+
+    DELETE FROM road_segments;
+
+    -- one-way chain 1001 -> ... -> 1020
+    INSERT INTO road_segments (from_node, to_node)
+    SELECT i, i + 1 FROM generate_series(1001, 1019) AS i;
+
+    -- two-way chain 2001 <-> ... <-> 2020 with a parallel segment and a branch in the middle
+    INSERT INTO road_segments (from_node, to_node)
+    SELECT i, i + 1 FROM generate_series(2001, 2019) AS i
+    UNION ALL
+    SELECT i + 1, i FROM generate_series(2001, 2019) AS i
+    UNION ALL
+    VALUES (2005, 2006), (2010, 1010);
+
+    -- dead end, self loop and a one-way cycle
+    INSERT INTO road_segments (from_node, to_node)
+    VALUES (3001, 3002), (3002, 3001), (3003, 3003), (3003, 3004), (3004, 3003), (4001, 4002), (4002, 4003),
+           (4003, 4001);
+
+    INSERT INTO nodes (id, geom)
+    SELECT DISTINCT node_id, ST_SetSRID(ST_MakePoint(0, 0), 4326)
+    FROM road_segments CROSS JOIN LATERAL (VALUES (from_node), (to_node)) AS segment_nodes(node_id)
+    ON CONFLICT DO NOTHING;
+
+    RETURN QUERY SELECT * FROM validate_restricted_nodes_match_reference('Generated graph');
+END;
+$$ LANGUAGE plpgsql;
+
 
 -- Example of running tests:
 -- SELECT * FROM mob_group_runtests('_get_restricted_nodes$'); -- runs only startup
 -- SELECT * FROM mob_group_runtests('_get_restricted_nodes_three_node_chain'); -- runs the first test
 -- SELECT * FROM mob_group_runtests('_get_restricted_nodes_two_restricted_nodes'); -- runs the second test
--- SELECT * FROM mob_group_runtests('_get_restricted_nodes_three_restricted_nodes'); -- runs the third test 
\ No newline at end of file
+-- SELECT * FROM mob_group_runtests('_get_restricted_nodes_three_restricted_nodes'); -- runs the third test 
+-- SELECT * FROM mob_group_runtests('_get_restricted_nodes_self_loop'); -- a node with a self-loop is restricted
+-- SELECT * FROM mob_group_runtests('_get_restricted_nodes_matches_reference'); -- compares with the original implementation
@@ -114,3 +114,40 @@ BEGIN
                         ' FROM test_insert_area_data test_data WHERE name = ''test4'';', '22023');
 END;
 $$ LANGUAGE plpgsql;
+
+-- 5. area parts: the inserted geometry is stored subdivided in area_parts
+CREATE OR REPLACE FUNCTION test_insert_area_writes_area_parts() RETURNS SETOF TEXT AS
+$$
+DECLARE
+    area_id INTEGER;
+BEGIN
+    RAISE NOTICE '--- test_insert_area_writes_area_parts ---';
+    -- circle with 2048 vertices, i.e. more than the 256 vertices allowed per part
+    area_id := insert_area(
+        'test_parts',
+        st_asgeojson(st_multi(st_buffer(st_setsrid(st_makepoint(0, 0), 4326), 1, 512)))::json
+    );
+
+    RETURN NEXT cmp_ok(
+        (SELECT count(1)::integer FROM area_parts WHERE area = area_id), '>', 1,
+        'Area geometry is subdivided into multiple parts'
+    );
+    RETURN NEXT ok(
+        (SELECT bool_and(st_npoints(geom) <= 256) FROM area_parts WHERE area = area_id),
+        'Area parts have at most 256 vertices'
+    );
+    RETURN NEXT ok(
+        (SELECT abs(sum(st_area(area_parts.geom)) - st_area(areas.geom)) < 1e-9
+         FROM area_parts JOIN areas ON areas.id = area_parts.area
+         WHERE area_parts.area = area_id
+         GROUP BY areas.geom),
+        'Area parts cover the area geometry'
+    );
+
+    UPDATE areas SET geom = NULL WHERE id = area_id;
+    RETURN NEXT is(
+        (SELECT count(1)::integer FROM area_parts WHERE area = area_id), 0,
+        'Area parts are removed when the area geometry is removed'
+    );
+END;
+$$ LANGUAGE plpgsql;
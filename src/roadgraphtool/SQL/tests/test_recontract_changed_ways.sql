@@ -0,0 +1,96 @@
+-- Test suite for recontract_changed_ways procedure
+-- Uses prepare_contract_graph_area and validate_contracted_nodes from test_contract_graph_in_area.sql
+
+-- Adds a one-way way between two nodes of the test area, the end node is created if it does not exist
+CREATE OR REPLACE FUNCTION add_test_way(from_node_id bigint, to_node_id bigint) RETURNS bigint AS $$
+DECLARE
+    new_way_id bigint;
+BEGIN
+    INSERT INTO nodes (id, geom, area)
+    VALUES (to_node_id, ST_SetSRID(ST_MakePoint(0, 0), 4326), 9999)
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO ways (id, "from", "to", geom, oneway, area)
+    VALUES (
+        nextval('edge_id_seq'),
+        from_node_id,
+        to_node_id,
+        ST_Multi(ST_MakeLine(ST_SetSRID(ST_MakePoint(0, 0), 4326), ST_SetSRID(ST_MakePoint(0, 0), 4326))),
+        true,
+        9999
+    )
+    RETURNING id INTO new_way_id;
+
+    INSERT INTO nodes_ways (way_id, node_id, position, area)
+    VALUES (new_way_id, from_node_id, 0::smallint, 9999), (new_way_id, to_node_id, 1::smallint, 9999);
+
+    RETURN new_way_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A branch added in the middle of the contracted chain 1 -> 2 -> 3 makes node 2 an intersection
+CREATE OR REPLACE FUNCTION test_recontract_changed_ways_new_branch() RETURNS SETOF TEXT AS $$
+DECLARE
+    new_way_id bigint;
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_recontract_changed_ways_new_branch() started';
+
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    CALL contract_graph_in_area(9999::smallint, 4326);
+    DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+
+    RETURN NEXT results_eq(
+        'SELECT node_id FROM nodes_edges JOIN edges ON edges.id = nodes_edges.edge_id WHERE edges.area = 9999',
+        'VALUES (2::bigint)',
+        'New branch test: the contracted node is mapped to its edge'
+    );
+
+    new_way_id := add_test_way(2, 4);
+    CALL recontract_changed_ways(9999::smallint, 4326, ARRAY[new_way_id]);
+
+    RETURN QUERY SELECT * FROM validate_contracted_nodes(ARRAY[]::bigint[], 'New branch test');
+    RETURN NEXT set_eq(
+        'SELECT "from", "to" FROM edges WHERE area = 9999',
+        'VALUES (1::bigint, 2::bigint), (2::bigint, 3::bigint), (2::bigint, 4::bigint)',
+        'New branch test: the chain is split at the new intersection'
+    );
+    RETURN NEXT is_empty(
+        'SELECT * FROM nodes_edges JOIN edges ON edges.id = nodes_edges.edge_id WHERE edges.area = 9999',
+        'New branch test: no contracted nodes are mapped'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extending the chain 1 -> 2 -> 3 by 3 -> 4 contracts node 3 by merging the new segment with the existing edge
+CREATE OR REPLACE FUNCTION test_recontract_changed_ways_extended_chain() RETURNS SETOF TEXT AS $$
+DECLARE
+    new_way_id bigint;
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_recontract_changed_ways_extended_chain() started';
+
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    CALL contract_graph_in_area(9999::smallint, 4326);
+    DROP TABLE road_segments, contractions, contraction_segments, contracted_edges;
+
+    new_way_id := add_test_way(3, 4);
+    CALL recontract_changed_ways(9999::smallint, 4326, ARRAY[new_way_id]);
+
+    RETURN QUERY SELECT * FROM validate_contracted_nodes(ARRAY[2, 3]::bigint[], 'Extended chain test');
+    RETURN NEXT set_eq(
+        'SELECT "from", "to" FROM edges WHERE area = 9999',
+        'VALUES (1::bigint, 4::bigint)',
+        'Extended chain test: the chain is a single edge'
+    );
+    RETURN NEXT set_eq(
+        'SELECT node_id FROM nodes_edges JOIN edges ON edges.id = nodes_edges.edge_id WHERE edges.area = 9999',
+        'VALUES (2::bigint), (3::bigint)',
+        'Extended chain test: both contracted nodes are mapped to the edge'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_recontract_changed_ways_new_branch');
+-- SELECT * FROM mob_group_runtests('_recontract_changed_ways_extended_chain');
@@ -0,0 +1,70 @@
+-- Test suite for refresh_node_segments procedure and the mark_stale_node_segments triggers
+-- Uses the test area 9999 (prepare_contract_graph_area) and the test_1 graph: 1 -> 2 -> 3, one way per segment
+
+CREATE OR REPLACE FUNCTION test_refresh_node_segments_stores_segments() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_refresh_node_segments_stores_segments() started';
+
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    CALL refresh_node_segments(9999::smallint, 4326);
+
+    RETURN NEXT set_eq(
+        'SELECT from_node, to_node FROM node_segments WHERE area = 9999',
+        'VALUES (1::bigint, 2::bigint), (2::bigint, 3::bigint)',
+        'The segments of the area are stored'
+    );
+    RETURN NEXT results_eq(
+        'SELECT srid, stale FROM node_segments_areas WHERE area = 9999',
+        'VALUES (4326, FALSE)',
+        'The area is stored as fresh'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_refresh_node_segments_recomputed_only_after_change() RETURNS SETOF TEXT AS $$
+BEGIN
+    PERFORM prepare_contract_graph_area(); -- Ensure area exists
+    RAISE NOTICE 'execution of test_refresh_node_segments_recomputed_only_after_change() started';
+
+    PERFORM load_graphml_to_nodes_edges('test_1');
+    CALL refresh_node_segments(9999::smallint, 4326);
+
+    -- a removed segment is not restored while the ways of the area do not change
+    DELETE FROM node_segments WHERE area = 9999 AND from_node = 1;
+    CALL refresh_node_segments(9999::smallint, 4326);
+    RETURN NEXT is(
+        (SELECT count(*) FROM node_segments WHERE area = 9999),
+        1::bigint,
+        'The segments are not recomputed without a change'
+    );
+
+    -- a change of a way of the area marks the area stale
+    UPDATE ways SET oneway = TRUE WHERE area = 9999 AND "from" = 2;
+    RETURN NEXT is(
+        (SELECT stale FROM node_segments_areas WHERE area = 9999),
+        TRUE,
+        'A change of a way marks the area stale'
+    );
+
+    CALL refresh_node_segments(9999::smallint, 4326);
+    RETURN NEXT is(
+        (SELECT count(*) FROM node_segments WHERE area = 9999),
+        2::bigint,
+        'The segments are recomputed after a change'
+    );
+
+    -- a different SRID recomputes the segments as well
+    CALL refresh_node_segments(9999::smallint, 3857);
+    RETURN NEXT is(
+        (SELECT DISTINCT st_srid(geom) FROM node_segments WHERE area = 9999),
+        3857,
+        'The segments are recomputed in the requested SRID'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_refresh_node_segments_stores_segments');
+-- SELECT * FROM mob_group_runtests('_refresh_node_segments_recomputed_only_after_change');
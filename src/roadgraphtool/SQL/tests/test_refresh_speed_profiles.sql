@@ -0,0 +1,91 @@
+-- Test suite for refresh_speed_profiles procedure
+-- Uses the speed records dataset 9999; 2024-01-01 is a Monday (isodow 1)
+
+CREATE OR REPLACE FUNCTION test_refresh_speed_profiles_aggregates_records() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_refresh_speed_profiles_aggregates_records() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES
+        ('2024-01-01 08:10', 1, 2, 10, 1, 9999),
+        ('2024-01-08 08:50', 1, 2, 20, NULL, 9999),
+        ('2024-01-01 09:10', 1, 2, 30, 3, 9999),
+        ('2024-01-02 08:10', 2, 3, 40, 4, 9999);
+    CALL refresh_speed_profiles(9999::smallint);
+
+    RETURN NEXT set_eq(
+        'SELECT from_osm_id, to_osm_id, isodow, hour, record_count FROM speed_profiles WHERE dataset = 9999',
+        'VALUES (1::bigint, 2::bigint, 1::smallint, 8::smallint, 2),
+            (1::bigint, 2::bigint, 1::smallint, 9::smallint, 1),
+            (2::bigint, 3::bigint, 2::smallint, 8::smallint, 1)',
+        'The records are aggregated by from/to node, day of week and hour'
+    );
+    RETURN NEXT results_eq(
+        'SELECT speed_mean, round(speed_st_dev::numeric, 6), st_dev_mean FROM speed_profiles
+            WHERE dataset = 9999 AND from_osm_id = 1 AND isodow = 1 AND hour = 8',
+        'VALUES (15::double precision, round(sqrt(50)::numeric, 6), 1::double precision)',
+        'The mean and the standard deviations are computed from the sums'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_refresh_speed_profiles_adds_new_records() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_refresh_speed_profiles_adds_new_records() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES ('2024-01-01 08:10', 1, 2, 10, 1, 9999);
+    CALL refresh_speed_profiles(9999::smallint);
+
+    -- a repeated refresh does not add the records again
+    CALL refresh_speed_profiles(9999::smallint);
+    RETURN NEXT is(
+        (SELECT record_count FROM speed_profiles WHERE dataset = 9999),
+        1,
+        'The aggregated records are not added twice'
+    );
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES ('2024-01-08 08:20', 1, 2, 30, 3, 9999);
+    CALL refresh_speed_profiles(9999::smallint);
+    RETURN NEXT results_eq(
+        'SELECT record_count, speed_mean, st_dev_mean FROM speed_profiles WHERE dataset = 9999',
+        'VALUES (2, 20::double precision, 2::double precision)',
+        'The new records are added to the stored profile'
+    );
+
+    CALL refresh_speed_profiles(9999::smallint, TRUE);
+    RETURN NEXT results_eq(
+        'SELECT record_count, speed_mean, st_dev_mean FROM speed_profiles WHERE dataset = 9999',
+        'VALUES (2, 20::double precision, 2::double precision)',
+        'The full refresh aggregates all records again'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_refresh_speed_profiles_adds_older_records() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_refresh_speed_profiles_adds_older_records() started';
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES ('2024-01-08 08:20', 1, 2, 10, 1, 9999);
+    CALL refresh_speed_profiles(9999::smallint);
+
+    -- back-filled records: older than and as old as the latest aggregated record
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES ('2023-12-25 08:30', 1, 2, 20, 3, 9999), ('2024-01-08 08:20', 1, 2, 30, NULL, 9999);
+    CALL refresh_speed_profiles(9999::smallint);
+
+    RETURN NEXT results_eq(
+        'SELECT record_count, speed_mean, st_dev_mean FROM speed_profiles WHERE dataset = 9999',
+        'VALUES (3, 20::double precision, 2::double precision)',
+        'The records inserted after the refresh are added whatever their datetime'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_refresh_speed_profiles_aggregates_records');
+-- SELECT * FROM mob_group_runtests('_refresh_speed_profiles_adds_new_records');
+-- SELECT * FROM mob_group_runtests('_refresh_speed_profiles_adds_older_records');
@@ -0,0 +1,112 @@
+-- Test suite for create_speed_records_partitions and migrate_speed_records_to_partitions procedures
+-- Uses the speed records dataset 9999
+
+CREATE OR REPLACE FUNCTION test_create_speed_records_partitions_creates_partitions() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_create_speed_records_partitions_creates_partitions() started';
+
+    CALL create_speed_records_partitions(9999::smallint, '2024-01-15', '2024-03-01');
+
+    RETURN NEXT set_eq(
+        'SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = ''speed_records_dataset_9999''::regclass',
+        'VALUES (''speed_records_dataset_9999_default''), (''speed_records_dataset_9999_2024_01''),
+            (''speed_records_dataset_9999_2024_02''), (''speed_records_dataset_9999_2024_03'')',
+        'The dataset partition has a default and one partition per month'
+    );
+
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, dataset)
+    VALUES ('2024-02-10 08:00', 1, 2, 10, 9999), ('2024-05-10 08:00', 1, 2, 20, 9999);
+    RETURN NEXT set_eq(
+        'SELECT tableoid::regclass::text, hour, isodow FROM speed_records WHERE dataset = 9999',
+        'VALUES (''speed_records_dataset_9999_2024_02'', 8::smallint, 6::smallint),
+            (''speed_records_dataset_9999_default'', 8::smallint, 5::smallint)',
+        'The records are stored in the partition of their month, other months in the dataset default partition'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_create_speed_records_partitions_is_idempotent() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_create_speed_records_partitions_is_idempotent() started';
+
+    CALL create_speed_records_partitions(9999::smallint, '2024-01-01', '2024-02-01');
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, dataset)
+    VALUES ('2024-01-10 08:00', 1, 2, 10, 9999);
+
+    RETURN NEXT lives_ok(
+        'CALL create_speed_records_partitions(9999::smallint, ''2024-02-01'', ''2024-03-01'')',
+        'Creating overlapping partitions again succeeds'
+    );
+    RETURN NEXT is(
+        (SELECT count(*) FROM pg_inherits WHERE inhparent = 'speed_records_dataset_9999'::regclass),
+        4::bigint,
+        'Only the missing month is created'
+    );
+    RETURN NEXT is(
+        (SELECT count(*) FROM speed_records_dataset_9999_2024_01),
+        1::bigint,
+        'The records of the existing partitions are kept'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- The migration runs on an unpartitioned speed_records table (as created before the partitioning) in a separate
+-- schema, the objects it creates do not collide with the partitioned table of the database
+CREATE OR REPLACE FUNCTION test_migrate_speed_records_to_partitions_moves_records() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_migrate_speed_records_to_partitions_moves_records() started';
+
+    CREATE SCHEMA speed_records_migration_test;
+    SET LOCAL search_path TO speed_records_migration_test, public;
+    CREATE TABLE speed_records (
+        datetime timestamp without time zone NOT NULL,
+        from_osm_id bigint NOT NULL,
+        to_osm_id bigint NOT NULL,
+        speed real NOT NULL,
+        st_dev real,
+        dataset smallint,
+        -- added by the migrations
+        record_id bigint NOT NULL DEFAULT nextval('public.speed_records_record_id_seq'::regclass)
+    );
+    CREATE INDEX speed_records_from_osm_id_to_osm_id_index ON speed_records USING btree (from_osm_id, to_osm_id);
+    -- records on both sides of the month boundaries and a record without a dataset
+    INSERT INTO speed_records (datetime, from_osm_id, to_osm_id, speed, st_dev, dataset)
+    VALUES
+        ('2024-01-31 23:59', 1, 2, 10, 1, 9999),
+        ('2024-02-01 00:00', 1, 2, 20, NULL, 9999),
+        ('2024-03-15 08:00', 2, 3, 30, 3, 9999),
+        ('2024-02-01 00:00', 2, 3, 40, 4, NULL);
+
+    CALL migrate_speed_records_to_partitions();
+
+    RETURN NEXT is(
+        (SELECT relkind FROM pg_class WHERE oid = 'speed_records_migration_test.speed_records'::regclass),
+        'p'::"char",
+        'speed_records is partitioned'
+    );
+    RETURN NEXT set_eq(
+        'SELECT tableoid::regclass::text, datetime, speed, st_dev, hour FROM speed_records',
+        'VALUES
+            (''speed_records_dataset_9999_2024_01'', ''2024-01-31 23:59''::timestamp, 10::real, 1::real, 23::smallint),
+            (''speed_records_dataset_9999_2024_02'', ''2024-02-01 00:00''::timestamp, 20::real, NULL::real, 0::smallint),
+            (''speed_records_dataset_9999_2024_03'', ''2024-03-15 08:00''::timestamp, 30::real, 3::real, 8::smallint),
+            (''speed_records_default'', ''2024-02-01 00:00''::timestamp, 40::real, 4::real, 0::smallint)',
+        'The records are moved to the partitions of their dataset and month'
+    );
+    RETURN NEXT ok(
+        to_regclass('speed_records_migration_test.speed_records_unpartitioned') IS NULL,
+        'The unpartitioned table is dropped'
+    );
+    RETURN NEXT has_index(
+        'speed_records_migration_test', 'speed_records', 'speed_records_from_osm_id_to_osm_id_index',
+        'The index of the old table is kept under its name'
+    );
+
+    RETURN NEXT lives_ok('CALL migrate_speed_records_to_partitions()', 'A repeated migration does nothing');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_create_speed_records_partitions_creates_partitions'); -- runs the creation test
+-- SELECT * FROM mob_group_runtests('_create_speed_records_partitions_is_idempotent'); -- runs the re-creation test
+-- SELECT * FROM mob_group_runtests('_migrate_speed_records_to_partitions'); -- runs the migration test
@@ -0,0 +1,52 @@
+-- Test suite for the speed_sketch_* functions
+-- The sketches are encoded as in roadgraphtool.speed_sketch: speeds 10 and 20 are in the buckets 116 and 150
+
+CREATE OR REPLACE FUNCTION test_speed_sketch_merge_sums_buckets() RETURNS SETOF TEXT AS $$
+BEGIN
+    RAISE NOTICE 'execution of test_speed_sketch_merge_sums_buckets() started';
+
+    RETURN NEXT is(
+        speed_sketch_merge('\x0000007400000001'::bytea, '\x00000074000000010000009600000001'::bytea),
+        '\x00000074000000020000009600000001'::bytea,
+        'The counts of the common buckets are summed'
+    );
+    RETURN NEXT is(
+        (SELECT speed_sketch_merge_agg(sketch) FROM (VALUES
+            (NULL::bytea), ('\x0000007400000001'::bytea), ('\x00000074000000010000009600000001'::bytea)
+        ) AS sketches (sketch)),
+        '\x00000074000000020000009600000001'::bytea,
+        'The aggregate merges all the sketches, NULL is an empty sketch'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_speed_sketch_quantile_within_accuracy() RETURNS SETOF TEXT AS $$
+DECLARE
+    sketch bytea;
+BEGIN
+    RAISE NOTICE 'execution of test_speed_sketch_quantile_within_accuracy() started';
+
+    SELECT string_agg(int4send(bucket) || int4send(count::integer), ''::bytea ORDER BY bucket)
+    INTO sketch
+    FROM (
+        SELECT speed_sketch_bucket(speed) AS bucket, count(*) AS count
+        FROM generate_series(1, 100) AS speed
+        GROUP BY bucket
+    ) AS buckets;
+
+    RETURN NEXT ok(
+        abs(speed_sketch_quantile(sketch, 0.5) - 50) <= 0.01 * 50,
+        'The median is within 1 % of the exact one'
+    );
+    RETURN NEXT ok(
+        abs(speed_sketch_quantile(sketch, 0.85) - 85) <= 0.01 * 85,
+        'The 85th percentile is within 1 % of the exact one'
+    );
+    RETURN NEXT is(speed_sketch_quantile(NULL, 0.5), NULL, 'The quantile of an empty sketch is NULL');
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Example of running tests:
+-- SELECT * FROM mob_group_runtests('_speed_sketch_merge_sums_buckets');
+-- SELECT * FROM mob_group_runtests('_speed_sketch_quantile_within_accuracy');
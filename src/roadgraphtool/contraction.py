@@ -0,0 +1,471 @@
+"""
+In-process graph contraction, an alternative to the `contract_graph_in_area` SQL procedure.
+
+The road segments of the area are fetched once, the contractible nodes are found from the degrees on a sparse (CSR)
+adjacency matrix with the rules of `get_restricted_nodes` and the chains are followed with vectorized steps.
+"""
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy import sparse
+
+from roadgraphtool.db import db
+
+CONTRACTION_ENGINES = ("sql", "python")
+
+
+class ContractionResult(NamedTuple):
+    """
+    Contraction of a set of road segments.
+
+    Every segment belongs to exactly one resulting edge: ``edge[i]`` is the index of the edge of segment ``i`` and
+    ``edge_position[i]`` the order of the segment within the edge (0 for the first segment). `node_count` and
+    `restricted_node_count` are the numbers of all and of non-contractible nodes of the segments.
+    """
+    contracted_nodes: np.ndarray
+    edge: np.ndarray
+    edge_position: np.ndarray
+    edge_count: int
+    node_count: int
+    restricted_node_count: int
+
+
+def _first_neighbors(matrix: sparse.csr_matrix, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the first two column indices of every row (-1 where the row is shorter)."""
+    row_length = np.diff(matrix.indptr)
+    first = np.full(count, -1, dtype=np.int64)
+    second = np.full(count, -1, dtype=np.int64)
+    has_first = row_length >= 1
+    has_second = row_length >= 2
+    first[has_first] = matrix.indices[matrix.indptr[:-1][has_first]]
+    second[has_second] = matrix.indices[matrix.indptr[:-1][has_second] + 1]
+    return first, second
+
+
+def _has_self_loop(adjacency: sparse.csr_matrix) -> np.ndarray:
+    """Return a boolean mask of the nodes with a self-loop, they are never contractible."""
+    return adjacency.diagonal() > 0
+
+
+def get_contractible_nodes(source: np.ndarray, target: np.ndarray, node_count: int) -> np.ndarray:
+    """
+    Return a boolean mask of the contractible nodes.
+
+    `source` and `target` are the segment endpoints as node indices in ``range(node_count)``.
+    """
+    out_degree = np.bincount(source, minlength=node_count)
+    in_degree = np.bincount(target, minlength=node_count)
+
+    # duplicate entries (parallel segments) are summed, so the row/column lengths are the distinct neighbor counts
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(source), dtype=np.int32), (source, target)), shape=(node_count, node_count)
+    )
+    adjacency.sum_duplicates()
+    reverse_adjacency = adjacency.T.tocsr()
+    reverse_adjacency.sort_indices()
+
+    out_first, out_second = _first_neighbors(adjacency, node_count)
+    in_first, in_second = _first_neighbors(reverse_adjacency, node_count)
+    out_neighbors = np.diff(adjacency.indptr)
+    in_neighbors = np.diff(reverse_adjacency.indptr)
+
+    single_lane = (out_degree == 1) & (in_degree == 1) & (out_first != in_first)
+    two_way = (
+        (out_degree == 2) & (in_degree == 2)
+        & (out_neighbors == 2) & (in_neighbors == 2)
+        & (out_first == in_first) & (out_second == in_second)
+    )
+    return (single_lane | two_way) & ~_has_self_loop(adjacency)
+
+
+def contract_segments(from_node: np.ndarray, to_node: np.ndarray) -> ContractionResult:
+    """
+    Contract the directed graph given by the segments ``from_node[i] -> to_node[i]``.
+
+    Each edge starts with a segment whose start node is not contractible and follows the segments through
+    contractible nodes until it reaches a node that is not contractible. Contractible nodes that cannot be reached
+    this way (isolated cycles) are kept, and their segments become edges on their own.
+    """
+    from_node = np.asarray(from_node, dtype=np.int64)
+    to_node = np.asarray(to_node, dtype=np.int64)
+    segment_count = len(from_node)
+
+    node_ids, node_index = np.unique(np.concatenate([from_node, to_node]), return_inverse=True)
+    node_count = len(node_ids)
+    source = node_index[:segment_count]
+    target = node_index[segment_count:]
+
+    contractible = get_contractible_nodes(source, target, node_count)
+
+    # outgoing segments of every node: by_source[segment_start[v]:segment_start[v + 1]]
+    out_degree = np.bincount(source, minlength=node_count)
+    by_source = np.argsort(source, kind="stable")
+    segment_start = np.concatenate([[0], np.cumsum(out_degree)])
+
+    # the segment that continues a segment ending in a contractible node
+    next_segment = np.full(segment_count, -1, dtype=np.int64)
+    continued = np.flatnonzero(contractible[target])
+    via = target[continued]
+    first_out = by_source[segment_start[via]]
+    turn_back = (out_degree[via] == 2) & (target[first_out] == source[continued])
+    second_out = by_source[np.minimum(segment_start[via] + 1, segment_count - 1)]
+    next_segment[continued] = np.where(turn_back, second_out, first_out)
+
+    edge = np.full(segment_count, -1, dtype=np.int64)
+    edge_position = np.zeros(segment_count, dtype=np.int64)
+
+    current = np.flatnonzero(~contractible[source])
+    edge[current] = np.arange(len(current))
+    edge_count = len(current)
+
+    for _ in range(node_count):
+        current = current[contractible[target[current]]]
+        if len(current) == 0:
+            break
+        following = next_segment[current]
+        edge[following] = edge[current]
+        edge_position[following] = edge_position[current] + 1
+        current = following
+
+    contracted = np.zeros(node_count, dtype=bool)
+    reached = edge >= 0
+    contracted[source[reached & contractible[source]]] = True
+
+    unreached = np.flatnonzero(~reached)
+    if len(unreached) > 0:
+        logging.info(f"{len(unreached)} segments in cycles without intersections are kept uncontracted")
+        edge[unreached] = np.arange(edge_count, edge_count + len(unreached))
+        edge_count += len(unreached)
+
+    return ContractionResult(
+        node_ids[contracted], edge, edge_position, edge_count, node_count, node_count - np.count_nonzero(contractible)
+    )
+
+
+def build_edges(segments: pd.DataFrame, result: ContractionResult) -> pd.DataFrame:
+    """
+    Return the edges of a contraction with the geometry as hex EWKB MultiLineString (SRID 4326).
+
+    `segments` needs the columns from_node, to_node, from_x, from_y, to_x, to_y and, for the speed, length and
+    speed. The speed of a contracted edge is the length-weighted average of its segment speeds.
+    """
+    order = np.lexsort((result.edge_position, result.edge))
+    edge_of_segment = result.edge[order]
+    is_last = np.ones(len(order), dtype=bool)
+    is_last[:-1] = edge_of_segment[:-1] != edge_of_segment[1:]
+    first_segment = order[np.concatenate([[True], is_last[:-1]])]
+    last_segment = order[is_last]
+
+    # every segment contributes its start point, the last segment of every edge also its end point
+    from_xy = segments[["from_x", "from_y"]].to_numpy(dtype=float)
+    to_xy = segments[["to_x", "to_y"]].to_numpy(dtype=float)
+    coordinates = np.concatenate([from_xy[order], to_xy[last_segment]])
+    point_edge = np.concatenate([edge_of_segment, result.edge[last_segment]])
+    point_position = np.concatenate([result.edge_position[order], result.edge_position[last_segment] + 1])
+    point_order = np.lexsort((point_position, point_edge))
+
+    lines = shapely.linestrings(coordinates[point_order], indices=point_edge[point_order])
+    geometries = shapely.set_srid(shapely.multilinestrings(lines, indices=np.arange(len(lines))), 4326)
+
+    from_node = segments["from_node"].to_numpy()
+    to_node = segments["to_node"].to_numpy()
+    edges = pd.DataFrame({
+        "from": from_node[first_segment],
+        "to": to_node[last_segment],
+        "geom": shapely.to_wkb(geometries, hex=True, include_srid=True),
+    })
+
+    if "speed" in segments.columns:
+        length = segments["length"].to_numpy(dtype=float)
+        speed = segments["speed"].to_numpy(dtype=float)
+        total_length = np.bincount(result.edge, weights=length, minlength=result.edge_count)
+        weighted_speed = np.bincount(result.edge, weights=speed * length, minlength=result.edge_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            edges["speed"] = np.where(total_length > 0, weighted_speed / total_length, np.nan)
+
+    return edges
+
+
+def build_nodes_edges(segments: pd.DataFrame, result: ContractionResult) -> pd.DataFrame:
+    """
+    Return the contracted nodes with the index of their edge (columns node_id and edge).
+
+    A node in the middle of a two-way road is contracted into the edges of both directions.
+    """
+    inner_segment = result.edge_position > 0
+    return pd.DataFrame({
+        "node_id": segments["from_node"].to_numpy()[inner_segment],
+        "edge": result.edge[inner_segment],
+    })
+
+
+def get_chain_length_histogram(result: ContractionResult, edges: Optional[np.ndarray] = None) -> dict:
+    """
+    Return the number of edges by the number of segments merged into the edge, e.g. ``{"1": 120, "2": 40}``.
+
+    Only the edges with index in `edges` are counted if given.
+    """
+    chain_lengths = np.bincount(result.edge, minlength=result.edge_count)
+    if edges is not None:
+        chain_lengths = chain_lengths[edges]
+    lengths, counts = np.unique(chain_lengths, return_counts=True)
+    return {str(length): int(count) for length, count in zip(lengths, counts)}
+
+
+def get_new_edge_ids(count: int) -> np.ndarray:
+    """Reserve `count` ids from edge_id_seq."""
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+    rows = db.execute_sql_and_fetch_all_rows(f"SELECT nextval('edge_id_seq') FROM generate_series(1, {count})")
+    return np.array([row[0] for row in rows], dtype=np.int64)
+
+
+def get_road_segments(target_area_id: int, target_area_srid: int, fill_speed: bool) -> pd.DataFrame:
+    speed_column = ", nodes_ways_speeds.speed AS speed" if fill_speed else ""
+    speed_join = """
+        JOIN nodes_ways_speeds ON
+            road_segments.from_id = nodes_ways_speeds.from_node_ways_id
+            AND road_segments.to_id = nodes_ways_speeds.to_node_ways_id
+    """ if fill_speed else ""
+    sql = f"""
+    SELECT
+        road_segments.from_node,
+        road_segments.to_node,
+        st_x(from_nodes.geom) AS from_x,
+        st_y(from_nodes.geom) AS from_y,
+        st_x(to_nodes.geom) AS to_x,
+        st_y(to_nodes.geom) AS to_y,
+        from_nodes.contracted AS from_contracted,
+        to_nodes.contracted AS to_contracted,
+        st_length(road_segments.geom) AS length
+        {speed_column}
+    FROM node_segments road_segments
+        JOIN nodes from_nodes ON from_nodes.id = road_segments.from_node
+        JOIN nodes to_nodes ON to_nodes.id = road_segments.to_node
+        {speed_join}
+    WHERE road_segments.area = {target_area_id}
+    """
+    db.execute_procedure("refresh_node_segments", (target_area_id, "smallint"), (target_area_srid, "integer"))
+    return db.execute_query_to_pandas(sql)
+
+
+def store_contracted_nodes(node_ids: np.ndarray):
+    """Set `nodes.contracted` for `node_ids`, the ids are loaded with COPY into a temporary table."""
+    if len(node_ids) == 0:
+        return
+    cursor = db.get_new_cursor()
+    try:
+        cursor.execute("CREATE TEMPORARY TABLE contracted_node_ids (id bigint) ON COMMIT DROP")
+        buffer = io.StringIO()
+        pd.Series(node_ids).to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert("COPY contracted_node_ids (id) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            "UPDATE nodes SET contracted = TRUE FROM contracted_node_ids WHERE nodes.id = contracted_node_ids.id"
+        )
+        db.commit()
+    except Exception:
+        cursor.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def contract_graph_in_area(target_area_id: int, target_area_srid: int, fill_speed: bool = False):
+    """
+    Contract the road graph in the area and store the result in `edges`, `nodes_edges` and `nodes.contracted`.
+
+    The in-process counterpart of the `contract_graph_in_area` SQL procedure, with the same parameters.
+    """
+    phase_durations = {}
+    start_time = time.perf_counter()
+    logging.info("Fetching road segments")
+    segments = get_road_segments(target_area_id, target_area_srid, fill_speed)
+    logging.info(f"{len(segments)} road segments fetched")
+    phase_durations["road_segments"] = time.perf_counter() - start_time
+    if len(segments) == 0:
+        return
+
+    start_time = time.perf_counter()
+    result = contract_segments(segments["from_node"].to_numpy(), segments["to_node"].to_numpy())
+    logging.info(f"{len(result.contracted_nodes)} nodes contracted, {result.edge_count} edges")
+    phase_durations["contraction"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    store_contracted_nodes(result.contracted_nodes)
+
+    edges = build_edges(segments, result)
+    # nodes contracted by an earlier run are not used as edge endpoints, as in the SQL procedure
+    previously_contracted = np.union1d(
+        segments.loc[segments["from_contracted"], "from_node"], segments.loc[segments["to_contracted"], "to_node"]
+    )
+    edges = edges[~edges["from"].isin(previously_contracted) & ~edges["to"].isin(previously_contracted)].copy()
+    edges["id"] = get_new_edge_ids(len(edges))
+    edges["area"] = target_area_id
+    db.copy_dataframe_to_db_table(edges, "edges")
+    logging.info(f"{len(edges)} edges stored")
+
+    nodes_edges = build_nodes_edges(segments, result)
+    nodes_edges = nodes_edges[nodes_edges["edge"].isin(edges.index)]
+    nodes_edges = pd.DataFrame({
+        "node_id": nodes_edges["node_id"].to_numpy(),
+        "edge_id": edges.loc[nodes_edges["edge"], "id"].to_numpy(),
+    })
+    db.copy_dataframe_to_db_table(nodes_edges, "nodes_edges")
+    logging.info(f"{len(nodes_edges)} contracted nodes mapped to their edges")
+    phase_durations["store"] = time.perf_counter() - start_time
+
+    store_contraction_run(target_area_id, "python", result, len(segments), edges.index.to_numpy(), phase_durations)
+
+
+def store_contraction_run(
+    target_area_id: int,
+    engine: str,
+    result: ContractionResult,
+    segment_count: int,
+    edges: np.ndarray,
+    phase_durations: dict,
+):
+    """Store the statistics of the contraction of the area in `contraction_runs`, `edges` are the stored edges."""
+    db.execute_sql(
+        """
+        INSERT INTO contraction_runs (
+            area, engine, node_count, segment_count, restricted_node_count, restricted_node_ratio,
+            contracted_node_count, edge_count, chain_length_histogram, phase_durations
+        )
+        VALUES (
+            :area, :engine, :node_count, :segment_count, :restricted_node_count, :restricted_node_ratio,
+            :contracted_node_count, :edge_count, CAST(:chain_length_histogram AS jsonb), CAST(:phase_durations AS jsonb)
+        )
+        """,
+        {
+            "area": target_area_id,
+            "engine": engine,
+            "node_count": result.node_count,
+            "segment_count": segment_count,
+            "restricted_node_count": result.restricted_node_count,
+            "restricted_node_ratio": result.restricted_node_count / result.node_count if result.node_count else None,
+            "contracted_node_count": len(result.contracted_nodes),
+            "edge_count": len(edges),
+            "chain_length_histogram": json.dumps(get_chain_length_histogram(result, edges)),
+            "phase_durations": json.dumps(phase_durations),
+        },
+    )
+
+
+def get_last_contraction_run(target_area_id: int) -> Optional[dict]:
+    """Return the last row of `contraction_runs` for the area, None if the area was not contracted yet."""
+    runs = db.execute_sql_and_fetch_all_rows(
+        f"SELECT * FROM contraction_runs WHERE area = {target_area_id} ORDER BY id DESC LIMIT 1"
+    )
+    if not runs:
+        return None
+    run = dict(runs[0]._mapping)
+    run["finished_at"] = run["finished_at"].isoformat()
+    return run
+
+
+def save_contraction_report(target_area_id: int, report_dir: Path) -> Optional[Path]:
+    """Write the last contraction run of the area to `<report_dir>/contraction_report.json`."""
+    run = get_last_contraction_run(target_area_id)
+    if run is None:
+        logging.warning(f"No contraction run stored for area {target_area_id}")
+        return None
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / "contraction_report.json"
+    with open(report_path, mode='w') as f:
+        json.dump(run, f, indent=4)
+    logging.info(f"Contraction report saved to {report_path}")
+    return report_path
+
+
+def _contract_tile(target_area_id: int, tile: int, fill_speed: bool) -> float:
+    start_time = time.perf_counter()
+    db.execute_procedure(
+        "contract_graph_in_tile",
+        (target_area_id, "smallint"),
+        (tile, "integer"),
+        (fill_speed, "boolean"),
+    )
+    return time.perf_counter() - start_time
+
+
+def contract_graph_in_area_tiled(
+    target_area_id: int,
+    target_area_srid: int,
+    tile_size: float,
+    workers: Optional[int] = None,
+    fill_speed: bool = False,
+) -> dict:
+    """
+    Contract the road graph in the area tile by tile, with the tiles contracted in parallel database sessions.
+
+    The area is split into square tiles of `tile_size` (in units of `target_area_srid`) by the
+    `prepare_contraction_tiles` procedure. Each tile is contracted by `contract_graph_in_tile` in its own session
+    (at most `workers` at once) with the tile boundary nodes restricted, and `stitch_contraction_tiles` finally
+    creates the edges crossing the tile boundaries and contracts the boundary nodes where possible. The run is
+    stored in `contraction_runs` with the engine ``sql-tiled``, like the untiled runs.
+
+    Returns the timings in seconds: ``prepare``, ``tiles`` (by tile) and ``stitch``.
+    """
+    timings = {}
+    previous_max_edge_id = db.execute_sql_and_fetch_all_rows("SELECT coalesce(max(id), 0) FROM edges")[0][0]
+
+    logging.info(f"Splitting area {target_area_id} into contraction tiles of size {tile_size}")
+    start_time = time.perf_counter()
+    db.execute_procedure(
+        "prepare_contraction_tiles",
+        (target_area_id, "smallint"),
+        (target_area_srid, "integer"),
+        (tile_size, "double precision"),
+        (fill_speed, "boolean"),
+    )
+    timings["prepare"] = time.perf_counter() - start_time
+
+    tiles = [row[0] for row in db.execute_sql_and_fetch_all_rows(
+        f"SELECT DISTINCT tile FROM contraction_tile_segments WHERE area = {target_area_id} AND tile IS NOT NULL "
+        f"ORDER BY tile"
+    )]
+    logging.info(f"Contracting {len(tiles)} tiles")
+
+    timings["tiles"] = {}
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_contract_tile, target_area_id, tile, fill_speed): tile for tile in tiles}
+        for future in as_completed(futures):
+            tile = futures[future]
+            timings["tiles"][tile] = future.result()
+            logging.info(
+                f"Tile {tile} contracted in {timings['tiles'][tile]:.2f} s "
+                f"({len(timings['tiles'])}/{len(tiles)})"
+            )
+    phase_durations = {"prepare": timings["prepare"], "tiles": time.perf_counter() - start_time}
+
+    logging.info("Stitching contraction tiles")
+    start_time = time.perf_counter()
+    db.execute_procedure(
+        "stitch_contraction_tiles",
+        (target_area_id, "smallint"),
+        (target_area_srid, "integer"),
+        (fill_speed, "boolean"),
+        (previous_max_edge_id, "integer"),
+        (json.dumps(phase_durations), "jsonb"),
+    )
+    timings["stitch"] = time.perf_counter() - start_time
+
+    if tiles:
+        slowest_tile = max(timings["tiles"], key=timings["tiles"].get)
+        logging.info(
+            f"Tiled contraction: prepare {timings['prepare']:.2f} s, tiles {sum(timings['tiles'].values()):.2f} s "
+            f"in total (slowest tile {slowest_tile}: {timings['tiles'][slowest_tile]:.2f} s), "
+            f"stitch {timings['stitch']:.2f} s"
+        )
+    return timings
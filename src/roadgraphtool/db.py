@@ -1,4 +1,5 @@
 import atexit
+import io
 import logging
 import os
 import select
@@ -830,6 +831,46 @@ class Database(object):
                 **kwargs,
             )
 
+    @connect_db_if_required
+    def copy_dataframe_to_db_table(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        schema: str = 'public',
+        chunk_size: int = 1_000_000,
+    ) -> None:
+        """
+        Append DataFrame rows to an existing table using COPY ... FROM STDIN.
+
+        Much faster than dataframe_to_db_table for large frames, but the table has to exist and the DataFrame
+        columns have to match (by name) a subset of the table columns. The index is not stored. Missing values
+        are loaded as NULL. Geometry columns have to be converted to WKT/EWKT or hex WKB beforehand.
+        """
+        if len(df) == 0:
+            return
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        copy_sql = psycopg2.sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+            psycopg2.sql.Identifier(schema, table_name),
+            psycopg2.sql.SQL(", ").join(psycopg2.sql.Identifier(str(c)) for c in df.columns),
+        )
+
+        cursor = self._psycopg2_connection.cursor()
+        try:
+            for start in tqdm(range(0, len(df), chunk_size), desc=f"COPY {table_name}"):
+                buffer = io.StringIO()
+                df.iloc[start : start + chunk_size].to_csv(buffer, index=False, header=False, na_rep='\\N')
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+            self._psycopg2_connection.commit()
+        except Exception:
+            self._psycopg2_connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
     @connect_db_if_required
     def db_table_to_pandas(self, table_name: str, **kwargs) -> pd.DataFrame:
         return pd.read_sql_table(table_name, con=self._sqlalchemy_engine, **kwargs)
@@ -55,6 +55,7 @@ def get_map_edges_from_db(config: dict, schema='public') -> gpd.GeoDataFrame:
         SELECT * FROM select_network_nodes_in_area({config.area_id}::smallint);
     
         SELECT
+            edges.id AS db_id,
             from_nodes.id AS u,
             to_nodes.id AS v,
             "from" AS db_id_from,
@@ -81,6 +82,39 @@ def get_map_edges_from_db(config: dict, schema='public') -> gpd.GeoDataFrame:
 
 
 
+def get_map_nodes_edges_from_db(config: dict, edges: pd.DataFrame, schema='public') -> pd.DataFrame:
+    """
+    Return the contracted nodes of the exported edges from the nodes_edges table.
+
+    Columns: db_id (contracted node), edge_db_id (edges.id) and u, v of the edge in the exported map.
+    """
+    logging.info("Fetching contracted nodes of the edges from db")
+    sql = f"""
+        SELECT
+            nodes_edges.node_id AS db_id,
+            nodes_edges.edge_id AS edge_db_id
+        FROM nodes_edges
+            JOIN edges ON edges.id = nodes_edges.edge_id
+        WHERE edges.area = {config.area_id}::smallint
+    """
+    db.set_schema(schema)
+    nodes_edges = db.execute_query_to_pandas(sql)
+    db.set_schema('public')
+    return nodes_edges.merge(
+        edges.loc[:, ['db_id', 'u', 'v']].rename(columns={'db_id': 'edge_db_id'}), on='edge_db_id'
+    )
+
+
+def exports_nodes_edges(config) -> bool:
+    """
+    Whether the export writes nodes_edges.csv: `export.nodes_edges` if set, otherwise only when the contraction is
+    activated (nodes_edges is filled by the contraction, it is empty or stale for an area that was not contracted).
+    """
+    if hasattr(config.export, 'nodes_edges'):
+        return bool(config.export.nodes_edges)
+    return hasattr(config, 'contraction') and config.contraction.activated
+
+
 def add_node_highway_tags(nodes, G):
     for u, v, d in G.edges(data=True):
         if 'highway' in d.keys():
@@ -98,7 +132,9 @@ def _get_map_from_db(config) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
     return nodes, edges
 
 
-def _save_map_csv(map_dir: Path, nodes: gpd.GeoDataFrame, edges: pd.DataFrame):
+def _save_map_csv(
+    map_dir: Path, nodes: gpd.GeoDataFrame, edges: pd.DataFrame, nodes_edges: Optional[pd.DataFrame] = None
+):
     map_dir.mkdir(exist_ok=True, parents=True)
     nodes_path = map_dir / 'nodes.csv'
     logging.info("Saving map nodes to %s", nodes_path)
@@ -110,6 +146,11 @@ def _save_map_csv(map_dir: Path, nodes: gpd.GeoDataFrame, edges: pd.DataFrame):
     edges_for_export = edges.loc[:, edges.columns != 'geom']
     edges_for_export.to_csv(edges_path, sep='\t', index=False)
 
+    if nodes_edges is not None:
+        nodes_edges_path = map_dir / 'nodes_edges.csv'
+        logging.info("Saving contracted nodes of the edges to %s", nodes_edges_path)
+        nodes_edges.to_csv(nodes_edges_path, sep='\t', index=False)
+
 
 def _save_graph_shapefile(nodes: gpd.GeoDataFrame, edges: gpd.GeoDataFrame, shapefile_folder_path: Path):
     logging.info("Saving map shapefile to: %s", shapefile_folder_path.absolute())
@@ -143,6 +184,10 @@ def export(config: Dict) -> Optional[Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]]:
     # download and process map
     else:
         nodes, edges = _get_map_from_db(config)
+        nodes_edges = None
+        if exports_nodes_edges(config):
+            nodes_edges = get_map_nodes_edges_from_db(config, edges)
+            logging.info(f"{len(nodes_edges)} contracted nodes fetched from db")
 
         # save map to shapefile (for visualising)
         shapefile_folder_path = map_dir / "shapefiles"
@@ -150,6 +195,6 @@ def export(config: Dict) -> Optional[Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]]:
 
         # save data
         makedirs(area_dir, exist_ok=True)
-        _save_map_csv(map_dir, nodes, edges)
+        _save_map_csv(map_dir, nodes, edges, nodes_edges)
 
     return nodes, edges
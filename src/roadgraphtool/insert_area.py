@@ -1,4 +1,6 @@
 import argparse
+import hashlib
+import json
 import geojson
 from pathlib import Path
 import sys
@@ -9,7 +11,7 @@ import shapely.geometry as geometry
 from shapely.ops import linemerge, unary_union, polygonize
 from roadgraphtool import db
 from roadgraphtool.config import parse_config_file
-from roadgraphtool.overpass_client import elements_by_type, query_json_from_config
+from roadgraphtool.overpass_client import cache_dir_from_config, elements_by_type, query_json_from_config
 
 
 
@@ -134,7 +136,142 @@ def _overpass_rel_admin_level_if_fragment(boundary_source: Any) -> str:
     return f'(if: {" && ".join(conditions)})'
 
 
-def get_boundary_from_overpass(config: Dict[str, Any]) -> geometry.MultiPolygon:
+def _overpass_boundary_selection(
+    admin_boundary_name: str, enclosing_areas: list[str], admin_if: str
+) -> list[str]:
+    """Overpass QL statements selecting the admin boundary relation(s) into the ``.r`` set."""
+    # If enclosing_areas is provided, we progressively narrow the search by:
+    # - selecting the outermost enclosing area as an Overpass "area"
+    # - then selecting each next enclosing boundary relation within that area
+    # - converting that relation into an area (map_to_area) for further narrowing
+    # - finally selecting the target admin boundary relation within the final area
+    if enclosing_areas:
+        parts = [f'area["boundary"="administrative"]["name"="{enclosing_areas[0]}"];']
+        # Narrow further, if more than one enclosing area name is provided
+        for enclosing_name in enclosing_areas[1:]:
+            parts.append(f'area["boundary"="administrative"]["name"="{enclosing_name}"];')
+        parts.append(
+            f'rel(area){admin_if}["boundary"="administrative"]["name"="{admin_boundary_name}"]->.r;'
+        )
+        return parts
+    return [f'rel{admin_if}["boundary"="administrative"]["name"="{admin_boundary_name}"]->.r;']
+
+
+def _overpass_boundary_query(selection: list[str]) -> str:
+    # boundary ways with geometry, followed by the ids of the boundary relations (stored in the boundary cache)
+    return "\n".join(["[out:json][timeout:25];", *selection, "way(r.r);", "out geom;", ".r out ids;"])
+
+
+def _overpass_boundary_revalidation_query(selection: list[str], timestamp: str) -> str:
+    """
+    Query returning the ids of the boundary relations plus any boundary relation, way or node edited after
+    *timestamp*. The cached boundary is current iff it returns exactly the cached relation ids.
+    """
+    return "\n".join(
+        [
+            "[out:json][timeout:25];",
+            *selection,
+            "way(r.r)->.w;",
+            "node(w.w)->.n;",
+            f'(rel.r(newer:"{timestamp}"); way.w(newer:"{timestamp}"); node.n(newer:"{timestamp}"););',
+            "out ids;",
+            ".r out ids;",
+        ]
+    )
+
+
+def _boundary_cache_path(
+    config, admin_boundary_name: str, enclosing_areas: list[str], boundary_source: Any
+) -> Optional[Path]:
+    cache_dir = cache_dir_from_config(config)
+    if cache_dir is None:
+        return None
+    key = {
+        "admin_boundary_name": admin_boundary_name,
+        "enclosing_areas": enclosing_areas,
+        "min_admin_level": getattr(boundary_source, "min_admin_level", None),
+        "max_admin_level": getattr(boundary_source, "max_admin_level", None),
+    }
+    cache_key = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+    return cache_dir / "boundary_cache" / f"{cache_key}.json"
+
+
+def _read_cached_boundary(cache_path: Optional[Path]) -> Optional[Dict[str, Any]]:
+    if cache_path is None or not cache_path.exists():
+        return None
+    try:
+        with cache_path.open("r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    # the boundary geometry is decoded only when it is used
+    if not all(key in cached for key in ("timestamp_osm_base", "relation_ids", "wkb")):
+        logging.warning("Ignoring unreadable boundary cache file %s", cache_path)
+        return None
+    return cached
+
+
+def _write_cache_file(cache_path: Path, cached: Dict[str, Any]) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(cached, f)
+    tmp_path.replace(cache_path)
+
+
+def _write_cached_boundary(
+    cache_path: Path, timestamp: str, relation_ids: list[int], boundary: geometry.MultiPolygon
+) -> None:
+    # a new boundary has no area yet, the area is matched by geometry and stored by _store_cached_area_id
+    _write_cache_file(
+        cache_path,
+        {
+            "timestamp_osm_base": timestamp,
+            "relation_ids": relation_ids,
+            "wkb": shapely.to_wkb(boundary, hex=True),
+        },
+    )
+
+
+def _store_cached_area_id(cache_path: Optional[Path], area_id: int) -> None:
+    """Record the area of the cached boundary, so that the next run can reuse it without the boundary geometry."""
+    cached = _read_cached_boundary(cache_path)
+    if cached is None:
+        return
+    cached["area_id"] = area_id
+    _write_cache_file(cache_path, cached)
+
+
+def _cached_boundary_is_current(config, selection: list[str], cached: Dict[str, Any]) -> bool:
+    query = _overpass_boundary_revalidation_query(selection, cached["timestamp_osm_base"])
+    by_type = elements_by_type(query_json_from_config(config, query, build=False, refresh_cache=True))
+    if by_type["node"] or by_type["way"]:
+        return False
+    # an edited relation is returned twice (as edited and as a member of .r)
+    relation_ids = [int(r["id"]) for r in by_type["relation"]]
+    return len(relation_ids) == len(set(relation_ids)) and sorted(relation_ids) == sorted(cached["relation_ids"])
+
+
+def _assemble_boundary_polygons(ways: list[dict], admin_boundary_name: str) -> list[geometry.Polygon]:
+    lss = []  # convert ways to linestrings
+    for way in ways:
+        geom_coords = way.get("geometry", [])
+        if not geom_coords:
+            continue
+        ls_coords = [(float(c["lon"]), float(c["lat"])) for c in geom_coords if "lon" in c and "lat" in c]
+        if len(ls_coords) >= 2:
+            lss.append(geometry.LineString(ls_coords))
+
+    if not lss:
+        raise Exception(f"The area '{admin_boundary_name}' was found but no geometry could be constructed.")
+
+    merged = linemerge([*lss])  # merge LineStrings
+    borders = unary_union(merged)  # linestrings to a MultiLineString
+    return list(polygonize(borders))
+
+
+def _overpass_boundary_cache(config: Dict[str, Any]) -> tuple[str, list[str], Optional[Path]]:
+    """Return the admin boundary name, the Overpass selection of the boundary and the boundary cache path."""
     if not hasattr(config.area_insert.boundary_source, "admin_boundary_name"):
         raise ValueError("""
         Admin boundary name not specified in config. Should be in config.area_insert.boundary_source.admin_boundary_name.
@@ -164,57 +301,56 @@ def get_boundary_from_overpass(config: Dict[str, Any]) -> geometry.MultiPolygon:
                 raise ValueError("Each enclosing_areas entry must be a string area name.")
     # Query administrative boundary relation ways with geometry.
     # We avoid relying on client-side XML parsing and instead parse Overpass JSON.
-    #
-    # If enclosing_areas is provided, we progressively narrow the search by:
-    # - selecting the outermost enclosing area as an Overpass "area"
-    # - then selecting each next enclosing boundary relation within that area
-    # - converting that relation into an area (map_to_area) for further narrowing
-    # - finally selecting the target admin boundary relation within the final area
-    if enclosing_areas:
-        parts = [
-            "[out:json][timeout:25];",
-            f'area["boundary"="administrative"]["name"="{enclosing_areas[0]}"];',
-        ]
-        # Narrow further, if more than one enclosing area name is provided
-        for enclosing_name in enclosing_areas[1:]:
-            parts.append(f'area["boundary"="administrative"]["name"="{enclosing_name}"];')
+    selection = _overpass_boundary_selection(admin_boundary_name, enclosing_areas, admin_if)
+    cache_path = _boundary_cache_path(config, admin_boundary_name, enclosing_areas, boundary_source)
+    return admin_boundary_name, selection, cache_path
 
-        parts.append(
-            f'rel(area){admin_if}["boundary"="administrative"]["name"="{admin_boundary_name}"]->.r;'
-        )
-        parts.append("way(r.r);")
-        parts.append("out geom;")
-        query = "\n".join(parts)
-    else:
-        query = f"""
-        [out:json][timeout:25];
-        rel{admin_if}["boundary"="administrative"]["name"="{admin_boundary_name}"]->.r;
-        way(r.r);
-        out geom;
-        """
-    overpass_json = query_json_from_config(config, query, build=False)
-    by_type = elements_by_type(overpass_json)
-    ways = by_type["way"]
 
-    if not ways:
-        logging.error(f"The area '{admin_boundary_name}' was not found in Overpass (no boundary ways returned).")
-        raise Exception(f"The area '{admin_boundary_name}' was not found in Overpass.")
+def get_cached_area_id(config: Dict[str, Any], name: str) -> Optional[int]:
+    """
+    Return the area stored for the cached Overpass boundary if the area still exists and the boundary is current.
 
-    lss = []  # convert ways to linestrings
-    for way in ways:
-        geom_coords = way.get("geometry", [])
-        if not geom_coords:
-            continue
-        ls_coords = [(float(c["lon"]), float(c["lat"])) for c in geom_coords if "lon" in c and "lat" in c]
-        if len(ls_coords) >= 2:
-            lss.append(geometry.LineString(ls_coords))
+    Only the area id and the Overpass timestamp of the cache entry are checked, the boundary geometry is neither
+    downloaded nor assembled.
+    """
+    _, selection, cache_path = _overpass_boundary_cache(config)
+    cached = _read_cached_boundary(cache_path)
+    if cached is None or cached.get("area_id") is None:
+        return None
+    rows = db.db.execute_sql_and_fetch_all_rows(
+        "SELECT id FROM areas WHERE id = :id AND name = :name", {"id": cached["area_id"], "name": name}
+    )
+    if not rows or not _cached_boundary_is_current(config, selection, cached):
+        return None
+    return int(cached["area_id"])
 
-    if not lss:
-        raise Exception(f"The area '{admin_boundary_name}' was found but no geometry could be constructed.")
 
-    merged = linemerge([*lss])  # merge LineStrings
-    borders = unary_union(merged)  # linestrings to a MultiLineString
-    polygons = list(polygonize(borders))
+def get_boundary_from_overpass(config: Dict[str, Any]) -> geometry.MultiPolygon:
+    admin_boundary_name, selection, cache_path = _overpass_boundary_cache(config)
+
+    # The assembled boundary is cached (as WKB) next to the Overpass query cache. It is reused as long as no
+    # boundary relation, way or node was edited after the Overpass timestamp of the cached result.
+    cached = _read_cached_boundary(cache_path)
+    if cached is not None and _cached_boundary_is_current(config, selection, cached):
+        logging.info("Using cached boundary of '%s' (%s)", admin_boundary_name, cached["timestamp_osm_base"])
+        polygons = list(shapely.from_wkb(bytes.fromhex(cached["wkb"])).geoms)
+    else:
+        overpass_json = query_json_from_config(
+            config, _overpass_boundary_query(selection), build=False, refresh_cache=cached is not None
+        )
+        by_type = elements_by_type(overpass_json)
+        ways = by_type["way"]
+
+        if not ways:
+            logging.error(f"The area '{admin_boundary_name}' was not found in Overpass (no boundary ways returned).")
+            raise Exception(f"The area '{admin_boundary_name}' was not found in Overpass.")
+
+        polygons = _assemble_boundary_polygons(ways, admin_boundary_name)
+
+        timestamp = overpass_json.get("osm3s", {}).get("timestamp_osm_base")
+        if cache_path is not None and timestamp:
+            relation_ids = sorted(int(r["id"]) for r in by_type["relation"])
+            _write_cached_boundary(cache_path, timestamp, relation_ids, geometry.MultiPolygon(polygons))
 
     allow_multipolygon = False
     if hasattr(config, "area_insert") and hasattr(config.area_insert, "allow_multipolygon"):
@@ -227,6 +363,7 @@ def get_boundary_from_overpass(config: Dict[str, Any]) -> geometry.MultiPolygon:
         )
     return geometry.MultiPolygon(polygons)
 
+
 def get_boundary_geojson(config):
     if not hasattr(config.area_insert, "boundary_source"):
         raise ValueError("""
@@ -269,10 +406,47 @@ def get_boundary_geojson(config):
 
         return result[0][0]
 
+def get_matching_area_id(name: str, geom: Union[geojson.Feature, geojson.FeatureCollection]) -> Optional[int]:
+    """Return the id of an existing area with the same *name* and an equal geometry, None if there is none."""
+    rows = db.db.execute_sql_and_fetch_all_rows(
+        """
+        SELECT id FROM areas
+        WHERE name = :name
+            AND geom IS NOT NULL
+            AND geom ~= ST_GeomFromGeoJSON(:geom)
+            AND ST_Equals(geom, ST_GeomFromGeoJSON(:geom))
+        ORDER BY id
+        LIMIT 1
+        """,
+        {"name": name, "geom": geojson.dumps(geom)},
+    )
+    return int(rows[0][0]) if rows else None
+
+
 def genereate_area(config, description: str = None) -> int:
+    from_overpass = config.area_insert.boundary_source.type == "overpass"
+    if from_overpass:
+        # cheap lookup by the area recorded in the boundary cache, the boundary is built only on a miss
+        area_id = get_cached_area_id(config, config.area_insert.name)
+        if area_id is not None:
+            logging.info("Area '%s' of the cached boundary is current (id %s), reusing it.",
+                         config.area_insert.name, area_id)
+            return area_id
+
     boundary_geom = get_boundary_geojson(config)
 
-    area_id = insert_area(name=config.area_insert.name, description=description, geom=boundary_geom)
+    area_id = None
+    if from_overpass:
+        area_id = get_matching_area_id(config.area_insert.name, boundary_geom)
+        if area_id is not None:
+            logging.info("Area '%s' with the same boundary already exists (id %s), reusing it.",
+                         config.area_insert.name, area_id)
+
+    if area_id is None:
+        area_id = insert_area(name=config.area_insert.name, description=description, geom=boundary_geom)
+
+    if from_overpass:
+        _store_cached_area_id(_overpass_boundary_cache(config)[2], area_id)
 
     return area_id
 
@@ -0,0 +1,166 @@
+"""
+In-process neighborhood speed assignment, an alternative to the `compute_speeds_from_neighborhood_segments` SQL
+procedure.
+
+The road segments of the area and their known speeds (quality 1 and 2) are fetched once. Segments without speed get
+the mean speed of the known segments within 10 m (quality 3), then within 200 m (quality 4), and the remaining ones the
+mean speed of all known segments (quality 5), as in the SQL procedure. The neighbors are found with a
+`scipy.spatial.cKDTree` ball query around the segment midpoints, the candidates are checked with the exact segment
+distance and the means are computed with `np.bincount`. The result is written to `nodes_ways_speeds` with COPY.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.spatial import cKDTree
+
+from roadgraphtool.db import db
+
+NEIGHBORHOOD_SPEED_ENGINES = ("sql", "python")
+# (distance in units of the area SRID, quality) of the neighborhood passes
+NEIGHBORHOOD_PASSES = ((10, 3), (200, 4))
+AVERAGE_SPEED_QUALITY = 5
+
+
+def get_neighbor_pairs(
+        query_geoms: np.ndarray, known_geoms: np.ndarray, distance: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the index pairs ``(query_index, known_index)`` of the geometries that are at most *distance* apart.
+
+    The known geometries are sampled by points at most *distance* apart and indexed in a KD-tree. For a query
+    geometry, any point of a known geometry within *distance* is closer than ``1.5 * distance + length / 2`` to the
+    query midpoint, so the ball query returns all the candidates, which are then filtered by the exact distance.
+    """
+    if len(query_geoms) == 0 or len(known_geoms) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    sample_counts = np.ceil(shapely.length(known_geoms) / distance).astype(np.int64) + 1
+    sample_parent = np.repeat(np.arange(len(known_geoms)), sample_counts)
+    sample_position = np.arange(len(sample_parent)) - np.repeat(np.cumsum(sample_counts) - sample_counts, sample_counts)
+    sample_fraction = sample_position / np.maximum(sample_counts - 1, 1)[sample_parent]
+    samples = shapely.line_interpolate_point(known_geoms[sample_parent], sample_fraction, normalized=True)
+    tree = cKDTree(shapely.get_coordinates(samples))
+
+    midpoints = shapely.get_coordinates(shapely.line_interpolate_point(query_geoms, 0.5, normalized=True))
+    radii = 1.5 * distance + shapely.length(query_geoms) / 2
+    candidates = tree.query_ball_point(midpoints, radii, return_sorted=False, workers=-1)
+
+    candidate_counts = np.fromiter((len(c) for c in candidates), dtype=np.int64, count=len(candidates))
+    if candidate_counts.sum() == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    query_index = np.repeat(np.arange(len(query_geoms)), candidate_counts)
+    known_index = sample_parent[np.concatenate([c for c in candidates if len(c) > 0]).astype(np.int64)]
+
+    # a known geometry is usually a candidate through several of its samples
+    pair_keys = np.unique(query_index * len(known_geoms) + known_index)
+    query_index, known_index = np.divmod(pair_keys, len(known_geoms))
+    within = shapely.distance(query_geoms[query_index], known_geoms[known_index]) <= distance
+    return query_index[within], known_index[within]
+
+
+def compute_neighborhood_speeds(segments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the speeds of the segments without speed from the speeds of their neighbors.
+
+    *segments* has the columns from_id, to_id, geom (shapely geometries), speed, st_dev and quality, the speed
+    columns are missing for segments without speed. Only segments with quality 1 or 2 are used as neighbors. Returns
+    the new rows of `nodes_ways_speeds` (from_node_ways_id, to_node_ways_id, speed, st_dev, quality,
+    source_records_count).
+    """
+    known = segments[segments["quality"] <= 2]
+    unassigned = segments[segments["speed"].isna()]
+    known_geoms = known["geom"].to_numpy()
+    known_speed = known["speed"].to_numpy(dtype=np.float64)
+    known_st_dev = known["st_dev"].to_numpy(dtype=np.float64)
+    logging.info(f"{len(unassigned)} segments without speed, {len(known)} segments with speed")
+
+    results = []
+    remaining = np.ones(len(unassigned), dtype=bool)
+    for distance, quality in NEIGHBORHOOD_PASSES:
+        query_positions = np.flatnonzero(remaining)
+        query_index, known_index = get_neighbor_pairs(
+            unassigned["geom"].to_numpy()[query_positions], known_geoms, distance
+        )
+        counts = np.bincount(query_index, minlength=len(query_positions))
+        assigned = counts > 0
+        speed = np.bincount(query_index, weights=known_speed[known_index], minlength=len(query_positions))
+        st_dev = np.bincount(query_index, weights=known_st_dev[known_index], minlength=len(query_positions))
+
+        positions = query_positions[assigned]
+        results.append(pd.DataFrame({
+            "from_node_ways_id": unassigned["from_id"].to_numpy()[positions],
+            "to_node_ways_id": unassigned["to_id"].to_numpy()[positions],
+            "speed": speed[assigned] / counts[assigned],
+            "st_dev": st_dev[assigned] / counts[assigned],
+            "quality": quality,
+            "source_records_count": counts[assigned],
+        }))
+        remaining[positions] = False
+        logging.info(f"speed from neighborhood within {distance} computed for {len(positions)} segments")
+
+    positions = np.flatnonzero(remaining)
+    if len(positions) > 0 and len(known) == 0:
+        logging.warning(f"No segments with speed, {len(positions)} segments left without speed")
+    elif len(positions) > 0:
+        results.append(pd.DataFrame({
+            "from_node_ways_id": unassigned["from_id"].to_numpy()[positions],
+            "to_node_ways_id": unassigned["to_id"].to_numpy()[positions],
+            "speed": known_speed.mean(),
+            "st_dev": known_st_dev.mean(),
+            "quality": AVERAGE_SPEED_QUALITY,
+            "source_records_count": len(known),
+        }))
+        logging.info(f"Average speed assigned to {len(positions)} segments")
+
+    return pd.concat(results, ignore_index=True)
+
+
+def get_area_segments(target_area_id: int, target_area_srid: int) -> pd.DataFrame:
+    """
+    Return the road segments of the area in *target_area_srid* with their speeds from `nodes_ways_speeds`.
+
+    The segments are read from `node_segments`, refreshed by `refresh_node_segments` first.
+    """
+    db.execute_procedure("refresh_node_segments", (target_area_id, "smallint"), (target_area_srid, "int"))
+    segments = db.execute_query_to_pandas(f"""
+        SELECT
+            node_segments.from_id,
+            node_segments.to_id,
+            st_ashexewkb(node_segments.geom) AS geom,
+            nodes_ways_speeds.speed,
+            nodes_ways_speeds.st_dev,
+            nodes_ways_speeds.quality
+        FROM node_segments
+            LEFT JOIN nodes_ways_speeds ON
+                    node_segments.from_id = nodes_ways_speeds.from_node_ways_id
+                AND node_segments.to_id = nodes_ways_speeds.to_node_ways_id
+        WHERE node_segments.area = {target_area_id}
+    """)
+    segments["geom"] = shapely.from_wkb(segments["geom"].to_numpy())
+    return segments
+
+
+def compute_speeds_from_neighborhood_segments(target_area_id: int, target_area_srid: int):
+    """
+    Assign speeds to the segments of the area without speed and store them in `nodes_ways_speeds`.
+
+    The in-process counterpart of the `compute_speeds_from_neighborhood_segments` SQL procedure, with the same
+    parameters. *target_area_srid* should be a metric SRID, the neighborhood distances are in its units.
+    """
+    if target_area_id is None:
+        raise ValueError("target_area_id cannot be None")
+    if target_area_srid is None:
+        raise ValueError("target_area_srid cannot be None")
+    if len(db.execute_sql_and_fetch_all_rows(f"SELECT 1 FROM areas WHERE id = {target_area_id}")) == 0:
+        logging.info(f"area {target_area_id} does not exist, no speeds computed")
+        return
+
+    logging.info("Fetching segments")
+    segments = get_area_segments(target_area_id, target_area_srid)
+    logging.info(f"{len(segments)} segments fetched")
+
+    speeds = compute_neighborhood_speeds(segments)
+    db.copy_dataframe_to_db_table(speeds, "nodes_ways_speeds")
+    logging.info(f"{len(speeds)} speeds stored in nodes_ways_speeds")
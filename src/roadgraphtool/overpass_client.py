@@ -168,22 +168,28 @@ def query_json(
         attempt += 1
 
 
-def query_json_from_config(config: Any, query: str, *, build: bool = False) -> dict[str, Any]:
-    policy = policy_config_from_config(config)
-    api = create_api(policy)
-
+def cache_dir_from_config(config: Any) -> Path | None:
+    """Directory for cached Overpass results: ``export.dir`` or ``output_dir``, None if neither is set."""
     export = getattr(config, "export", None)
-    output_dir = None
     if export is not None and hasattr(export, "dir"):
-        output_dir = Path(export.dir)
-    elif hasattr(config, "output_dir"):
-        output_dir = Path(getattr(config, "output_dir"))
+        return Path(export.dir)
+    if hasattr(config, "output_dir"):
+        return Path(getattr(config, "output_dir"))
+    return None
+
+
+def query_json_from_config(
+    config: Any, query: str, *, build: bool = False, refresh_cache: bool = False
+) -> dict[str, Any]:
+    policy = policy_config_from_config(config)
+    api = create_api(policy)
 
     return query_json(
         api,
         query,
         build=build,
-        cache_dir=output_dir,
+        cache_dir=cache_dir_from_config(config),
+        refresh_cache=refresh_cache,
         max_retries=policy.max_retries,
         retry_backoff_s=policy.retry_backoff_s,
         retry_max_sleep_s=policy.retry_max_sleep_s,
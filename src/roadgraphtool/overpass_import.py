@@ -1,8 +1,10 @@
+import json
 import logging
-from typing import Dict, Iterable, List, Sequence, Set
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 from shapely import geometry
 
 from roadgraphtool.db import db
@@ -45,6 +47,22 @@ def _overpass_timeout_s(config) -> int:
     return 25
 
 
+def _road_network_query(polys: Sequence[geometry.Polygon], timeout: int) -> str:
+    """Overpass QL selecting highway ways inside *polys* together with their nodes."""
+    way_lines = "\n".join(
+        f'        way[{_HIGHWAY_FILTER}](poly:"{_poly_to_overpass_arg(p)}");'
+        for p in polys
+    )
+    return f"""
+[out:json][timeout:{timeout}];
+(
+{way_lines}
+);
+(._;>;);
+out body;
+"""
+
+
 def _configured_tag_keys(config) -> List[str]:
     road_import = getattr(config, "road_import", None)
     tag_keys = getattr(road_import, "tags", []) if road_import is not None else []
@@ -65,154 +83,166 @@ def _configured_tag_keys(config) -> List[str]:
     return keys
 
 
-def _ensure_tag_ids(tag_keys: Sequence[str]) -> Dict[str, int]:
-    tag_ids = {}
-    for key in tag_keys:
-        db.execute_sql(
-            'INSERT INTO tags ("key") VALUES (:key) ON CONFLICT ("key") DO NOTHING',
-            {"key": key},
-        )
-        rows = db.execute_sql_and_fetch_all_rows(
-            'SELECT id FROM tags WHERE "key" = :key',
-            {"key": key},
-        )
-        if rows:
-            tag_ids[key] = int(rows[0][0])
-    return tag_ids
-
-
-def _tag_rows(
-    elements: Iterable[dict],
-    id_column: str,
-    tag_ids: Dict[str, int],
-    allowed_ids: Set[int],
-) -> List[dict]:
-    rows = []
-    for element in elements:
-        element_id = element.get("id")
-        element_tags = element.get("tags") or {}
-        if element_id is None or int(element_id) not in allowed_ids or not isinstance(element_tags, dict):
-            continue
+# Same layout as the tables created by the 'pipeline' osm2pgsql style, so that the import can be merged into
+# the target schema by process_osm.postprocess_osm_import. Tags are stored as jsonb instead of hstore.
+_STAGING_TABLES_SQL = """
+    DROP TABLE IF EXISTS "{schema}".nodes, "{schema}".ways, "{schema}".relations, "{schema}".nodes_ways;
+
+    CREATE TABLE "{schema}".nodes (
+        id bigint NOT NULL,
+        tags jsonb,
+        geom geometry(Point, 4326) NOT NULL
+    );
+
+    CREATE TABLE "{schema}".ways (
+        id bigint NOT NULL,
+        tags jsonb,
+        geom geometry(Geometry, 4326) NOT NULL,
+        "from" bigint NOT NULL,
+        "to" bigint NOT NULL,
+        oneway boolean
+    );
+
+    CREATE TABLE "{schema}".relations (
+        id bigint NOT NULL,
+        tags jsonb,
+        members jsonb
+    );
+
+    CREATE TABLE "{schema}".nodes_ways (
+        way_id bigint NOT NULL,
+        node_id bigint NOT NULL,
+        "position" smallint
+    );
+"""
+
+
+def _staging_tags(element: dict, tag_keys: Sequence[str]) -> Optional[str]:
+    """JSON object with the configured tags of *element*, None if it has none of them."""
+    element_tags = element.get("tags")
+    if not tag_keys or not isinstance(element_tags, dict):
+        return None
+    tags = {key: str(element_tags[key]) for key in tag_keys if element_tags.get(key) is not None}
+    return json.dumps(tags, ensure_ascii=False) if tags else None
 
-        for key, tag_id in tag_ids.items():
-            if key in element_tags and element_tags[key] is not None:
-                rows.append(
-                    {
-                        id_column: int(element_id),
-                        "tag_id": tag_id,
-                        "tag_value": str(element_tags[key]),
-                    }
-                )
-    return rows
 
+def _hex_ewkb(geoms: np.ndarray) -> np.ndarray:
+    return shapely.to_wkb(shapely.set_srid(geoms, 4326), hex=True, include_srid=True)
 
-def _import_configured_tags(
-    nodes: Iterable[dict],
+
+def _staging_nodes(nodes: Iterable[dict], tag_keys: Sequence[str]) -> pd.DataFrame:
+    """Rows of the staging ``nodes`` table for Overpass *nodes* (nodes without coordinates are skipped)."""
+    ids = []
+    coords = []
+    tags = []
+    for node in nodes:
+        if "id" in node and "lat" in node and "lon" in node:
+            ids.append(int(node["id"]))
+            coords.append((float(node["lon"]), float(node["lat"])))
+            tags.append(_staging_tags(node, tag_keys))
+
+    geoms = np.array([], dtype=object)
+    if ids:
+        geoms = _hex_ewkb(shapely.points(np.array(coords, dtype=float)))
+    return pd.DataFrame({"id": np.array(ids, dtype="int64"), "tags": tags, "geom": geoms})
+
+
+def _staging_ways(
     ways: Iterable[dict],
+    node_coord: Dict[int, Tuple[float, float]],
     tag_keys: Sequence[str],
-    inserted_node_ids: Set[int],
-    inserted_way_ids: Set[int],
-) -> None:
-    if not tag_keys:
-        return
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rows of the staging ``ways`` and ``nodes_ways`` tables for Overpass *ways*.
+
+    Ways referencing a node that is not in *node_coord* or having less than two nodes are skipped, as they
+    cannot be stored consistently with the nodes.
+    """
+    way_ids = []
+    way_tags = []
+    way_from = []
+    way_to = []
+    nodes_ways_way_ids = []
+    nodes_ways_node_ids = []
+    nodes_ways_positions = []
+    coords = []
+    coord_way_index = []
 
-    logging.info("Importing configured Overpass tags: %s", ", ".join(tag_keys))
-    tag_ids = _ensure_tag_ids(tag_keys)
+    for way in ways:
+        way_nodes = [int(nid) for nid in way.get("nodes", [])]
+        if len(way_nodes) < 2 or any(nid not in node_coord for nid in way_nodes):
+            continue
 
-    node_tag_rows = _tag_rows(nodes, "node_id", tag_ids, inserted_node_ids)
-    if node_tag_rows:
-        db.dataframe_to_db_table(pd.DataFrame(node_tag_rows), "nodes_tags", index=False)
+        way_id = int(way["id"])
+        way_ids.append(way_id)
+        way_tags.append(_staging_tags(way, tag_keys))
+        way_from.append(way_nodes[0])
+        way_to.append(way_nodes[-1])
+        nodes_ways_way_ids.extend([way_id] * len(way_nodes))
+        nodes_ways_node_ids.extend(way_nodes)
+        nodes_ways_positions.extend(range(len(way_nodes)))
+        coords.extend(node_coord[nid] for nid in way_nodes)
+        coord_way_index.extend([len(way_ids) - 1] * len(way_nodes))
+
+    nodes_ways_df = pd.DataFrame(
+        {
+            "way_id": np.array(nodes_ways_way_ids, dtype="int64"),
+            "node_id": np.array(nodes_ways_node_ids, dtype="int64"),
+            "position": np.array(nodes_ways_positions, dtype="int64"),
+        }
+    )
 
-    way_tag_rows = _tag_rows(ways, "way_id", tag_ids, inserted_way_ids)
-    if way_tag_rows:
-        db.dataframe_to_db_table(pd.DataFrame(way_tag_rows), "ways_tags", index=False)
+    geoms = np.array([], dtype=object)
+    if way_ids:
+        geoms = _hex_ewkb(shapely.linestrings(np.array(coords, dtype=float), indices=coord_way_index))
+    ways_df = pd.DataFrame(
+        {
+            "id": np.array(way_ids, dtype="int64"),
+            "tags": way_tags,
+            "geom": geoms,
+            "from": np.array(way_from, dtype="int64"),
+            "to": np.array(way_to, dtype="int64"),
+            "oneway": False,
+        }
+    )
+    return ways_df, nodes_ways_df
 
 
 def _run_overpass_backend(config, area_id: int, area_poly: geometry.base.BaseGeometry) -> int:
-    """Download highway ways inside *area_poly* from Overpass and insert into DB for *area_id*."""
+    """
+    Download highway ways inside *area_poly* from Overpass into the ``road_import.schema`` staging tables and
+    merge them into the target schema for *area_id*.
+    """
+    from roadgraphtool.process_osm import _ri_schema, postprocess_osm_import
+    from roadgraphtool.schema import add_postgis_extension, create_schema
+
     logging.info("Downloading road network from Overpass API for area_id=%s", area_id)
 
-    polys = _polygons_from_geom(area_poly)
-    timeout = _overpass_timeout_s(config)
-    way_lines = "\n".join(
-        f'        way[{_HIGHWAY_FILTER}](poly:"{_poly_to_overpass_arg(p)}");'
-        for p in polys
-    )
-    query = f"""
-[out:json][timeout:{timeout}];
-(
-{way_lines}
-);
-(._;>;);
-out body;
-"""
+    query = _road_network_query(_polygons_from_geom(area_poly), _overpass_timeout_s(config))
     overpass_json = query_json_from_config(config, query, build=False)
     by_type = elements_by_type(overpass_json)
-
-    nodes = by_type["node"]
-    ways = by_type["way"]
     tag_keys = _configured_tag_keys(config)
 
-    node_coord = {}
-    for n in nodes:
-        if "id" in n and "lat" in n and "lon" in n:
-            node_coord[int(n["id"])] = (float(n["lon"]), float(n["lat"]))
-    inserted_node_ids = set(node_coord)
-
-    logging.info("Importing %s nodes", len(node_coord))
-    node_list = [
-        {"id": node_id, "lat": lat, "lon": lon}
-        for node_id, (lon, lat) in node_coord.items()
-    ]
-    node_df = pd.DataFrame(node_list)
-    node_gdf = gpd.GeoDataFrame(node_df, geometry=gpd.points_from_xy(node_df.lon, node_df.lat), crs="EPSG:4326")
-    node_gdf.drop(columns=['lon', 'lat'], inplace=True)
-    node_gdf.rename(columns={'geometry': 'geom'}, inplace=True)
-    node_gdf.set_geometry('geom', inplace=True)
-    node_gdf.set_index('id', inplace=True)
-    db.geodataframe_to_db_table(node_gdf, "nodes")
-
-    nodes_ways_list = []
-    ways_list = []
-    inserted_way_ids = set()
-
-    logging.info("Importing %s ways", len(ways))
-    for way in ways:
-        way_id = int(way["id"])
-        way_nodes = [int(nid) for nid in way.get("nodes", [])]
-        if not way_nodes:
-            continue
-
-        for position, node_id in enumerate(way_nodes):
-            nodes_ways_list.append(
-                {'node_id': node_id, 'way_id': way_id, 'position': position}
-            )
-
-        coords = [node_coord.get(nid) for nid in way_nodes]
-        coords = [c for c in coords if c is not None]
-        if len(coords) < 2:
-            continue
-        inserted_way_ids.add(way_id)
-        ways_list.append(
-            {
-                'id': way_id,
-                'geom': geometry.LineString(coords),
-                'area': area_id,
-                'from': way_nodes[0],
-                'to': way_nodes[-1],
-                'oneway': False}
-        )
-
-    ways_gdf = gpd.GeoDataFrame(ways_list, geometry='geom', crs="EPSG:4326")
-    ways_gdf.set_index('id', inplace=True)
-    db.geodataframe_to_db_table(ways_gdf, "ways", chunk_size=1000)
-
-    nodes_ways_df = pd.DataFrame(nodes_ways_list)
-    db.dataframe_to_db_table(nodes_ways_df, "nodes_ways", index=False)
-
-    _import_configured_tags(nodes, ways, tag_keys, inserted_node_ids, inserted_way_ids)
-
-    return area_id
+    nodes_df = _staging_nodes(by_type["node"], tag_keys)
+    node_coord = {
+        int(n["id"]): (float(n["lon"]), float(n["lat"]))
+        for n in by_type["node"]
+        if "id" in n and "lat" in n and "lon" in n
+    }
+    ways_df, nodes_ways_df = _staging_ways(by_type["way"], node_coord, tag_keys)
+
+    staging_schema = _ri_schema(config)
+    create_schema(staging_schema)
+    add_postgis_extension(staging_schema)
+    db.execute_sql(_STAGING_TABLES_SQL.format(schema=staging_schema), schema=f'"{staging_schema}", public')
+
+    logging.info("Importing %s nodes and %s ways into staging schema %s", len(nodes_df), len(ways_df), staging_schema)
+    db.copy_dataframe_to_db_table(nodes_df, "nodes", schema=staging_schema)
+    db.copy_dataframe_to_db_table(ways_df, "ways", schema=staging_schema)
+    db.copy_dataframe_to_db_table(nodes_ways_df, "nodes_ways", schema=staging_schema)
+
+    logging.info("Merging Overpass import into schema %s", config.schema)
+    return postprocess_osm_import(config, existing_area_id=area_id)
 
 
 def run_overpass_import(config, area_id: int):
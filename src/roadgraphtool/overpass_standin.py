@@ -0,0 +1,505 @@
+"""
+Local stand-in for the Overpass API.
+
+Answers the subset of Overpass QL emitted by Road Graph Tool from a local OSM file, so that the Overpass
+code paths (``query_json``, the Overpass road import backend and ``get_boundary_from_overpass``) can be
+benchmarked and load-tested without network access. Supported statements:
+
+- ``[out:json][timeout:...]`` settings,
+- ``way[...](poly:"...")`` inside a ``( ... );`` union,
+- ``(._;>;);`` recursion down to the way nodes,
+- ``area[...];`` followed by ``rel(area)(if: ...)[...]->.r;``,
+- ``rel(if: ...)[...]->.r;``, ``way(r.r)->.w;`` and ``node(w.w);``,
+- ``rel.r(newer:"...")`` style filters of a named input set by element timestamp,
+- ``out body;`` / ``out geom;`` / ``out ids;`` and ``.r out ...;``.
+
+Point ``overpass.endpoint`` in the config to the URL returned by ``running_standin`` (or to the server
+started by ``scripts/overpass_standin.py``).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import json
+import logging
+import re
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import shapely
+import shapely.geometry as geometry
+from shapely.ops import linemerge, polygonize, unary_union
+
+import roadgraphtool.exec
+
+
+@dataclass
+class OsmData:
+    """OSM elements held in memory, indexed by id."""
+
+    nodes: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    node_tags: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    ways: Dict[int, List[int]] = field(default_factory=dict)
+    way_tags: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    relations: Dict[int, List[Tuple[str, int, str]]] = field(default_factory=dict)
+    relation_tags: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    # last edit of the elements, keyed by ("node" | "way" | "rel", id)
+    element_timestamps: Dict[Tuple[str, int], str] = field(default_factory=dict)
+    timestamp: str = ""
+
+
+class OverpassQueryError(Exception):
+    """The query uses Overpass QL the stand-in does not understand."""
+
+
+def _parse_osm_xml(xml_path: Path) -> OsmData:
+    data = OsmData()
+    current_tags: Dict[str, str] = {}
+    current_refs: list = []
+
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        if event == "start":
+            if elem.tag in ("node", "way", "relation"):
+                current_tags = {}
+                current_refs = []
+            elif elem.tag == "osm":
+                data.timestamp = elem.get("timestamp", "")
+            continue
+
+        if elem.tag == "tag":
+            current_tags[elem.get("k")] = elem.get("v")
+        elif elem.tag == "nd":
+            current_refs.append(int(elem.get("ref")))
+        elif elem.tag == "member":
+            current_refs.append((elem.get("type"), int(elem.get("ref")), elem.get("role", "")))
+        elif elem.tag == "node":
+            node_id = int(elem.get("id"))
+            data.nodes[node_id] = (float(elem.get("lon")), float(elem.get("lat")))
+            if current_tags:
+                data.node_tags[node_id] = current_tags
+            if elem.get("timestamp"):
+                data.element_timestamps[("node", node_id)] = elem.get("timestamp")
+            elem.clear()
+        elif elem.tag == "way":
+            way_id = int(elem.get("id"))
+            data.ways[way_id] = current_refs
+            data.way_tags[way_id] = current_tags
+            if elem.get("timestamp"):
+                data.element_timestamps[("way", way_id)] = elem.get("timestamp")
+            elem.clear()
+        elif elem.tag == "relation":
+            relation_id = int(elem.get("id"))
+            data.relations[relation_id] = current_refs
+            data.relation_tags[relation_id] = current_tags
+            if elem.get("timestamp"):
+                data.element_timestamps[("rel", relation_id)] = elem.get("timestamp")
+            elem.clear()
+    return data
+
+
+def load_osm_file(input_file: Path) -> OsmData:
+    """
+    Load an OSM file into memory.
+
+    ``.osm`` files are parsed directly; other formats (``.osm.pbf``, ``.osm.bz2``) are first converted to
+    OSM XML with ``osmium cat``.
+    """
+    input_file = Path(input_file)
+    logging.info("Loading OSM data for the Overpass stand-in from %s", input_file)
+    if input_file.suffix == ".osm":
+        data = _parse_osm_xml(input_file)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xml_path = Path(tmp_dir) / "standin.osm"
+            roadgraphtool.exec.call_executable(
+                ["osmium", "cat", str(input_file), "-o", str(xml_path), "--overwrite"],
+                output_type=roadgraphtool.exec.ReturnContent.EXIT_CODE,
+            )
+            data = _parse_osm_xml(xml_path)
+
+    if not data.timestamp:
+        modified = datetime.datetime.fromtimestamp(input_file.stat().st_mtime, tz=datetime.timezone.utc)
+        data.timestamp = modified.strftime("%Y-%m-%dT%H:%M:%SZ")
+    logging.info(
+        "Loaded %s nodes, %s ways and %s relations", len(data.nodes), len(data.ways), len(data.relations)
+    )
+    return data
+
+
+_STATEMENT_RE = re.compile(
+    r"^(?P<type>node|way|rel|area)(?:\.(?P<input>\w+))?(?P<clauses>.*?)(?:->\.(?P<target>\w+))?$", re.S
+)
+_SET_OUTPUT_RE = re.compile(r"^\.(?P<set>\w+)\s+out\b(?P<mode>.*)$", re.S)
+_CLAUSE_RE = re.compile(r'\[(?:[^\]"]|"[^"]*")*\]|\((?:[^()"]|"[^"]*"|\([^()]*\))*\)')
+_TAG_FILTER_RE = re.compile(
+    r'^\[\s*(?P<neg>!)?"?(?P<key>[^"=!~\]]+?)"?\s*(?:(?P<op>=|!=|~|!~)\s*"?(?P<value>(?:[^"\\]|\\.)*?)"?)?\s*\]$'
+)
+_IF_CONDITION_RE = re.compile(r't\["(?P<key>[^"]+)"\]\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>-?\d+(?:\.\d+)?)')
+
+_NUMERIC_OPERATORS = {
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+
+def _split_statements(query: str) -> List[str]:
+    """Split Overpass QL on top-level ``;`` keeping ``( ... )`` blocks and quoted strings intact."""
+    statements = []
+    depth = 0
+    in_quotes = False
+    current = []
+    for char in query:
+        if char == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == ";" and depth == 0:
+                statement = "".join(current).strip()
+                if statement:
+                    statements.append(statement)
+                current = []
+                continue
+        current.append(char)
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _tag_matches(tags: Dict[str, str], tag_filter: str) -> bool:
+    match = _TAG_FILTER_RE.match(tag_filter)
+    if match is None:
+        raise OverpassQueryError(f"Unsupported tag filter: {tag_filter}")
+    key = match["key"].strip()
+    op = match["op"]
+    if op is None:
+        return (key not in tags) if match["neg"] else (key in tags)
+    value = match["value"]
+    if op == "=":
+        return tags.get(key) == value
+    if op == "!=":
+        return tags.get(key) != value
+    found = key in tags and re.search(value, tags[key]) is not None
+    return found if op == "~" else not found
+
+
+def _if_matches(tags: Dict[str, str], condition: str) -> bool:
+    for part in condition.split("&&"):
+        match = _IF_CONDITION_RE.search(part)
+        if match is None:
+            raise OverpassQueryError(f"Unsupported (if: ...) condition: {part.strip()}")
+        try:
+            tag_value = float(tags.get(match["key"], ""))
+        except ValueError:
+            return False
+        if not _NUMERIC_OPERATORS[match["op"]](tag_value, float(match["value"])):
+            return False
+    return True
+
+
+def _poly_from_overpass_arg(poly_arg: str) -> geometry.Polygon:
+    values = [float(v) for v in poly_arg.split()]
+    if len(values) % 2 or len(values) < 6:
+        raise OverpassQueryError("poly filter needs at least three 'lat lon' pairs")
+    return geometry.Polygon([(lon, lat) for lat, lon in zip(values[0::2], values[1::2])])
+
+
+class OverpassStandIn:
+    """Evaluates the supported Overpass QL subset against in-memory OSM data."""
+
+    def __init__(self, data: OsmData):
+        self.data = data
+        self._way_ids: List[int] = []
+        way_geoms = []
+        for way_id, node_ids in data.ways.items():
+            coords = [data.nodes[nid] for nid in node_ids if nid in data.nodes]
+            if not coords:
+                continue
+            self._way_ids.append(way_id)
+            way_geoms.append(geometry.LineString(coords) if len(coords) > 1 else geometry.Point(coords[0]))
+        self._way_geoms = way_geoms
+        self._way_tree = shapely.STRtree(way_geoms)
+        self._area_cache: Dict[int, Optional[geometry.base.BaseGeometry]] = {}
+
+    @classmethod
+    def from_file(cls, input_file: Path) -> "OverpassStandIn":
+        return cls(load_osm_file(input_file))
+
+    def _ways_in_polygon(self, poly: geometry.Polygon) -> Set[int]:
+        hits = self._way_tree.query(poly, predicate="intersects")
+        return {self._way_ids[i] for i in hits}
+
+    def _relation_area(self, relation_id: int) -> Optional[geometry.base.BaseGeometry]:
+        if relation_id not in self._area_cache:
+            lines = []
+            for member_type, ref, _ in self.data.relations.get(relation_id, []):
+                if member_type != "way" or ref not in self.data.ways:
+                    continue
+                coords = [self.data.nodes[nid] for nid in self.data.ways[ref] if nid in self.data.nodes]
+                if len(coords) > 1:
+                    lines.append(geometry.LineString(coords))
+            polygons = list(polygonize(unary_union(linemerge(lines)))) if lines else []
+            self._area_cache[relation_id] = unary_union(polygons) if polygons else None
+        return self._area_cache[relation_id]
+
+    def _relation_in_areas(self, relation_id: int, areas: List[geometry.base.BaseGeometry]) -> bool:
+        for member_type, ref, _ in self.data.relations.get(relation_id, []):
+            if member_type == "node" and ref in self.data.nodes:
+                member_geom = geometry.Point(self.data.nodes[ref])
+            elif member_type == "way" and ref in self.data.ways:
+                coords = [self.data.nodes[nid] for nid in self.data.ways[ref] if nid in self.data.nodes]
+                if not coords:
+                    continue
+                member_geom = geometry.LineString(coords) if len(coords) > 1 else geometry.Point(coords[0])
+            else:
+                continue
+            if any(area.intersects(member_geom) for area in areas):
+                return True
+        return False
+
+    def _evaluate(self, statement: str, sets: Dict[str, Dict[str, Set[int]]]) -> Dict[str, Set[int]]:
+        if statement.startswith("(") and statement.endswith(")"):
+            inner = statement[1:-1].strip()
+            if inner.replace(" ", "") == "._;>;":
+                result = {kind: set(ids) for kind, ids in sets["_"].items()}
+                for way_id in sets["_"]["way"]:
+                    result["node"].update(nid for nid in self.data.ways[way_id] if nid in self.data.nodes)
+                return result
+            result = {"node": set(), "way": set(), "rel": set(), "area": set()}
+            for sub_statement in _split_statements(inner):
+                sub_result = self._evaluate(sub_statement, sets)
+                for kind in result:
+                    result[kind] |= sub_result[kind]
+            return result
+
+        match = _STATEMENT_RE.match(statement)
+        if match is None:
+            raise OverpassQueryError(f"Unsupported statement: {statement}")
+        element_type = match["type"]
+        clauses = _CLAUSE_RE.findall(match["clauses"])
+        if _CLAUSE_RE.sub("", match["clauses"]).strip():
+            raise OverpassQueryError(f"Unsupported statement: {statement}")
+
+        tag_filters = [c for c in clauses if c.startswith("[")]
+        spatial_filters = [c[1:-1].strip() for c in clauses if c.startswith("(")]
+
+        if element_type == "way":
+            tag_source = self.data.way_tags
+        elif element_type in ("rel", "area"):
+            tag_source = self.data.relation_tags
+        else:
+            tag_source = self.data.node_tags
+
+        all_ids = self.data.nodes if element_type == "node" else tag_source
+        candidates: Optional[Set[int]] = None
+        if match["input"] is not None:
+            candidates = set(sets.get(match["input"], {}).get(element_type, ()))
+        if_conditions = []
+        for spatial_filter in spatial_filters:
+            if spatial_filter.startswith("poly:"):
+                if element_type != "way":
+                    raise OverpassQueryError("poly filter is only supported for ways")
+                poly_ids = self._ways_in_polygon(_poly_from_overpass_arg(spatial_filter[5:].strip().strip('"')))
+                candidates = poly_ids if candidates is None else candidates & poly_ids
+            elif spatial_filter.startswith("if:"):
+                if_conditions.append(spatial_filter[3:])
+            elif spatial_filter.startswith("area"):
+                set_name = spatial_filter[5:] if spatial_filter.startswith("area.") else "_"
+                areas = [
+                    a for a in (self._relation_area(rid) for rid in sets.get(set_name, {}).get("area", ())) if a
+                ]
+                ids = candidates if candidates is not None else set(all_ids)
+                candidates = {rid for rid in ids if areas and self._relation_in_areas(rid, areas)}
+            elif spatial_filter.startswith("newer:"):
+                since = spatial_filter[6:].strip().strip('"')
+                kind = "rel" if element_type == "area" else element_type
+                ids = candidates if candidates is not None else set(all_ids)
+                candidates = {
+                    element_id
+                    for element_id in ids
+                    if self.data.element_timestamps.get((kind, element_id), "") > since
+                }
+            elif element_type == "node" and re.fullmatch(r"w(\.\w+)?", spatial_filter):
+                set_name = spatial_filter[2:] if "." in spatial_filter else "_"
+                node_ids = {
+                    nid
+                    for way_id in sets.get(set_name, {}).get("way", ())
+                    for nid in self.data.ways[way_id]
+                    if nid in self.data.nodes
+                }
+                candidates = node_ids if candidates is None else candidates & node_ids
+            elif element_type == "way" and re.fullmatch(r"r(\.\w+)?", spatial_filter):
+                set_name = spatial_filter[2:] if "." in spatial_filter else "_"
+                member_ids = {
+                    ref
+                    for rid in sets.get(set_name, {}).get("rel", ())
+                    for member_type, ref, _ in self.data.relations[rid]
+                    if member_type == "way" and ref in self.data.ways
+                }
+                candidates = member_ids if candidates is None else candidates & member_ids
+            else:
+                raise OverpassQueryError(f"Unsupported filter: ({spatial_filter})")
+
+        if candidates is None:
+            candidates = set(all_ids)
+        selected = {
+            element_id
+            for element_id in candidates
+            if all(_tag_matches(tag_source.get(element_id, {}), f) for f in tag_filters)
+            and all(_if_matches(tag_source.get(element_id, {}), c) for c in if_conditions)
+        }
+        result = {"node": set(), "way": set(), "rel": set(), "area": set()}
+        result["area" if element_type == "area" else element_type] = selected
+        return result
+
+    def _output(self, selected: Dict[str, Set[int]], mode: str) -> List[dict]:
+        with_geometry = "geom" in mode.split()
+        if "ids" in mode.split():
+            return (
+                [{"type": "node", "id": i} for i in sorted(selected["node"])]
+                + [{"type": "way", "id": i} for i in sorted(selected["way"])]
+                + [{"type": "relation", "id": i} for i in sorted(selected["rel"])]
+            )
+        elements = []
+        for node_id in sorted(selected["node"]):
+            lon, lat = self.data.nodes[node_id]
+            element = {"type": "node", "id": node_id, "lat": lat, "lon": lon}
+            if node_id in self.data.node_tags:
+                element["tags"] = self.data.node_tags[node_id]
+            elements.append(element)
+        for way_id in sorted(selected["way"]):
+            node_ids = self.data.ways[way_id]
+            element = {"type": "way", "id": way_id, "nodes": node_ids}
+            if with_geometry:
+                coords = [self.data.nodes[nid] for nid in node_ids if nid in self.data.nodes]
+                element["geometry"] = [{"lat": lat, "lon": lon} for lon, lat in coords]
+            if self.data.way_tags.get(way_id):
+                element["tags"] = self.data.way_tags[way_id]
+            elements.append(element)
+        for relation_id in sorted(selected["rel"]):
+            element = {
+                "type": "relation",
+                "id": relation_id,
+                "members": [
+                    {"type": member_type, "ref": ref, "role": role}
+                    for member_type, ref, role in self.data.relations[relation_id]
+                ],
+            }
+            if self.data.relation_tags.get(relation_id):
+                element["tags"] = self.data.relation_tags[relation_id]
+            elements.append(element)
+        return elements
+
+    def run_query(self, query: str) -> Dict[str, Any]:
+        """Evaluate *query* and return Overpass JSON (``{"osm3s": ..., "elements": [...]}``)."""
+        empty = {"node": set(), "way": set(), "rel": set(), "area": set()}
+        sets: Dict[str, Dict[str, Set[int]]] = {"_": empty}
+        elements: List[dict] = []
+
+        for statement in _split_statements(query):
+            if statement.startswith("["):
+                if "[out:" in statement and "[out:json]" not in statement:
+                    raise OverpassQueryError("Only [out:json] is supported")
+                continue
+            if statement.startswith("out"):
+                elements.extend(self._output(sets["_"], statement[3:]))
+                continue
+            set_output = _SET_OUTPUT_RE.match(statement)
+            if set_output is not None:
+                elements.extend(self._output(sets.get(set_output["set"], empty), set_output["mode"]))
+                continue
+
+            target = "_"
+            target_match = re.search(r"->\.(\w+)\s*$", statement)
+            if target_match is not None:
+                target = target_match.group(1)
+            sets[target] = self._evaluate(statement, sets)
+
+        return {
+            "version": 0.6,
+            "generator": "roadgraphtool Overpass stand-in",
+            "osm3s": {
+                "timestamp_osm_base": self.data.timestamp,
+                "copyright": "The data included in this document is from www.openstreetmap.org. "
+                "The data is made available under ODbL.",
+            },
+            "elements": elements,
+        }
+
+
+class _OverpassRequestHandler(BaseHTTPRequestHandler):
+    standin: OverpassStandIn
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _answer(self, query: Optional[str]) -> None:
+        if query is None:
+            self._send(400, "Missing 'data' parameter", "text/plain; charset=utf-8")
+            return
+        try:
+            result = self.standin.run_query(query)
+        except OverpassQueryError as e:
+            logging.warning("Overpass stand-in rejected query: %s", e)
+            self._send(400, str(e), "text/plain; charset=utf-8")
+            return
+        self._send(200, json.dumps(result), "application/json")
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path.endswith("/status"):
+            self._send(200, "Connected as: 0\nRate limit: 0\n0 slots available now.\n", "text/plain")
+            return
+        self._answer(parse_qs(url.query).get("data", [None])[0])
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        self._answer(parse_qs(body).get("data", [None])[0])
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("Overpass stand-in: " + format, *args)
+
+
+def create_server(standin: OverpassStandIn, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Create (but do not start) an HTTP server answering Overpass requests. ``port=0`` picks a free port."""
+    handler = type("OverpassRequestHandler", (_OverpassRequestHandler,), {"standin": standin})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def endpoint_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/api/interpreter"
+
+
+@contextlib.contextmanager
+def running_standin(standin: OverpassStandIn, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Serve *standin* from a background thread and yield its interpreter endpoint URL."""
+    server = create_server(standin, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield endpoint_url(server)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -1,4 +1,5 @@
 import logging
+from pathlib import Path
 from typing import Optional, Dict, Any
 
 from roadgraphtool.db import db
@@ -6,6 +7,11 @@ import roadgraphtool.road_import
 import roadgraphtool.insert_area
 import roadgraphtool.export
 import roadgraphtool.distance_matrix_generator
+import roadgraphtool.contraction
+import roadgraphtool.strong_components
+import roadgraphtool.neighborhood_speeds
+import roadgraphtool.time_dependent_speeds
+import roadgraphtool.speed_coverage
 
 
 def insert_area_if_area_insertion_activated(config) -> Optional[int]:
@@ -20,10 +26,17 @@ def insert_area_if_area_insertion_activated(config) -> Optional[int]:
 
 
 def contract_graph_in_area(
-    target_area_id: int, target_area_srid: int, fill_speed: bool = True
+    target_area_id: int, target_area_srid: int, fill_speed: bool = True, engine: str = "sql"
 ):
+    if engine not in roadgraphtool.contraction.CONTRACTION_ENGINES:
+        raise ValueError(
+            f"Unsupported contraction engine {engine!r}; "
+            f"expected one of {', '.join(roadgraphtool.contraction.CONTRACTION_ENGINES)}"
+        )
     logging.info("Contracting graph")
-    if fill_speed:
+    if engine == "python":
+        roadgraphtool.contraction.contract_graph_in_area(target_area_id, target_area_srid, fill_speed)
+    elif fill_speed:
         db.execute_procedure(
             "contract_graph_in_area",
             (target_area_id, "smallint"),
@@ -39,6 +52,20 @@ def contract_graph_in_area(
     logging.info("Graph Contracted")
 
 
+def recontract_changed_ways(
+    target_area_id: int, target_area_srid: int, changed_way_ids: list, fill_speed: bool = False
+):
+    logging.info(f"Re-contracting graph around {len(changed_way_ids)} changed ways")
+    db.execute_procedure(
+        "recontract_changed_ways",
+        (target_area_id, "smallint"),
+        (target_area_srid, "int"),
+        (list(changed_way_ids), "bigint[]"),
+        (fill_speed, "boolean"),
+    )
+    logging.info("Graph re-contracted")
+
+
 def select_network_nodes_in_area(target_area_id: int) -> list:
     sql_query = (
         f"select * from select_network_nodes_in_area({target_area_id}::smallint)"
@@ -56,17 +83,32 @@ def assign_average_speed_to_all_segments_in_area(
     )
 
 
-def compute_strong_components(target_area_id: int):
+def compute_strong_components(target_area_id: int, engine: str = "sql", edge_selection: str = "geometry"):
+    if engine not in roadgraphtool.strong_components.STRONG_COMPONENTS_ENGINES:
+        raise ValueError(
+            f"Unsupported strong components engine {engine!r}; "
+            f"expected one of {', '.join(roadgraphtool.strong_components.STRONG_COMPONENTS_ENGINES)}"
+        )
+    if edge_selection not in roadgraphtool.strong_components.EDGE_SELECTIONS:
+        raise ValueError(
+            f"Unsupported edge selection {edge_selection!r}; "
+            f"expected one of {', '.join(roadgraphtool.strong_components.EDGE_SELECTIONS)}"
+        )
     logging.info("computing strong components for area_id = {}".format(target_area_id))
-    db.execute_procedure(
-        "compute_strong_components",
-        (target_area_id, "smallint"),
-    )
+    if engine == "scipy":
+        roadgraphtool.strong_components.compute_strong_components(target_area_id, edge_selection)
+    else:
+        db.execute_procedure(
+            "compute_strong_components",
+            (target_area_id, "smallint"),
+            (edge_selection, "text"),
+        )
     logging.info("storing the results in the component_data table")
 
 
 def compute_speeds_for_segments(
-        target_area_id: int, speed_records_dataset: int, hour: int, day_of_week: int
+        target_area_id: int, speed_records_dataset: int, hour: int, day_of_week: int,
+        speed_percentile: float | None = None
 ):
     db.execute_procedure(
         "compute_speeds_for_segments",
@@ -74,20 +116,69 @@ def compute_speeds_for_segments(
         (speed_records_dataset, "smallint"),
         (hour, "smallint"),
         (day_of_week, "smallint"),
+        (speed_percentile, "double precision"),
     )
 
 
-def compute_speeds_from_neighborhood_segments(
-        target_area_id: int, target_area_srid: int
+def compute_speeds_for_time_slots(
+        target_area_id: int, speed_records_dataset: int, hours: list[int], days_of_week: list[int] | None = None,
+        speed_percentile: float | None = None
+):
+    db.execute_procedure(
+        "compute_speeds_for_time_slots",
+        (target_area_id, "smallint"),
+        (speed_records_dataset, "smallint"),
+        (hours, "smallint[]"),
+        (days_of_week, "smallint[]"),
+        (speed_percentile, "double precision"),
+    )
+
+
+def complete_speeds_in_area(
+        target_area_id: int, target_area_srid: int, speed_records_dataset: int, hour: int,
+        day_of_week: int | None = None, speed_percentile: float | None = None
 ):
+    logging.info("completing speeds of all segments for area_id = {}".format(target_area_id))
     db.execute_procedure(
-        "compute_speeds_from_neighborhood_segments",
+        "complete_speeds_in_area",
         (target_area_id, "smallint"),
         (target_area_srid, "int"),
+        (speed_records_dataset, "smallint"),
+        (hour, "smallint"),
+        (day_of_week, "smallint"),
+        (speed_percentile, "double precision"),
     )
 
 
+def compute_speeds_from_neighborhood_segments(
+        target_area_id: int, target_area_srid: int, engine: str = "sql"
+):
+    if engine not in roadgraphtool.neighborhood_speeds.NEIGHBORHOOD_SPEED_ENGINES:
+        raise ValueError(
+            f"Unsupported neighborhood speed engine {engine!r}; "
+            f"expected one of {', '.join(roadgraphtool.neighborhood_speeds.NEIGHBORHOOD_SPEED_ENGINES)}"
+        )
+    logging.info("computing speeds from neighborhood segments for area_id = {}".format(target_area_id))
+    if engine == "python":
+        roadgraphtool.neighborhood_speeds.compute_speeds_from_neighborhood_segments(target_area_id, target_area_srid)
+    else:
+        db.execute_procedure(
+            "compute_speeds_from_neighborhood_segments",
+            (target_area_id, "smallint"),
+            (target_area_srid, "int"),
+        )
+
+
 def main(config: Dict[str, Any]):
+    # checked before the import steps, the tiled contraction runs only in the database
+    if hasattr(config, "contraction") and config.contraction.activated:
+        contraction_engine = getattr(config.contraction, "engine", "sql")
+        if getattr(config.contraction, "tile_size", None) and contraction_engine != "sql":
+            raise ValueError(
+                f"contraction.tile_size is supported only by the sql contraction engine, got engine "
+                f"{contraction_engine!r}"
+            )
+
     area_id = getattr(config, "area_id", None)
     area_id = insert_area_if_area_insertion_activated(config) or area_id
 
@@ -98,17 +189,51 @@ def main(config: Dict[str, Any]):
     if not area_id:
         area_id = config.area_id
 
+    if hasattr(config, "speed_completion") and config.speed_completion.activated:
+        complete_speeds_in_area(
+            area_id,
+            config.srid,
+            config.speed_completion.dataset,
+            config.speed_completion.hour,
+            getattr(config.speed_completion, "day_of_week", None),
+            getattr(config.speed_completion, "percentile", None),
+        )
+
+    # before the neighborhood speeds, so that the report shows the coverage by speeds from speed records
+    if hasattr(config, "speed_coverage") and config.speed_coverage.activated:
+        roadgraphtool.speed_coverage.export_speed_coverage_report(config, area_id)
+
+    if hasattr(config, "neighborhood_speeds") and config.neighborhood_speeds.activated:
+        compute_speeds_from_neighborhood_segments(
+            area_id, config.srid, getattr(config.neighborhood_speeds, "engine", "sql")
+        )
+
     if hasattr(config, "contraction") and config.contraction.activated:
-        contract_graph_in_area(area_id, config.srid, False)
+        tile_size = getattr(config.contraction, "tile_size", None)
+        if tile_size:
+            roadgraphtool.contraction.contract_graph_in_area_tiled(
+                area_id, config.srid, tile_size, getattr(config.contraction, "workers", None), False
+            )
+        else:
+            contract_graph_in_area(area_id, config.srid, False, getattr(config.contraction, "engine", "sql"))
+        if hasattr(config, "export"):
+            roadgraphtool.contraction.save_contraction_report(area_id, Path(config.export.dir))
 
     if hasattr(config, "strong_components") and config.strong_components.activated:
-        compute_strong_components(area_id)
+        compute_strong_components(
+            area_id,
+            getattr(config.strong_components, "engine", "sql"),
+            getattr(config.strong_components, "edge_selection", "geometry"),
+        )
 
     nodes = None
     edges = None
     if hasattr(config, "export") and config.export.activated:
         nodes, edges = roadgraphtool.export.export(config)
 
+    if hasattr(config, "time_dependent_speeds") and config.time_dependent_speeds.activated:
+        roadgraphtool.time_dependent_speeds.export_travel_time_matrix(config, edges)
+
     if hasattr(config, "dm_generator") and config.dm_generator.activated:
         roadgraphtool.distance_matrix_generator.generate_dm(config, nodes, edges)
     
@@ -354,7 +354,8 @@ def copy_nodes_ways(import_schema: str, target_schema: str, area_id: int):
             WHERE EXISTS
                 (SELECT id
                     FROM "{target_schema}".ways e
-                    WHERE i.way_id = e.id AND e.area = {area_id})'''
+                    WHERE i.way_id = e.id AND e.area = {area_id})
+            ON CONFLICT (way_id, "position") DO NOTHING'''
     logging.debug(f'Executing following SQL: {query}')
     result = db.execute_sql(query)
     logging.debug(f'Inserted rows: {result.rowcount}')
@@ -393,9 +394,9 @@ def _tags_column_kind(schema: str, table_name: str) -> Optional[str]:
 
 def _tag_sql_fragments(tag_column_kind: Optional[str]) -> tuple[str, str]:
     if tag_column_kind == "jsonb":
-        return "jsonb_exists(i.tags, :tag_key)", "i.tags ->> :tag_key"
+        return 'jsonb_exists(i.tags, tags."key")', 'i.tags ->> tags."key"'
     if tag_column_kind == "hstore":
-        return "exist(i.tags, :tag_key)", "i.tags -> :tag_key"
+        return 'exist(i.tags, tags."key")', 'i.tags -> tags."key"'
     raise ValueError(f"Unsupported tags column type: {tag_column_kind!r}")
 
 
@@ -404,34 +405,32 @@ def copy_tags(import_schema: str, target_schema: str, tag_keys: list[str]):
         return
 
     logging.debug("Copying configured tags")
-    for key in tag_keys:
-        db.execute_sql(
-            f'''
-            INSERT INTO "{target_schema}".tags ("key")
-            VALUES (:tag_key)
-            ON CONFLICT ("key") DO NOTHING
-            ''',
-            {"tag_key": key},
-        )
+    db.execute_sql(
+        f'''
+        INSERT INTO "{target_schema}".tags ("key")
+        SELECT DISTINCT unnest(CAST(:tag_keys AS text[]))
+        ON CONFLICT ("key") DO NOTHING
+        ''',
+        {"tag_keys": list(tag_keys)},
+    )
 
     for source_table, relation_table, id_column in (
         ("nodes", "nodes_tags", "node_id"),
         ("ways", "ways_tags", "way_id"),
     ):
         exists_sql, value_sql = _tag_sql_fragments(_tags_column_kind(import_schema, source_table))
-        for key in tag_keys:
-            query = f'''
-                INSERT INTO "{target_schema}".{relation_table} ({id_column}, tag_id, tag_value)
-                SELECT i.id, tags.id, {value_sql}
-                FROM "{import_schema}".{source_table} i
-                    JOIN "{target_schema}".tags tags ON tags."key" = :tag_key
-                    JOIN "{target_schema}".{source_table} target_element ON target_element.id = i.id
-                WHERE {exists_sql}
-                ON CONFLICT ({id_column}, tag_id) DO UPDATE
-                    SET tag_value = EXCLUDED.tag_value
-            '''
-            result = db.execute_sql(query, {"tag_key": key})
-            logging.debug("Copied %s %s rows for tag %s", result.rowcount, relation_table, key)
+        query = f'''
+            INSERT INTO "{target_schema}".{relation_table} ({id_column}, tag_id, tag_value)
+            SELECT i.id, tags.id, {value_sql}
+            FROM "{import_schema}".{source_table} i
+                JOIN "{target_schema}".{source_table} target_element ON target_element.id = i.id
+                JOIN "{target_schema}".tags tags ON tags."key" = ANY(CAST(:tag_keys AS text[]))
+            WHERE {exists_sql}
+            ON CONFLICT ({id_column}, tag_id) DO UPDATE
+                SET tag_value = EXCLUDED.tag_value
+        '''
+        result = db.execute_sql(query, {"tag_keys": list(tag_keys)})
+        logging.debug("Copied %s %s rows", result.rowcount, relation_table)
 
 
 def copy_relations(import_schema: str, target_schema: str, area_id: int):
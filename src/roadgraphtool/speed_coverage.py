@@ -0,0 +1,148 @@
+"""
+Speed coverage report of an area: how much of the road network has a speed computed from speed records and how much
+an imputed one.
+
+The coverage is computed by the `get_speed_coverage` SQL function in one aggregate scan over the segments of the area:
+the number and length of the segments by speed quality (`nodes_ways_speeds.quality`), highway class and time slot
+(`nodes_ways_slot_speeds`). The qualities are 1 and 2 for speeds from the speed records, 3 and 4 for speeds from the
+neighborhood and 5 for the average speed of the area.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from roadgraphtool.db import db
+
+COVERAGE_REPORT_FORMATS = ("json", "csv")
+# quality levels of nodes_ways_speeds by speed source, segments without speed have no quality
+QUALITY_SOURCES = {"records": (1, 2), "neighborhood": (3, 4), "average": (5,)}
+
+
+def get_speed_coverage(target_area_id: int, speed_records_dataset: Optional[int] = None) -> pd.DataFrame:
+    """Return the rows of `get_speed_coverage` (isodow, hour, highway, quality, segment_count, length)."""
+    dataset = "NULL" if speed_records_dataset is None else speed_records_dataset
+    return db.execute_query_to_pandas(
+        f"SELECT * FROM get_speed_coverage({target_area_id}::smallint, {dataset}::smallint)"
+    )
+
+
+def add_length_shares(coverage: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return *coverage* with the column length_share: the length of the row relative to the length of all segments of
+    the same highway class (or of the area for the rows with NULL highway).
+    """
+    highway = coverage["highway"].fillna("")
+    totals = coverage.loc[coverage["isodow"].isna()].groupby(highway)["length"].sum()
+    coverage = coverage.copy()
+    coverage["length_share"] = coverage["length"] / highway.map(totals).to_numpy()
+    return coverage
+
+
+def _summarize(rows: pd.DataFrame, total_length: float) -> dict:
+    by_quality = [
+        {
+            "quality": None if pd.isna(row.quality) else int(row.quality),
+            "segment_count": int(row.segment_count),
+            "length": float(row.length),
+            "length_share": float(row.length / total_length) if total_length > 0 else None,
+        }
+        for row in rows.itertuples()
+    ]
+    length_shares = {}
+    for source, qualities in QUALITY_SOURCES.items():
+        length = rows.loc[rows["quality"].isin(qualities), "length"].sum()
+        length_shares[source] = float(length / total_length) if total_length > 0 else None
+    covered_length = rows.loc[rows["quality"].notna(), "length"].sum()
+    length_shares["none"] = float(1 - covered_length / total_length) if total_length > 0 else None
+    return {"length_shares": length_shares, "by_quality": by_quality}
+
+
+def build_coverage_report(coverage: pd.DataFrame) -> dict:
+    """
+    Return the coverage report of the `get_speed_coverage` rows.
+
+    The report has the totals of the area, the coverage of the speeds in `nodes_ways_speeds` for the whole area and
+    per highway class, and the coverage of each time slot. A coverage has the segment count, length and length share
+    of each quality and the length shares of the speed sources (`QUALITY_SOURCES`) and of the segments without speed.
+    """
+    speeds = coverage.loc[coverage["isodow"].isna()]
+    slots = coverage.loc[coverage["isodow"].notna()]
+    area_speeds = speeds.loc[speeds["highway"].isna()]
+    highway_speeds = speeds.loc[speeds["highway"].notna()]
+    total_length = float(area_speeds["length"].sum())
+
+    report = {
+        "segment_count": int(area_speeds["segment_count"].sum()),
+        "length": total_length,
+        "speeds": _summarize(area_speeds, total_length),
+        "highways": {},
+        "slots": [],
+    }
+    for highway, rows in highway_speeds.groupby("highway", sort=True):
+        highway_length = float(rows["length"].sum())
+        report["highways"][highway] = {
+            "segment_count": int(rows["segment_count"].sum()),
+            "length": highway_length,
+            **_summarize(rows, highway_length),
+        }
+    area_slots = slots.loc[slots["highway"].isna()]
+    for (isodow, hour), rows in area_slots.groupby(["isodow", "hour"], sort=True):
+        report["slots"].append({"isodow": int(isodow), "hour": int(hour), **_summarize(rows, total_length)})
+    return report
+
+
+def _check_output_format(output_format: str):
+    if output_format not in COVERAGE_REPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported speed coverage report format {output_format!r}; "
+            f"expected one of {', '.join(COVERAGE_REPORT_FORMATS)}"
+        )
+
+
+def save_speed_coverage_report(coverage: pd.DataFrame, report_dir: Path, output_format: str = "json") -> Path:
+    """
+    Save the coverage report to *report_dir* and return its path.
+
+    "json" saves the report of `build_coverage_report` to `speed_coverage.json`, "csv" saves the coverage rows with
+    their length shares (`add_length_shares`) to `speed_coverage.csv`.
+    """
+    _check_output_format(output_format)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / f"speed_coverage.{output_format}"
+    if output_format == "json":
+        with open(report_path, mode='w') as f:
+            json.dump(build_coverage_report(coverage), f, indent=4)
+    else:
+        add_length_shares(coverage).to_csv(report_path, index=False)
+    logging.info(f"Speed coverage report saved to {report_path}")
+    return report_path
+
+
+def export_speed_coverage_report(config, target_area_id: int) -> Optional[Path]:
+    """
+    Compute the speed coverage of the area and save the report to `<export.dir>` (the working directory if there is
+    no export section). The road segments of the area are refreshed first (`refresh_node_segments`).
+    """
+    section = config.speed_coverage
+    output_format = getattr(section, "format", "json")
+    _check_output_format(output_format)
+    report_dir = Path(config.export.dir) if hasattr(config, "export") else Path(".")
+
+    db.execute_procedure(
+        "refresh_node_segments", (target_area_id, "smallint"), (getattr(config, "srid", None), "int")
+    )
+    coverage = get_speed_coverage(target_area_id, getattr(section, "dataset", None))
+    if len(coverage) == 0:
+        logging.warning(f"No road segments in area {target_area_id}, no speed coverage report")
+        return None
+
+    speeds = coverage.loc[coverage["isodow"].isna() & coverage["highway"].isna()]
+    covered_length = speeds.loc[speeds["quality"].isin(QUALITY_SOURCES["records"]), "length"].sum()
+    logging.info(
+        f"{100 * covered_length / speeds['length'].sum():.1f} % of the road length of area {target_area_id} "
+        f"has a speed from speed records"
+    )
+    return save_speed_coverage_report(coverage, report_dir, output_format)
@@ -0,0 +1,292 @@
+"""
+Bulk import of speed records (probe telemetry) into `speed_records`.
+
+The input files (CSV or Parquet) are read in chunks and every chunk is written to `speed_records` with COPY, after the
+partitions for its months are created (`create_speed_records_partitions`). In the same pass, the quarterly
+aggregates of `speed_records_quarterly` are accumulated: the count, sum and sum of squares of the speeds and the
+bucket counts of a quantile sketch (`roadgraphtool.speed_sketch`), per dataset cell (year, quarter, hour, from/to
+node). The mean, standard deviation, p50, p85 and the sketch are computed from them at the end, so the records are
+not read again.
+
+The input files need the columns datetime, from_osm_id, to_osm_id and speed, st_dev is optional.
+
+Example:
+    python -m roadgraphtool.speed_import config.yaml records_2024_q1.parquet --dataset 3 --name "Probe data 2024"
+"""
+import argparse
+import io
+import logging
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from roadgraphtool.config import parse_config_file, set_logging
+import roadgraphtool.db
+from roadgraphtool.db import db
+from roadgraphtool import speed_sketch
+
+SPEED_RECORD_COLUMNS = ("datetime", "from_osm_id", "to_osm_id", "speed", "st_dev")
+REQUIRED_COLUMNS = ("datetime", "from_osm_id", "to_osm_id", "speed")
+INPUT_FORMATS = ("csv", "parquet")
+QUARTERLY_KEYS = ["year", "quarter", "hour", "from_osm_id", "to_osm_id"]
+PERCENTILES = {"speed_p50": 0.5, "speed_p85": 0.85}
+QUARTERLY_COPY_ROWS = 1_000_000
+
+
+class QuarterlyAggregator:
+    """
+    Incremental computation of the `speed_records_quarterly` rows of the added speed records.
+
+    The mean and the sample standard deviation are exact; the standard deviation of a single-record cell is 0. The
+    percentiles are computed from the speed sketch of the cell, within `speed_sketch.RELATIVE_ACCURACY` of the exact
+    ones, and the sketch is stored as well.
+
+    The partial sums of the chunks are collected and summed up together with the running totals once they have at
+    least *compaction_rows* rows and at least as many rows as the totals. So the memory is bounded by the number of
+    distinct cells (and sketch buckets) plus *compaction_rows*, and every partial row is summed up a bounded number
+    of times on average.
+    """
+
+    def __init__(self, compaction_rows: int = 10_000_000):
+        self._compaction_rows = compaction_rows
+        self._moment_chunks: list[pd.DataFrame] = []
+        self._sketch_count_chunks: list[pd.Series] = []
+        self._chunk_rows = 0
+        self._moments = None
+        self._sketch_counts = None
+
+    def add(self, records: pd.DataFrame):
+        cells = pd.DataFrame({
+            "year": records["datetime"].dt.year.astype(np.int16),
+            "quarter": records["datetime"].dt.quarter.astype(np.int16),
+            "hour": records["datetime"].dt.hour.astype(np.int16),
+            "from_osm_id": records["from_osm_id"].to_numpy(),
+            "to_osm_id": records["to_osm_id"].to_numpy(),
+            "count": 1,
+            "speed_sum": records["speed"].to_numpy(dtype=np.float64),
+            "speed_square_sum": records["speed"].to_numpy(dtype=np.float64) ** 2,
+            "bucket": speed_sketch.get_buckets(records["speed"].to_numpy()),
+        })
+        moments = cells.groupby(QUARTERLY_KEYS)[["count", "speed_sum", "speed_square_sum"]].sum()
+        sketch_counts = cells.groupby(QUARTERLY_KEYS + ["bucket"])["count"].sum()
+        self._moment_chunks.append(moments)
+        self._sketch_count_chunks.append(sketch_counts)
+        self._chunk_rows += len(moments) + len(sketch_counts)
+        if self._chunk_rows >= max(self._compaction_rows, self._get_total_rows()):
+            self._sum_chunks()
+
+    def _get_total_rows(self) -> int:
+        return 0 if self._moments is None else len(self._moments) + len(self._sketch_counts)
+
+    def _sum_chunks(self):
+        if self._moment_chunks:
+            if self._moments is not None:
+                self._moment_chunks.insert(0, self._moments)
+                self._sketch_count_chunks.insert(0, self._sketch_counts)
+            self._moments = pd.concat(self._moment_chunks).groupby(level=QUARTERLY_KEYS).sum()
+            self._sketch_counts = pd.concat(self._sketch_count_chunks).groupby(level=QUARTERLY_KEYS + ["bucket"]).sum()
+            self._moment_chunks = []
+            self._sketch_count_chunks = []
+            self._chunk_rows = 0
+
+    def get_quarters(self) -> list[tuple[int, int]]:
+        """Return the (year, quarter) pairs of the added records."""
+        self._sum_chunks()
+        if self._moments is None:
+            return []
+        quarters = self._moments.index.droplevel(["hour", "from_osm_id", "to_osm_id"]).unique()
+        return sorted((int(year), int(quarter)) for year, quarter in quarters)
+
+    def get_quarterly_records(self) -> pd.DataFrame:
+        """Return the aggregated rows, with the columns of `speed_records_quarterly` except dataset."""
+        self._sum_chunks()
+        if self._moments is None:
+            return pd.DataFrame(
+                columns=QUARTERLY_KEYS + ["speed_mean", "st_dev"] + list(PERCENTILES) + ["speed_sketch"]
+            )
+
+        moments = self._moments
+        count = moments["count"]
+        quarterly = pd.DataFrame(index=moments.index)
+        quarterly["speed_mean"] = moments["speed_sum"] / count
+        variance = (moments["speed_square_sum"] - moments["speed_sum"] ** 2 / count) / (count - 1)
+        # nodes_ways_speeds.st_dev is NOT NULL, so a single record has no deviation rather than an undefined one
+        quarterly["st_dev"] = np.sqrt(variance.clip(lower=0)).where(count > 1, 0.0)
+
+        sketch_counts = self._sketch_counts.sort_index().astype(np.int64)
+        cells = sketch_counts.index.droplevel("bucket")
+        cumulative_counts = sketch_counts.groupby(QUARTERLY_KEYS).cumsum().to_numpy()
+        cell_counts = count.reindex(cells).to_numpy()
+        buckets = sketch_counts.index.get_level_values("bucket").to_series(index=sketch_counts.index)
+        for column, quantile in PERCENTILES.items():
+            # DDSketch rank of the quantile, as in speed_sketch_quantile
+            reached = buckets[cumulative_counts > quantile * (cell_counts - 1)].groupby(QUARTERLY_KEYS).min()
+            quarterly[column] = pd.Series(speed_sketch.get_bucket_values(reached.to_numpy()), index=reached.index)
+
+        # the (bucket, count) pairs of a cell are consecutive, see speed_sketch.encode_sketch
+        entries = np.column_stack([buckets.to_numpy(), sketch_counts.to_numpy()]).astype(">i4").tobytes()
+        cell_ids = pd.factorize(cells)[0]
+        cell_ends = np.append(np.flatnonzero(np.diff(cell_ids)) + 1, len(cell_ids))
+        cell_starts = np.append(0, cell_ends[:-1])
+        sketches = [entries[start * 8:end * 8] for start, end in zip(cell_starts, cell_ends)]
+        quarterly["speed_sketch"] = pd.Series(sketches, index=cells[cell_starts])
+
+        return quarterly.reset_index()
+
+
+def register_dataset(dataset_id: int, name: Optional[str], description: Optional[str]):
+    """Insert the dataset into `speed_record_datasets` unless it is already there."""
+    db.execute_sql(
+        """
+        INSERT INTO speed_record_datasets (id, name, description)
+        SELECT :id, :name, :description
+        WHERE NOT EXISTS (SELECT 1 FROM speed_record_datasets WHERE id = :id)
+        """,
+        {"id": dataset_id, "name": name, "description": description},
+    )
+
+
+def read_speed_records(path: Path, chunk_size: int, input_format: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Yield the speed records of a CSV or Parquet file in chunks of at most *chunk_size* rows."""
+    input_format = input_format or path.suffix.lstrip(".").lower()
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(
+            f"Unsupported speed records format {input_format!r}; expected one of {', '.join(INPUT_FORMATS)}"
+        )
+
+    if input_format == "csv":
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+    else:
+        # pyarrow is needed for Parquet input only
+        import pyarrow.parquet
+        chunks = (batch.to_pandas() for batch in pyarrow.parquet.ParquetFile(path).iter_batches(chunk_size))
+
+    for chunk in chunks:
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Speed records file {path} is missing the columns {', '.join(missing)}")
+        chunk["datetime"] = pd.to_datetime(chunk["datetime"])
+        yield chunk.loc[:, [column for column in SPEED_RECORD_COLUMNS if column in chunk.columns]]
+
+
+def store_quarterly_records(dataset_id: int, aggregator: QuarterlyAggregator):
+    """
+    Replace the `speed_records_quarterly` rows of the dataset in the imported quarters by the aggregated ones.
+
+    The old rows are deleted and the new ones copied in one transaction, so a failed COPY keeps the old rows.
+    """
+    quarterly = aggregator.get_quarterly_records()
+    quarterly["dataset"] = dataset_id
+    # bytea in the hex format of COPY
+    quarterly["speed_sketch"] = ["\\x" + sketch.hex() for sketch in quarterly["speed_sketch"]]
+    columns = ", ".join(f'"{column}"' for column in quarterly.columns)
+
+    cursor = db.get_new_cursor()
+    try:
+        for year, quarter in aggregator.get_quarters():
+            cursor.execute(
+                "DELETE FROM speed_records_quarterly WHERE dataset = %s AND year = %s AND quarter = %s",
+                (dataset_id, year, quarter),
+            )
+        for start in range(0, len(quarterly), QUARTERLY_COPY_ROWS):
+            buffer = io.StringIO()
+            quarterly.iloc[start:start + QUARTERLY_COPY_ROWS].to_csv(buffer, index=False, header=False, na_rep="\\N")
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY speed_records_quarterly ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+        db.commit()
+    except Exception:
+        cursor.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    logging.info(f"{len(quarterly)} quarterly speed records stored")
+
+
+def import_speed_records(
+        paths: list[Path],
+        dataset_id: int,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        chunk_size: int = 1_000_000,
+        input_format: Optional[str] = None,
+        quarterly: bool = True,
+) -> dict:
+    """
+    Import the speed records of the files into `speed_records` as dataset *dataset_id*.
+
+    With *quarterly*, the quarterly aggregates of the imported records are stored in `speed_records_quarterly`,
+    replacing the rows of the dataset in the imported quarters. So all records of a quarter should be imported in
+    one call. Returns the number of imported rows, the duration and the rows per second.
+    """
+    register_dataset(dataset_id, name, description)
+    aggregator = QuarterlyAggregator()
+    row_count = 0
+    start_time = time.perf_counter()
+
+    for path in paths:
+        logging.info(f"Importing speed records from {path}")
+        for chunk in read_speed_records(path, chunk_size, input_format):
+            chunk["dataset"] = dataset_id
+            db.execute_procedure(
+                "create_speed_records_partitions",
+                (dataset_id, "smallint"),
+                (chunk["datetime"].min().to_pydatetime(), "timestamp"),
+                (chunk["datetime"].max().to_pydatetime(), "timestamp"),
+            )
+            db.copy_dataframe_to_db_table(chunk, "speed_records")
+            if quarterly:
+                aggregator.add(chunk)
+
+            row_count += len(chunk)
+            elapsed = time.perf_counter() - start_time
+            logging.info(f"{row_count} speed records imported, {row_count / elapsed:.0f} rows/s")
+
+    if quarterly:
+        store_quarterly_records(dataset_id, aggregator)
+    db.execute_sql("ANALYZE speed_records")
+
+    duration = time.perf_counter() - start_time
+    report = {"rows": row_count, "duration_s": duration, "rows_per_s": row_count / duration if duration > 0 else None}
+    logging.info(f"Speed records import finished: {report}")
+    return report
+
+
+def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import speed records from CSV or Parquet files.")
+    parser.add_argument("config_file", help="Path to the config file")
+    parser.add_argument("files", nargs="+", help="Speed records files (.csv or .parquet)")
+    parser.add_argument("--dataset", type=int, required=True, help="Dataset id of the records")
+    parser.add_argument("--name", default=None, help="Dataset name, used when the dataset is new")
+    parser.add_argument("--description", default=None, help="Dataset description, used when the dataset is new")
+    parser.add_argument("--format", choices=INPUT_FORMATS, default=None, help="Input format (default: file suffix)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Rows per COPY")
+    parser.add_argument(
+        "--no-quarterly", action="store_true", help="Do not compute the speed_records_quarterly aggregates"
+    )
+    return parser.parse_args(arg_list)
+
+
+def main(arg_list: list[str] | None = None):
+    args = parse_args(arg_list)
+    config = parse_config_file(Path(args.config_file))
+    set_logging(config)
+    roadgraphtool.db.init_db(config)
+
+    import_speed_records(
+        [Path(file) for file in args.files],
+        args.dataset,
+        args.name,
+        args.description,
+        args.chunk_size,
+        args.format,
+        not args.no_quarterly,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Mergeable quantile sketches of speeds, the Python counterpart of the `speed_sketch_*` SQL functions.
+
+A sketch is a DDSketch with a relative accuracy of `RELATIVE_ACCURACY`: a speed is counted in the bucket
+``ceil(ln(speed) / ln(GAMMA))``, speeds <= 0 in `ZERO_BUCKET`. It is stored as bytea, the sequence of (bucket, count)
+pairs ordered by bucket, both as big-endian 4-byte integers. Two sketches are merged by summing the counts of their
+buckets and every quantile of the merged speeds is within the relative accuracy of the exact one.
+"""
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = np.iinfo(np.int32).min
+_ENTRY_DTYPE = np.dtype(">i4")
+
+
+def get_buckets(speeds: np.ndarray) -> np.ndarray:
+    """Return the sketch bucket of each speed."""
+    speeds = np.asarray(speeds, dtype=np.float64)
+    positive = speeds > 0
+    buckets = np.ceil(np.log(np.where(positive, speeds, 1.0)) / np.log(GAMMA))
+    return np.where(positive, buckets, ZERO_BUCKET).astype(np.int32)
+
+
+def get_bucket_values(buckets: np.ndarray) -> np.ndarray:
+    """Return the speed represented by each bucket (0 for the zero bucket)."""
+    buckets = np.asarray(buckets, dtype=np.int64)
+    values = 2 * GAMMA ** np.where(buckets == ZERO_BUCKET, 0, buckets).astype(np.float64) / (GAMMA + 1)
+    return np.where(buckets == ZERO_BUCKET, 0.0, values)
+
+
+def encode_sketch(buckets: np.ndarray, counts: np.ndarray) -> bytes:
+    """Return the sketch of the bucket counts, *buckets* have to be unique and sorted."""
+    return np.column_stack([buckets, counts]).astype(_ENTRY_DTYPE).tobytes()
+
+
+def decode_sketch(sketch: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """Return the buckets and counts of a sketch."""
+    entries = np.frombuffer(bytes(sketch), dtype=_ENTRY_DTYPE).reshape(-1, 2).astype(np.int64)
+    return entries[:, 0], entries[:, 1]
+
+
+def build_sketch(speeds: np.ndarray) -> bytes:
+    """Return the sketch of the speeds."""
+    buckets, counts = np.unique(get_buckets(speeds), return_counts=True)
+    return encode_sketch(buckets, counts)
+
+
+def merge_sketches(sketch: bytes, other_sketch: bytes) -> bytes:
+    """Return the sketch of the speeds of both sketches."""
+    buckets, counts = (np.concatenate(arrays) for arrays in zip(decode_sketch(sketch), decode_sketch(other_sketch)))
+    merged_buckets, index = np.unique(buckets, return_inverse=True)
+    return encode_sketch(merged_buckets, np.bincount(index, weights=counts).astype(np.int64))
+
+
+def get_quantile(sketch: bytes, quantile: float) -> float:
+    """Return the *quantile* (0-1) of the speeds of the sketch, NaN for an empty sketch."""
+    buckets, counts = decode_sketch(sketch)
+    if len(buckets) == 0:
+        return np.nan
+    cumulative_counts = np.cumsum(counts)
+    # DDSketch rank of the quantile, as in speed_sketch_quantile
+    position = np.searchsorted(cumulative_counts, quantile * (cumulative_counts[-1] - 1), side="right")
+    return float(get_bucket_values(buckets[position:position + 1])[0])
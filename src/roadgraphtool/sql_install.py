@@ -9,6 +9,7 @@ on a repo-local script path.
 from __future__ import annotations
 
 import logging
+import re
 from pathlib import Path
 from typing import Iterable, Optional
 
@@ -43,6 +44,42 @@ def _execute_sql_file(db, sql_file: Path, schema: str, multistatement: bool = Fa
         db.execute_sql(sql, schema=schema)
 
 
+def get_table_name(table_sql_path: Path) -> Optional[str]:
+    """Return the name of the table created by a tables/*.sql file (from its header), None for views."""
+    match = re.search(r"^-- Name: (\w+); Type: TABLE;", table_sql_path.read_text(encoding="utf-8"), re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def _create_missing_tables(db, sql_dir: Path, schema: str) -> None:
+    """Create the tables added to tables/*.sql after the database was initialized."""
+    for table_sql_path in sorted((sql_dir / "tables").glob("*.sql")):
+        table_name = get_table_name(table_sql_path)
+        if table_name is None:
+            continue
+        exists = db.execute_sql_and_fetch_all_rows(f"SELECT to_regclass('public.{table_name}') IS NOT NULL")[0][0]
+        if not exists:
+            logging.info("Creating missing table %s", table_name)
+            _execute_sql_file(db, table_sql_path, schema, multistatement=True)
+
+
+def _run_migrations(db, sql_dir: Path, schema: str) -> None:
+    """
+    Run the migrations/*.sql files. They bring the tables of an existing database to tables/*.sql (new columns,
+    keys and indexes) and are idempotent, so they run on every installation.
+    """
+    migrations_dir = sql_dir / "migrations"
+    for migration_sql_path in sorted(migrations_dir.glob("*.sql")):
+        _execute_sql_file(db, migration_sql_path, schema, multistatement=True)
+
+    speed_records_partitioned = db.execute_sql_and_fetch_all_rows(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('public.speed_records'))"
+    )[0][0]
+    if not speed_records_partitioned:
+        logging.warning(
+            "speed_records is not partitioned, run CALL migrate_speed_records_to_partitions(); to migrate it"
+        )
+
+
 def install_sql(
     *,
     config,
@@ -53,6 +90,9 @@ def install_sql(
     """
     Install road-graph-tool SQL assets into the configured database.
 
+    On an initialized database, the tables added since are created and the migrations are run, so that the
+    functions and procedures find the tables and columns they use.
+
     Requirements on config:
     - config.schema: target schema name
     - config.road_import.schema: schema used to check whether DB is initialized
@@ -99,6 +139,9 @@ ORDER BY el.name;
         _execute_sql_file(db, sql_dir / "schema_preamble.sql", schema, multistatement=True)
         for table_sql_path in sorted((sql_dir / "tables").glob("*.sql")):
             _execute_sql_file(db, table_sql_path, schema, multistatement=True)
+    else:
+        _create_missing_tables(db, sql_dir, schema)
+    _run_migrations(db, sql_dir, schema)
 
     if include_tests:
         pgtap_enabled_sql = "SELECT * FROM pg_extension WHERE extname = 'pgtap'"
@@ -0,0 +1,97 @@
+"""
+In-process strongly connected components, an alternative to the `compute_strong_components` SQL procedure.
+
+The SQL procedure runs `pgr_strongcomponents` on the edges of the area. Here, the `from`/`to` node ids of the edges
+are fetched once as arrays, the components are computed with `scipy.sparse.csgraph.connected_components` and the
+result is written to `component_data` with COPY.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from roadgraphtool.db import db
+
+STRONG_COMPONENTS_ENGINES = ("sql", "scipy")
+EDGE_SELECTIONS = ("geometry", "area")
+
+
+def get_strong_components(from_node: np.ndarray, to_node: np.ndarray) -> pd.DataFrame:
+    """
+    Return the strongly connected components of the directed graph given by the edges ``from_node[i] -> to_node[i]``.
+
+    The result has the columns component_id and node_id, one row per node of the graph. Components are numbered
+    from the largest one, starting from 0, as in `component_data`.
+    """
+    node_ids, node_index = np.unique(np.concatenate([from_node, to_node]), return_inverse=True)
+    edge_count = len(from_node)
+    adjacency = sparse.csr_matrix(
+        (np.ones(edge_count, dtype=np.int8), (node_index[:edge_count], node_index[edge_count:])),
+        shape=(len(node_ids), len(node_ids)),
+    )
+    _, labels = csgraph.connected_components(adjacency, directed=True, connection="strong")
+
+    sizes = np.bincount(labels)
+    # rank of each component by size, the largest first
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return pd.DataFrame({"component_id": rank[labels], "node_id": node_ids})
+
+
+def get_area_edges(target_area_id: int, edge_selection: str = "geometry") -> pd.DataFrame:
+    """
+    Return the `from`/`to` nodes of the edges of the area, selected as in `compute_strong_components`.
+
+    With `edge_selection` "area", the edges generated for the area (`edges.area`) and the edges without an area
+    within the area geometry are returned, or the edges within the area geometry if no edges were generated for
+    the area.
+    """
+    geometry_filter = f"""
+        EXISTS (
+            SELECT 1 FROM area_parts WHERE area_parts.area = {target_area_id}
+                AND st_intersects(area_parts.geom, edges.geom)
+        )
+        AND (
+            EXISTS (
+                SELECT 1 FROM area_parts WHERE area_parts.area = {target_area_id}
+                    AND st_within(edges.geom, area_parts.geom)
+            )
+            OR st_within(edges.geom, (SELECT geom FROM areas WHERE id = {target_area_id}))
+        )
+    """
+    if edge_selection == "area":
+        area_edges_exist = db.execute_sql_and_fetch_all_rows(
+            f"SELECT EXISTS (SELECT 1 FROM edges WHERE area = {target_area_id})"
+        )[0][0]
+        if area_edges_exist:
+            return db.execute_query_to_pandas(
+                f'SELECT "from" AS from_node, "to" AS to_node FROM edges '
+                f"WHERE area = {target_area_id} OR (area IS NULL AND {geometry_filter})"
+            )
+        logging.info(f"No edges generated for area {target_area_id}, selecting edges by geometry")
+
+    return db.execute_query_to_pandas(
+        f'SELECT "from" AS from_node, "to" AS to_node FROM edges WHERE {geometry_filter}'
+    )
+
+
+def compute_strong_components(target_area_id: int, edge_selection: str = "geometry"):
+    """
+    Compute the strongly connected components of the area and store them in `component_data`.
+
+    The in-process counterpart of the `compute_strong_components` SQL procedure, with the same parameters.
+    """
+    logging.info("Fetching edges")
+    edges = get_area_edges(target_area_id, edge_selection)
+    logging.info(f"{len(edges)} edges fetched")
+    if len(edges) == 0:
+        return
+
+    components = get_strong_components(edges["from_node"].to_numpy(), edges["to_node"].to_numpy())
+    logging.info(f"Strong components computed: {components['component_id'].max() + 1} components")
+
+    components["area"] = target_area_id
+    db.copy_dataframe_to_db_table(components, "component_data")
+    logging.info(f"{len(components)} nodes stored in component_data")
@@ -0,0 +1,132 @@
+"""
+Export of time-dependent edge speeds as a travel-time matrix for time-dependent routing.
+
+The slot speeds of the road segments (`nodes_ways_slot_speeds`, see `compute_speeds_for_time_slots`) are aggregated
+onto the contracted edges by the `compute_edge_slot_speeds` procedure. Here, they are arranged into a matrix with one
+row per exported edge (in the order of `map/edges.csv`) and one column per time slot, holding the travel time of the
+edge in seconds.
+"""
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from roadgraphtool.db import db
+
+TRAVEL_TIME_FORMATS = ("npy", "parquet")
+# km/h, the same default as in the distance matrix generator
+DEFAULT_SPEED = 50
+
+
+def compute_edge_slot_speeds(target_area_id: int, speed_records_dataset: int):
+    db.execute_procedure(
+        "compute_edge_slot_speeds",
+        (target_area_id, "smallint"),
+        (speed_records_dataset, "smallint"),
+    )
+
+
+def get_edge_slot_speeds(target_area_id: int, speed_records_dataset: int) -> pd.DataFrame:
+    """Return the slot speeds (edge_id, isodow, hour, speed) of the edges of the area."""
+    return db.execute_query_to_pandas(f"""
+        SELECT edges_slot_speeds.edge_id, edges_slot_speeds.isodow, edges_slot_speeds.hour, edges_slot_speeds.speed
+        FROM edges_slot_speeds
+            JOIN edges ON edges.id = edges_slot_speeds.edge_id
+        WHERE edges.area = {target_area_id} AND edges_slot_speeds.dataset = {speed_records_dataset}
+    """)
+
+
+def build_travel_time_matrix(edges: pd.DataFrame, slot_speeds: pd.DataFrame) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Return the travel times (seconds) of the edges in all time slots and the slots of the matrix columns.
+
+    *edges* has the columns db_id and length (meters) and optionally speed (km/h), as exported. *slot_speeds* has
+    the columns edge_id, isodow, hour and speed (km/h). The matrix has one row per edge, in the order of *edges*, and
+    one column per slot, ordered by isodow and hour. Where an edge has no speed in a slot, its exported speed is
+    used, or `DEFAULT_SPEED` if there is none.
+    """
+    slots = (
+        slot_speeds.loc[:, ["isodow", "hour"]]
+        .drop_duplicates()
+        .sort_values(["isodow", "hour"])
+        .reset_index(drop=True)
+    )
+
+    fallback_speed = np.full(len(edges), DEFAULT_SPEED, dtype=np.float64)
+    if "speed" in edges:
+        edge_speed = edges["speed"].to_numpy(dtype=np.float64)
+        fallback_speed = np.where(np.isnan(edge_speed), fallback_speed, edge_speed)
+    speeds = np.repeat(fallback_speed[:, np.newaxis], len(slots), axis=1)
+
+    edge_rows = pd.Series(np.arange(len(edges)), index=edges["db_id"].to_numpy())
+    slot_columns = pd.Series(np.arange(len(slots)), index=pd.MultiIndex.from_frame(slots))
+    known = slot_speeds[slot_speeds["edge_id"].isin(edge_rows.index)]
+    rows = edge_rows.loc[known["edge_id"]].to_numpy()
+    columns = slot_columns.loc[pd.MultiIndex.from_frame(known.loc[:, ["isodow", "hour"]])].to_numpy()
+    speeds[rows, columns] = known["speed"].to_numpy(dtype=np.float64)
+
+    travel_times = edges["length"].to_numpy(dtype=np.float64)[:, np.newaxis] / speeds * 3.6
+    return travel_times.astype(np.float32), slots
+
+
+def _check_output_format(output_format: str):
+    if output_format not in TRAVEL_TIME_FORMATS:
+        raise ValueError(
+            f"Unsupported travel time format {output_format!r}; expected one of {', '.join(TRAVEL_TIME_FORMATS)}"
+        )
+
+
+def save_travel_time_matrix(
+        map_dir: Path, edge_ids: np.ndarray, travel_times: np.ndarray, slots: pd.DataFrame, output_format: str = "npy"
+) -> Path:
+    """
+    Save the travel-time matrix to *map_dir* and return its path.
+
+    "npy" saves the matrix to `travel_times.npy`, its slots to `travel_time_slots.csv` and the edge of each row
+    (`edges.id`) to `travel_time_edges.npy`. "parquet" saves one table `travel_times.parquet` with the db_id column
+    and one column per slot named `<isodow>_<hour>`; it requires pyarrow or fastparquet.
+    """
+    _check_output_format(output_format)
+    map_dir.mkdir(exist_ok=True, parents=True)
+
+    if output_format == "npy":
+        matrix_path = map_dir / "travel_times.npy"
+        np.save(matrix_path, travel_times)
+        np.save(map_dir / "travel_time_edges.npy", np.asarray(edge_ids))
+        slots.to_csv(map_dir / "travel_time_slots.csv", sep='\t', index_label="column")
+    else:
+        matrix_path = map_dir / "travel_times.parquet"
+        columns = [f"{isodow}_{hour}" for isodow, hour in zip(slots["isodow"], slots["hour"])]
+        matrix = pd.DataFrame(travel_times, columns=columns)
+        matrix.insert(0, "db_id", np.asarray(edge_ids))
+        matrix.to_parquet(matrix_path, index=False)
+
+    logging.info(
+        f"Travel times of {travel_times.shape[0]} edges in {travel_times.shape[1]} slots saved to {matrix_path}"
+    )
+    return matrix_path
+
+
+def export_travel_time_matrix(config, edges: Optional[pd.DataFrame] = None) -> Optional[Path]:
+    """
+    Compute the slot speeds of the edges of the area and export the travel-time matrix to `<export.dir>/map/`.
+
+    *edges* are the exported edges, they are read from `map/edges.csv` if not given.
+    """
+    section = config.time_dependent_speeds
+    output_format = getattr(section, "format", "npy")
+    _check_output_format(output_format)
+    map_dir = Path(config.export.dir) / 'map'
+    if edges is None:
+        edges = pd.read_csv(map_dir / 'edges.csv', sep='\t')
+
+    compute_edge_slot_speeds(config.area_id, section.dataset)
+    slot_speeds = get_edge_slot_speeds(config.area_id, section.dataset)
+    if len(slot_speeds) == 0:
+        logging.warning(f"No slot speeds of dataset {section.dataset} for the edges of area {config.area_id}")
+        return None
+
+    travel_times, slots = build_travel_time_matrix(edges, slot_speeds)
+    return save_travel_time_matrix(map_dir, edges["db_id"].to_numpy(), travel_times, slots, output_format)
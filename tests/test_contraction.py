@@ -0,0 +1,181 @@
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+import roadgraphtool.pipeline
+from roadgraphtool.contraction import (
+    build_edges,
+    build_nodes_edges,
+    contract_graph_in_area_tiled,
+    contract_segments,
+    get_chain_length_histogram,
+)
+
+GRAPHML_DIR = Path(__file__).resolve().parents[1] / "src" / "roadgraphtool" / "SQL" / "tests" / "data"
+NAMESPACES = {
+    "g": "http://graphml.graphdrawing.org/xmlns",
+    "y": "http://www.yworks.com/xml/yfiles-common/3.0",
+    "x": "http://www.yworks.com/xml/yfiles-common/markup/3.0",
+}
+
+
+def _load_graphml_segments(name: str) -> pd.DataFrame:
+    """Read the segments of a pgTAP test graph, nodes are identified by their labels like in the SQL tests."""
+    root = ET.parse(GRAPHML_DIR / f"{name}.graphml").getroot()
+    labels = {
+        node.get("id"): int(node.find(".//x:List/y:Label", NAMESPACES).get("Text"))
+        for node in root.iter(f"{{{NAMESPACES['g']}}}node")
+    }
+    edges = [
+        (labels[edge.get("source")], labels[edge.get("target")]) for edge in root.iter(f"{{{NAMESPACES['g']}}}edge")
+    ]
+    return pd.DataFrame(edges, columns=["from_node", "to_node"])
+
+
+def _contract(segments: pd.DataFrame):
+    return contract_segments(segments["from_node"].to_numpy(), segments["to_node"].to_numpy())
+
+
+# expected contracted nodes are the same as in SQL/tests/test_contract_graph_in_area.sql
+@pytest.mark.parametrize("graph_name, expected_contracted_nodes", [
+    ("test_1", [2]),
+    ("test_2", []),
+    ("test_3", []),
+    ("single_bidirectional_contraction", [2]),
+    ("single_bidirectional_contraction_and_parallel_edge", []),
+    ("single_bidirectional_to_parallel_edge", []),
+])
+def test_contract_segments_matches_sql_fixtures(graph_name, expected_contracted_nodes):
+    result = _contract(_load_graphml_segments(graph_name))
+
+    assert sorted(result.contracted_nodes.tolist()) == expected_contracted_nodes
+
+
+def _segments_with_coordinates(edges: list[tuple[int, int]]) -> pd.DataFrame:
+    segments = pd.DataFrame(edges, columns=["from_node", "to_node"])
+    segments["from_x"] = segments["from_node"].astype(float)
+    segments["from_y"] = 0.0
+    segments["to_x"] = segments["to_node"].astype(float)
+    segments["to_y"] = 0.0
+    return segments
+
+
+def _edge_set(edges: pd.DataFrame) -> set:
+    return set(zip(edges["from"], edges["to"]))
+
+
+def test_chain_is_merged_into_single_edge():
+    segments = _segments_with_coordinates([(3, 4), (1, 2), (2, 3), (4, 5), (5, 6), (7, 5)])
+    result = _contract(segments)
+    edges = build_edges(segments, result)
+
+    assert sorted(result.contracted_nodes.tolist()) == [2, 3, 4]
+    assert _edge_set(edges) == {(1, 5), (5, 6), (7, 5)}
+    chain = shapely.from_wkb(edges.loc[edges["from"] == 1, "geom"].iloc[0])
+    assert shapely.get_srid(chain) == 4326
+    assert chain.equals(shapely.MultiLineString([[(1, 0), (2, 0), (3, 0), (4, 0), (5, 0)]]))
+
+
+def test_two_way_road_is_contracted_in_both_directions():
+    segments = _segments_with_coordinates(_load_graphml_segments("single_bidirectional_contraction").values.tolist())
+    edges = build_edges(segments, _contract(segments))
+
+    assert _edge_set(edges) == {(1, 3), (3, 1)}
+    assert len(edges) == 2
+
+
+def test_contracted_nodes_are_mapped_to_their_edges():
+    segments = _segments_with_coordinates(
+        _load_graphml_segments("single_bidirectional_contraction").values.tolist() + [(3, 4), (4, 5)]
+    )
+    result = _contract(segments)
+    edges = build_edges(segments, result)
+    nodes_edges = build_nodes_edges(segments, result)
+
+    mapped_edges = edges.loc[nodes_edges["edge"]]
+    mapped = set(zip(nodes_edges["node_id"], mapped_edges["from"], mapped_edges["to"]))
+    assert mapped == {(2, 1, 3), (2, 3, 1), (4, 3, 5)}
+
+
+def test_intersections_and_dead_ends_are_kept():
+    # 1 -> 2 -> 3, 2 -> 4: node 2 is an intersection
+    segments = _segments_with_coordinates([(1, 2), (2, 3), (2, 4)])
+    result = _contract(segments)
+
+    assert len(result.contracted_nodes) == 0
+    assert _edge_set(build_edges(segments, result)) == {(1, 2), (2, 3), (2, 4)}
+
+
+def test_cycle_without_intersection_is_not_contracted():
+    segments = _segments_with_coordinates([(1, 2), (2, 3), (3, 1)])
+    result = _contract(segments)
+
+    assert len(result.contracted_nodes) == 0
+    assert result.edge_count == 3
+
+
+def test_self_loop_node_is_not_contracted():
+    # same graph as test_get_restricted_nodes_self_loop: 2 is in the middle of a two-way road, 5 has a self-loop
+    segments = _segments_with_coordinates([(1, 2), (2, 1), (2, 3), (3, 2), (4, 5), (5, 4), (5, 5)])
+    result = _contract(segments)
+
+    assert result.contracted_nodes.tolist() == [2]
+    assert result.restricted_node_count == 4
+
+
+def test_contracted_edge_speed_is_length_weighted():
+    segments = _segments_with_coordinates([(1, 2), (2, 3)])
+    segments["length"] = [100.0, 300.0]
+    segments["speed"] = [10.0, 50.0]
+    edges = build_edges(segments, _contract(segments))
+
+    assert len(edges) == 1
+    assert edges["speed"].iloc[0] == pytest.approx(40.0)
+
+
+def test_empty_lengths_give_missing_speed():
+    segments = _segments_with_coordinates([(1, 2)])
+    segments["length"] = [0.0]
+    segments["speed"] = [10.0]
+    edges = build_edges(segments, _contract(segments))
+
+    assert np.isnan(edges["speed"].iloc[0])
+
+
+def test_chain_length_histogram_counts_segments_per_edge():
+    # chain 1 -> 2 -> 3 -> 4 and a short branch 4 -> 5, 4 -> 6
+    segments = _segments_with_coordinates([(1, 2), (2, 3), (3, 4), (4, 5), (4, 6)])
+    result = _contract(segments)
+
+    assert result.node_count == 6
+    assert result.restricted_node_count == 4
+    assert get_chain_length_histogram(result) == {"1": 2, "3": 1}
+
+
+def test_tiled_contraction_stores_the_run(mocker):
+    db = mocker.patch("roadgraphtool.contraction.db")
+    db.execute_sql_and_fetch_all_rows.side_effect = [[(120,)], []]
+
+    contract_graph_in_area_tiled(9999, 4326, 0.01)
+
+    stitch_call = db.execute_procedure.call_args_list[-1]
+    assert stitch_call.args[0] == "stitch_contraction_tiles"
+    assert stitch_call.args[4] == (120, "integer")
+    assert set(json.loads(stitch_call.args[5][0])) == {"prepare", "tiles"}
+
+
+def test_tiled_contraction_rejects_non_sql_engine(mocker):
+    import_steps = mocker.patch("roadgraphtool.pipeline.insert_area_if_area_insertion_activated")
+    config = SimpleNamespace(
+        area_id=9999, srid=4326, contraction=SimpleNamespace(activated=True, engine="python", tile_size=0.01)
+    )
+
+    with pytest.raises(ValueError, match="tile_size"):
+        roadgraphtool.pipeline.main(config)
+    import_steps.assert_not_called()
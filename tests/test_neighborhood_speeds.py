@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from roadgraphtool.neighborhood_speeds import compute_neighborhood_speeds, get_neighbor_pairs
+
+
+def _lines(coordinates: list[list[tuple[float, float]]]) -> np.ndarray:
+    return np.array([shapely.LineString(line) for line in coordinates], dtype=object)
+
+
+def test_neighbor_pairs_use_segment_distance():
+    # the long known segment is 5 m from the query segment, but its midpoint is 500 m away
+    query = _lines([[(0, 0), (10, 0)]])
+    known = _lines([[(0, 5), (1000, 5)], [(0, 20), (10, 20)], [(-13, 0), (-12, 0)]])
+
+    query_index, known_index = get_neighbor_pairs(query, known, 10)
+
+    assert query_index.tolist() == [0]
+    assert known_index.tolist() == [0]
+
+
+def test_neighbor_pairs_match_brute_force():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 1000, (200, 2))
+    ends = starts + rng.uniform(-100, 100, (200, 2))
+    geoms = shapely.linestrings(np.stack([starts, ends], axis=1))
+    query, known = geoms[:80], geoms[80:]
+
+    query_index, known_index = get_neighbor_pairs(query, known, 50)
+
+    distances = shapely.distance(query[:, np.newaxis], known[np.newaxis, :])
+    assert set(zip(query_index, known_index)) == set(zip(*np.nonzero(distances <= 50)))
+
+
+def test_speeds_are_assigned_by_neighborhood_quality():
+    segments = pd.DataFrame({
+        "from_id": [1, 2, 3, 4, 5],
+        "to_id": [11, 12, 13, 14, 15],
+        "geom": _lines([
+            [(0, 0), (10, 0)],
+            [(0, 100), (10, 100)],
+            [(0, 5), (10, 5)],
+            [(0, 150), (10, 150)],
+            [(5000, 0), (5010, 0)],
+        ]),
+        "speed": [10.0, 30.0, np.nan, np.nan, np.nan],
+        "st_dev": [1.0, 3.0, np.nan, np.nan, np.nan],
+        "quality": [1, 2, np.nan, np.nan, np.nan],
+    })
+
+    speeds = compute_neighborhood_speeds(segments).set_index("from_node_ways_id")
+
+    assert speeds.loc[3, "quality"] == 3
+    assert speeds.loc[3, "speed"] == pytest.approx(10.0)
+    assert speeds.loc[4, "quality"] == 4
+    assert speeds.loc[4, "speed"] == pytest.approx(20.0)
+    assert speeds.loc[4, "source_records_count"] == 2
+    assert speeds.loc[5, "quality"] == 5
+    assert speeds.loc[5, "st_dev"] == pytest.approx(2.0)
+    assert speeds.loc[5, "to_node_ways_id"] == 15
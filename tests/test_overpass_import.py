@@ -1,6 +1,11 @@
+import json
 from types import SimpleNamespace
 
-from roadgraphtool.overpass_import import _configured_tag_keys, _tag_rows
+import pandas as pd
+import shapely
+from shapely import geometry
+
+from roadgraphtool.overpass_import import _configured_tag_keys, _staging_nodes, _staging_tags, _staging_ways
 
 
 def test_configured_tag_keys_defaults_to_empty():
@@ -17,22 +22,51 @@ def test_configured_tag_keys_normalizes_and_deduplicates():
     assert _configured_tag_keys(config) == ["highway", "name"]
 
 
-def test_tag_rows_keeps_configured_tags_for_inserted_elements_only():
-    elements = [
-        {"id": 1, "tags": {"highway": "residential", "name": "Main St", "surface": "asphalt"}},
-        {"id": 2, "tags": {"highway": "service"}},
-        {"id": 3, "tags": {"name": "Skipped"}},
+def test_staging_tags_keeps_configured_tags_only():
+    element = {"id": 1, "tags": {"highway": "residential", "name": "Main St", "surface": "asphalt"}}
+
+    assert json.loads(_staging_tags(element, ["highway", "name"])) == {"highway": "residential", "name": "Main St"}
+    assert _staging_tags(element, ["lanes"]) is None
+    assert _staging_tags({"id": 2}, ["highway"]) is None
+
+
+def test_staging_nodes_skips_nodes_without_coordinates():
+    nodes = [
+        {"id": 1, "lat": 50.0, "lon": 14.0, "tags": {"highway": "traffic_signals"}},
+        {"id": 2, "lat": 50.1, "lon": 14.1},
+        {"id": 3},
     ]
 
-    rows = _tag_rows(
-        elements,
-        "way_id",
-        {"highway": 10, "name": 11},
-        allowed_ids={1, 3},
-    )
+    nodes_df = _staging_nodes(nodes, ["highway"])
+
+    assert nodes_df["id"].tolist() == [1, 2]
+    assert json.loads(nodes_df["tags"][0]) == {"highway": "traffic_signals"}
+    assert pd.isna(nodes_df["tags"][1])
+    point = shapely.from_wkb(nodes_df["geom"][0])
+    assert point.equals(geometry.Point(14.0, 50.0))
+    assert shapely.get_srid(point) == 4326
+
+
+def test_staging_ways_skips_ways_with_missing_nodes():
+    node_coord = {1: (0.0, 0.0), 2: (1.0, 0.0), 3: (1.0, 1.0)}
+    ways = [
+        {"id": 10, "nodes": [1, 2, 3], "tags": {"highway": "primary"}},
+        {"id": 11, "nodes": [3, 4]},
+        {"id": 12, "nodes": [3]},
+        {"id": 13, "nodes": [3, 2]},
+    ]
+
+    ways_df, nodes_ways_df = _staging_ways(ways, node_coord, ["highway"])
 
-    assert rows == [
-        {"way_id": 1, "tag_id": 10, "tag_value": "residential"},
-        {"way_id": 1, "tag_id": 11, "tag_value": "Main St"},
-        {"way_id": 3, "tag_id": 11, "tag_value": "Skipped"},
+    assert ways_df["id"].tolist() == [10, 13]
+    assert ways_df["from"].tolist() == [1, 3]
+    assert ways_df["to"].tolist() == [3, 2]
+    assert shapely.from_wkb(ways_df["geom"][0]).equals(geometry.LineString([(0, 0), (1, 0), (1, 1)]))
+    assert shapely.from_wkb(ways_df["geom"][1]).equals(geometry.LineString([(1, 1), (1, 0)]))
+    assert nodes_ways_df.to_dict("records") == [
+        {"way_id": 10, "node_id": 1, "position": 0},
+        {"way_id": 10, "node_id": 2, "position": 1},
+        {"way_id": 10, "node_id": 3, "position": 2},
+        {"way_id": 13, "node_id": 3, "position": 0},
+        {"way_id": 13, "node_id": 2, "position": 1},
     ]
@@ -0,0 +1,144 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from shapely import geometry
+
+from roadgraphtool.overpass_client import OverpassPolicyConfig, create_api, elements_by_type, query_json
+from roadgraphtool.overpass_import import _road_network_query
+from roadgraphtool.overpass_standin import OverpassQueryError, OverpassStandIn, running_standin
+
+STANDIN_OSM_FILE = Path(__file__).resolve().parent / "resources" / "overpass_standin_test.osm"
+
+
+@pytest.fixture(scope="module")
+def standin():
+    return OverpassStandIn.from_file(STANDIN_OSM_FILE)
+
+
+def _ids(elements, element_type):
+    return sorted(e["id"] for e in elements_by_type({"elements": elements})[element_type])
+
+
+def test_road_network_query_returns_highways_in_polygon_with_nodes(standin):
+    area = geometry.box(0.0, 0.0, 1.0, 1.0)
+    result = standin.run_query(_road_network_query([area], timeout=25))
+
+    assert _ids(result["elements"], "way") == [201]
+    assert _ids(result["elements"], "node") == [21, 22]
+    way = elements_by_type(result)["way"][0]
+    assert way["nodes"] == [21, 22]
+    assert way["tags"]["name"] == "Main Street"
+    assert result["osm3s"]["timestamp_osm_base"] == "2024-01-01T00:00:00Z"
+
+
+def test_boundary_query_outputs_way_geometry(standin):
+    result = standin.run_query(
+        """
+        [out:json][timeout:25];
+        rel["boundary"="administrative"]["name"="Inner Town"]->.r;
+        way(r.r);
+        out geom;
+        """
+    )
+
+    ways = elements_by_type(result)["way"]
+    assert [w["id"] for w in ways] == [103]
+    assert ways[0]["geometry"][0] == {"lat": 0.2, "lon": 0.2}
+
+
+def test_boundary_query_with_enclosing_area_and_admin_level(standin):
+    query = """
+        [out:json][timeout:25];
+        area["boundary"="administrative"]["name"="Testland"];
+        rel(area)(if: t["admin_level"] {op} 4)["boundary"="administrative"]["name"="Inner Town"]->.r;
+        way(r.r);
+        out geom;
+    """
+
+    assert _ids(standin.run_query(query.format(op=">="))["elements"], "way") == [103]
+    assert standin.run_query(query.format(op="<="))["elements"] == []
+
+
+def test_unsupported_statement_is_rejected(standin):
+    with pytest.raises(OverpassQueryError):
+        standin.run_query("[out:json];node(around:100,0,0);out;")
+
+
+def test_query_json_against_running_standin(standin):
+    with running_standin(standin) as endpoint:
+        api = create_api(OverpassPolicyConfig(endpoint=endpoint, user_agent="roadgraphtool-test/0"))
+        result = query_json(api, _road_network_query([geometry.box(0.0, 0.0, 1.0, 1.0)], timeout=25))
+
+    assert _ids(result["elements"], "way") == [201]
+
+
+def test_get_boundary_from_overpass_against_running_standin(standin):
+    from roadgraphtool.insert_area import get_boundary_from_overpass
+
+    with running_standin(standin) as endpoint:
+        config = SimpleNamespace(
+            overpass=SimpleNamespace(endpoint=endpoint, user_agent="roadgraphtool-test/0"),
+            area_insert=SimpleNamespace(
+                boundary_source=SimpleNamespace(
+                    type="overpass", admin_boundary_name="Inner Town", enclosing_areas=["Testland"]
+                )
+            ),
+        )
+        boundary = get_boundary_from_overpass(config)
+
+    assert boundary.equals(geometry.MultiPolygon([geometry.box(0.2, 0.2, 0.4, 0.4)]))
+
+
+def _boundary_config(endpoint, cache_dir):
+    return SimpleNamespace(
+        output_dir=str(cache_dir),
+        overpass=SimpleNamespace(endpoint=endpoint, user_agent="roadgraphtool-test/0"),
+        area_insert=SimpleNamespace(
+            boundary_source=SimpleNamespace(type="overpass", admin_boundary_name="Inner Town")
+        ),
+    )
+
+
+def test_boundary_cache_skips_polygon_assembly_until_boundary_is_edited(tmp_path, mocker):
+    import roadgraphtool.insert_area as insert_area
+
+    standin = OverpassStandIn.from_file(STANDIN_OSM_FILE)
+    assemble = mocker.spy(insert_area, "_assemble_boundary_polygons")
+    expected = geometry.MultiPolygon([geometry.box(0.2, 0.2, 0.4, 0.4)])
+
+    with running_standin(standin) as endpoint:
+        config = _boundary_config(endpoint, tmp_path)
+        assert insert_area.get_boundary_from_overpass(config).equals(expected)
+        assert insert_area.get_boundary_from_overpass(config).equals(expected)
+        assert assemble.call_count == 1
+
+        standin.data.element_timestamps[("way", 103)] = "2024-02-01T00:00:00Z"
+        assert insert_area.get_boundary_from_overpass(config).equals(expected)
+        assert assemble.call_count == 2
+
+
+def test_cached_area_is_reused_without_building_the_boundary(tmp_path, mocker):
+    import roadgraphtool.insert_area as insert_area
+
+    standin = OverpassStandIn.from_file(STANDIN_OSM_FILE)
+    area_rows = mocker.patch.object(insert_area.db.db, "execute_sql_and_fetch_all_rows", return_value=[(7,)])
+
+    with running_standin(standin) as endpoint:
+        config = _boundary_config(endpoint, tmp_path)
+        assert insert_area.get_cached_area_id(config, "Inner Town") is None
+
+        insert_area.get_boundary_from_overpass(config)
+        insert_area._store_cached_area_id(insert_area._overpass_boundary_cache(config)[2], 7)
+        assemble = mocker.spy(insert_area, "_assemble_boundary_polygons")
+        from_wkb = mocker.spy(insert_area.shapely, "from_wkb")
+        assert insert_area.get_cached_area_id(config, "Inner Town") == 7
+        assert assemble.call_count == 0
+        assert from_wkb.call_count == 0
+
+        area_rows.return_value = []
+        assert insert_area.get_cached_area_id(config, "Inner Town") is None
+
+        area_rows.return_value = [(7,)]
+        standin.data.element_timestamps[("way", 103)] = "2024-02-01T00:00:00Z"
+        assert insert_area.get_cached_area_id(config, "Inner Town") is None
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from roadgraphtool.speed_coverage import add_length_shares, build_coverage_report, save_speed_coverage_report
+
+
+def _coverage() -> pd.DataFrame:
+    # rows as returned by get_speed_coverage: area rows (NULL highway) and highway rows, speeds and one slot
+    rows = [
+        (None, None, None, 1, 2, 300.0),
+        (None, None, None, 3, 1, 100.0),
+        (None, None, None, 5, 1, 200.0),
+        (None, None, None, None, 1, 400.0),
+        (None, None, "primary", 1, 2, 300.0),
+        (None, None, "primary", 3, 1, 100.0),
+        (None, None, "residential", 5, 1, 200.0),
+        (None, None, "residential", None, 1, 400.0),
+        (1, 8, None, 1, 1, 250.0),
+        (1, 8, "primary", 1, 1, 250.0),
+    ]
+    return pd.DataFrame(rows, columns=["isodow", "hour", "highway", "quality", "segment_count", "length"]).astype(
+        {"isodow": float, "hour": float, "quality": float}
+    )
+
+
+def test_report_shares_by_source_highway_and_slot():
+    report = build_coverage_report(_coverage())
+
+    assert report["segment_count"] == 5
+    assert report["length"] == 1000.0
+    assert report["speeds"]["length_shares"] == pytest.approx(
+        {"records": 0.3, "neighborhood": 0.1, "average": 0.2, "none": 0.4}
+    )
+    assert report["speeds"]["by_quality"][-1] == {
+        "quality": None, "segment_count": 1, "length": 400.0, "length_share": 0.4
+    }
+    assert report["highways"]["primary"]["length_shares"]["records"] == pytest.approx(0.75)
+    assert report["highways"]["residential"]["length_shares"]["none"] == pytest.approx(2 / 3)
+    assert [(slot["isodow"], slot["hour"]) for slot in report["slots"]] == [(1, 8)]
+    assert report["slots"][0]["length_shares"]["none"] == pytest.approx(0.75)
+
+
+def test_csv_rows_have_length_shares_in_their_highway_class(tmp_path):
+    coverage = _coverage()
+
+    shares = add_length_shares(coverage)["length_share"].to_numpy()
+
+    assert shares == pytest.approx(np.array([0.3, 0.1, 0.2, 0.4, 0.75, 0.25, 1 / 3, 2 / 3, 0.25, 0.625]))
+    csv_path = save_speed_coverage_report(coverage, tmp_path, "csv")
+    assert pd.read_csv(csv_path)["length_share"].to_numpy() == pytest.approx(shares)
+    json_path = save_speed_coverage_report(coverage, tmp_path)
+    with open(json_path) as f:
+        assert json.load(f)["length"] == 1000.0
+    with pytest.raises(ValueError, match="Unsupported speed coverage report format"):
+        save_speed_coverage_report(coverage, tmp_path, "xlsx")
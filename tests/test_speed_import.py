@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from roadgraphtool.speed_import import QuarterlyAggregator, read_speed_records, store_quarterly_records
+
+
+def _records(rows: list[tuple[str, int, int, float]]) -> pd.DataFrame:
+    records = pd.DataFrame(rows, columns=["datetime", "from_osm_id", "to_osm_id", "speed"])
+    records["datetime"] = pd.to_datetime(records["datetime"])
+    return records
+
+
+def test_quarterly_aggregates_match_the_exact_ones():
+    rng = np.random.default_rng(0)
+    speeds = np.round(rng.uniform(5, 90, 40), 1)
+    records = _records([("2024-02-01 08:15", 1, 2, speed) for speed in speeds])
+
+    aggregator = QuarterlyAggregator()
+    # added in two chunks, as in the import
+    aggregator.add(records.iloc[:15])
+    aggregator.add(records.iloc[15:])
+    quarterly = aggregator.get_quarterly_records()
+
+    assert len(quarterly) == 1
+    row = quarterly.iloc[0]
+    assert (row["year"], row["quarter"], row["hour"]) == (2024, 1, 8)
+    assert row["speed_mean"] == pytest.approx(speeds.mean())
+    assert row["st_dev"] == pytest.approx(speeds.std(ddof=1))
+    sorted_speeds = np.sort(speeds)
+    # within the relative accuracy of the sketch
+    assert row["speed_p50"] == pytest.approx(sorted_speeds[19], rel=0.01)
+    assert row["speed_p85"] == pytest.approx(sorted_speeds[33], rel=0.01)
+
+
+def test_records_are_aggregated_by_quarter_and_hour():
+    records = _records([
+        ("2024-03-31 23:59", 1, 2, 10.0),
+        ("2024-04-01 00:01", 1, 2, 20.0),
+        ("2024-04-02 00:30", 1, 2, 40.0),
+        ("2024-04-02 00:30", 2, 1, 50.0),
+    ])
+    aggregator = QuarterlyAggregator()
+    aggregator.add(records)
+
+    quarterly = aggregator.get_quarterly_records().set_index(["quarter", "hour", "from_osm_id"])
+
+    assert aggregator.get_quarters() == [(2024, 1), (2024, 2)]
+    assert quarterly.loc[(2, 0, 1), "speed_mean"] == pytest.approx(30.0)
+    assert quarterly.loc[(1, 23, 1), "st_dev"] == 0
+    assert quarterly.loc[(2, 0, 2), "speed_p85"] == pytest.approx(50.0, rel=0.01)
+
+
+def test_single_record_cell_has_zero_st_dev():
+    aggregator = QuarterlyAggregator()
+    aggregator.add(_records([("2024-02-01 08:15", 1, 2, 30.0), ("2024-02-01 09:15", 1, 2, 10.0)]))
+    aggregator.add(_records([("2024-02-01 09:45", 1, 2, 20.0)]))
+
+    quarterly = aggregator.get_quarterly_records().set_index("hour")
+
+    assert quarterly.loc[8, "st_dev"] == 0
+    assert quarterly.loc[8, "speed_mean"] == pytest.approx(30.0)
+    assert quarterly.loc[9, "st_dev"] == pytest.approx(np.std([10.0, 20.0], ddof=1))
+    assert not quarterly["st_dev"].isna().any()
+
+
+def test_compaction_keeps_the_aggregates():
+    rng = np.random.default_rng(1)
+    records = _records([
+        (f"2024-0{month}-01 {hour:02d}:15", int(node), int(node) + 1, float(speed))
+        for month, hour, node, speed in zip(
+            rng.integers(1, 7, 300), rng.integers(0, 3, 300), rng.integers(1, 4, 300), rng.uniform(5, 90, 300)
+        )
+    ])
+    compacted = QuarterlyAggregator(compaction_rows=1)
+    collected = QuarterlyAggregator()
+    for start in range(0, len(records), 20):
+        compacted.add(records.iloc[start:start + 20])
+        collected.add(records.iloc[start:start + 20])
+
+    assert compacted.get_quarters() == collected.get_quarters()
+    pd.testing.assert_frame_equal(compacted.get_quarterly_records(), collected.get_quarterly_records())
+
+
+def test_failed_copy_keeps_the_stored_quarter(mocker):
+    db = mocker.patch("roadgraphtool.speed_import.db")
+    cursor = db.get_new_cursor.return_value
+    cursor.copy_expert.side_effect = RuntimeError("COPY failed")
+    aggregator = QuarterlyAggregator()
+    aggregator.add(_records([("2024-02-01 08:15", 1, 2, 30.0)]))
+
+    with pytest.raises(RuntimeError):
+        store_quarterly_records(3, aggregator)
+
+    assert "DELETE FROM speed_records_quarterly" in cursor.execute.call_args.args[0]
+    cursor.connection.rollback.assert_called_once()
+    db.commit.assert_not_called()
+
+
+def test_csv_is_read_in_chunks(tmp_path):
+    path = tmp_path / "records.csv"
+    path.write_text(
+        "datetime,from_osm_id,to_osm_id,speed,provider\n"
+        "2024-01-01 08:00:00,1,2,30.5,a\n"
+        "2024-01-01 09:00:00,2,3,40.0,b\n"
+        "2024-01-01 10:00:00,3,4,50.0,c\n"
+    )
+
+    chunks = list(read_speed_records(path, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[0].columns.tolist() == ["datetime", "from_osm_id", "to_osm_id", "speed"]
+    assert chunks[1]["datetime"].iloc[0] == pd.Timestamp("2024-01-01 10:00")
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from roadgraphtool import speed_sketch
+
+
+def test_quantiles_are_within_relative_accuracy():
+    speeds = np.random.default_rng(0).uniform(5, 130, 1000)
+    sketch = speed_sketch.build_sketch(speeds)
+
+    for quantile in (0.1, 0.5, 0.85, 0.99):
+        exact = np.quantile(speeds, quantile, method="lower")
+        assert speed_sketch.get_quantile(sketch, quantile) == pytest.approx(exact, rel=speed_sketch.RELATIVE_ACCURACY)
+
+
+def test_merged_sketch_equals_sketch_of_all_speeds():
+    rng = np.random.default_rng(1)
+    speeds, other_speeds = rng.uniform(0, 90, 300), rng.uniform(20, 60, 200)
+    speeds[:5] = 0
+
+    merged = speed_sketch.merge_sketches(speed_sketch.build_sketch(speeds), speed_sketch.build_sketch(other_speeds))
+
+    assert merged == speed_sketch.build_sketch(np.concatenate([speeds, other_speeds]))
+    assert speed_sketch.get_quantile(merged, 0) == 0
+
+
+def test_sketch_encoding_matches_sql():
+    # speed_sketch_bucket(10) = 116, speed_sketch_bucket(20) = 150
+    assert speed_sketch.build_sketch([10, 10, 20]).hex() == "00000074000000020000009600000001"
+    assert np.isnan(speed_sketch.get_quantile(b"", 0.5))
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from roadgraphtool.sql_install import _create_missing_tables, get_table_name
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "src" / "roadgraphtool" / "SQL"
+
+
+def test_every_table_file_names_its_table():
+    names = {path.name: get_table_name(path) for path in (SQL_DIR / "tables").glob("*.sql")}
+
+    assert names["13_speed_records.sql"] == "speed_records"
+    assert names["21_contraction_tile_segments.sql"] == "contraction_tile_segments"
+    assert names["08_node_segment_data.sql"] is None
+    assert [name for name, table in names.items() if table is None] == ["08_node_segment_data.sql"]
+
+
+def test_only_missing_tables_are_created(mocker):
+    db = mocker.Mock()
+    db.execute_sql_and_fetch_all_rows.side_effect = lambda sql: [("'public.speed_profiles'" not in sql,)]
+    execute_sql_file = mocker.patch("roadgraphtool.sql_install._execute_sql_file")
+
+    _create_missing_tables(db, SQL_DIR, "public")
+
+    assert [call.args[1].name for call in execute_sql_file.call_args_list] == ["26_speed_profiles.sql"]
@@ -0,0 +1,23 @@
+import numpy as np
+
+from roadgraphtool.strong_components import get_strong_components
+
+
+def _components(edges: list[tuple[int, int]]) -> dict:
+    edges = np.array(edges, dtype=np.int64)
+    components = get_strong_components(edges[:, 0], edges[:, 1])
+    return dict(zip(components["node_id"], components["component_id"]))
+
+
+def test_components_are_numbered_from_the_largest():
+    # cycle 10 -> 11 -> 12 -> 10, two-way road 20 <-> 21, one-way connection 12 -> 20 and a dead end 21 -> 30
+    components = _components([(10, 11), (11, 12), (12, 10), (20, 21), (21, 20), (12, 20), (21, 30)])
+
+    assert components == {10: 0, 11: 0, 12: 0, 20: 1, 21: 1, 30: 2}
+
+
+def test_one_way_chain_gives_one_component_per_node():
+    components = _components([(1, 2), (2, 3)])
+
+    assert sorted(components) == [1, 2, 3]
+    assert sorted(components.values()) == [0, 1, 2]
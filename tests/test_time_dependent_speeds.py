@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from roadgraphtool.time_dependent_speeds import build_travel_time_matrix, save_travel_time_matrix
+
+
+def _slot_speeds(rows: list[tuple[int, int, int, float]]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["edge_id", "isodow", "hour", "speed"])
+
+
+def test_travel_times_by_edge_and_slot():
+    edges = pd.DataFrame({"db_id": [7, 3, 5], "length": [1000.0, 500.0, 100.0], "speed": [40.0, np.nan, 20.0]})
+    slot_speeds = _slot_speeds([(3, 2, 8, 30.0), (7, 1, 17, 60.0), (7, 2, 8, 36.0), (99, 1, 17, 10.0)])
+
+    travel_times, slots = build_travel_time_matrix(edges, slot_speeds)
+
+    assert list(zip(slots["isodow"], slots["hour"])) == [(1, 17), (2, 8)]
+    expected = [
+        [60.0, 100.0],  # slot speeds
+        [36.0, 60.0],  # no exported speed, 50 km/h default in the first slot
+        [18.0, 18.0],  # exported speed in both slots
+    ]
+    assert travel_times == pytest.approx(np.array(expected))
+
+
+def test_npy_matrix_is_saved_with_slots_and_edges(tmp_path):
+    edges = pd.DataFrame({"db_id": [1, 2], "length": [100.0, 200.0]})
+    travel_times, slots = build_travel_time_matrix(edges, _slot_speeds([(1, 1, 0, 36.0)]))
+
+    save_travel_time_matrix(tmp_path, edges["db_id"].to_numpy(), travel_times, slots)
+
+    assert np.load(tmp_path / "travel_times.npy").shape == (2, 1)
+    assert np.load(tmp_path / "travel_time_edges.npy").tolist() == [1, 2]
+    assert pd.read_csv(tmp_path / "travel_time_slots.csv", sep='\t').columns.tolist() == ["column", "isodow", "hour"]